@@ -0,0 +1,312 @@
+"""
+Relleno en paralelo de comentarios: re-traducción o re-puntuación de sentimiento.
+
+Los IDs de comentario se reparten en rangos fijos (estables entre ejecuciones, cada
+uno con su propio checkpoint, que se borra al completarse) que atiende un pool de
+procesos. Cada proceso carga su propia copia del modelo (o la mapea del fichero
+compartido con SHARED_WEIGHTS=1) con un número acotado de hilos de torch y escribe
+los resultados con actualizaciones masivas por bloque.
+
+Uso:
+    python -m backend.backfill translate [--workers N] [--threads N] [--reset]
+    python -m backend.backfill sentiment [--umbral 0.35] [--model NOMBRE]
+    SENTIMENT_MODE=multilingual python -m backend.backfill sentiment   (sobre el texto original)
+    python -m backend.backfill relabel [--umbral 0.5] [--red Reddit]
+    python -m backend.backfill language [--reset]
+
+`relabel` no ejecuta ningún modelo: recalcula `sentiment_label` en SQL a partir de
+las probabilidades guardadas (prob_negative / prob_neutral / prob_positive).
+`language` tampoco: rellena `Comment.language` con el detector local, en este proceso.
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select
+
+from .database import SessionLocal, Publication, Comment, init_db, reset_checkpoints
+from .report_cache import report_cache
+from .report_charts import clear_chart_cache
+from .language_detect import detectar_idiomas
+from .inference_config import available_cpus, configure_torch_threads, threads_per_process
+from .sentiment_classifier import default_sentiment_model, is_multilingual, load_sentiment_model
+from .sentiment_utils import etiquetar_resultados, UMBRAL_POR_RED
+from .shared_weights import load_translator
+from .translate_existing_data import (
+    BackfillTarget, TRANSLATION_MODEL, CHUNK_SIZE, BATCH_SIZE,
+    length_bucketed_batches, pending_filter, run_backfill, translate_rows
+)
+
+RANGE_SIZE = 5000  # IDs por tarea del pool
+
+TASKS = {
+    "translate": BackfillTarget("translate:comments", Comment, "text_original", "text_translated", int,
+                                retry_identity=True, done_column="translated_at"),
+    "sentiment": BackfillTarget("sentiment:comments", Comment, "text_translated", "sentiment_label", int,
+                                only_pending=False, src_fallback="text_original"),
+}
+# El de sentimiento depende de SENTIMENT_MODE (ver `default_sentiment_model`)
+DEFAULT_MODELS = {"translate": lambda: TRANSLATION_MODEL, "sentiment": default_sentiment_model}
+
+# Tareas sin modelo: no compensa un pool de procesos, se ejecutan en el proceso actual
+LOCAL_TASKS = {
+    "language": BackfillTarget("language:comments", Comment, "text_original", "language", int),
+}
+
+
+def _detect_languages(rows: List[Tuple]) -> Dict:
+    return dict(zip((row_id for row_id, _ in rows), detectar_idiomas([text for _, text in rows])))
+
+
+def task_target(task: str, model) -> BackfillTarget:
+    """Con un modelo multilingüe (nombre o instancia) el sentimiento se calcula sobre el texto original."""
+    target = TASKS[task]
+    if task == "sentiment" and is_multilingual(model):
+        return target._replace(src="text_original", src_fallback=None)
+    return target
+
+
+def default_threads(workers: int) -> int:
+    """Hilos intra-op por proceso: los núcleos repartidos entre los procesos (sin sobresuscribir)."""
+    return threads_per_process(workers)
+
+
+def plan_ranges(target: BackfillTarget, range_size: int = RANGE_SIZE) -> List[Tuple[int, int]]:
+    """Rangos [desde, hasta] alineados a `range_size` que contienen filas a procesar."""
+    session = SessionLocal()
+    try:
+        low, high = session.query(func.min(Comment.id), func.max(Comment.id)).filter(*pending_filter(target)).one()
+    finally:
+        session.close()
+    if low is None:
+        return []
+    first = (low - 1) // range_size
+    last = (high - 1) // range_size
+    return [(k * range_size + 1, (k + 1) * range_size) for k in range(first, last + 1)]
+
+
+# --- Lado del proceso de trabajo ---
+
+_worker_model = None
+_worker_options: Dict = {}
+
+
+def _init_worker(task: str, model_name: str, threads: int, options: Dict) -> None:
+    global _worker_model, _worker_options
+    configure_torch_threads(threads, 1)
+    # Las conexiones heredadas del proceso padre no deben reutilizarse
+    from .database import engine
+    engine.dispose(close=False)
+
+    if task == "translate":
+        _worker_model = load_translator(model_name)
+    else:
+        # Clasificador ligero (o el pipeline con SENTIMENT_BACKEND=pipeline)
+        _worker_model = load_sentiment_model(model_name)
+    _worker_options = options
+
+
+def _score_rows(rows: List[Tuple]) -> Dict:
+    """Puntúa [(id, texto)] con el modelo del proceso y retorna {id: {etiqueta, score, probabilidades}}."""
+    batch_size = _worker_options.get("batch_size", BATCH_SIZE)
+    umbral = _worker_options.get("umbral") or 0.0
+    results = {}
+    # El clasificador ligero arma sus propios lotes por presupuesto de tokens: se le pasa el bloque entero
+    batches = [rows] if getattr(_worker_model, "max_tokens", None) else length_bucketed_batches(rows, batch_size)
+    for batch in batches:
+        outputs = _worker_model([text for _, text in batch], batch_size=min(batch_size, len(batch)), truncation=True, top_k=None)
+        for (row_id, _), (label, score, probs) in zip(batch, etiquetar_resultados(outputs, umbral_confianza=umbral)):
+            results[row_id] = {
+                "sentiment_label": label,
+                "sentiment_score": score,
+                "prob_negative": probs.get('negative'),
+                "prob_neutral": probs.get('neutral'),
+                "prob_positive": probs.get('positive'),
+            }
+    return results
+
+
+def relabel_expression(umbral: float):
+    """
+    `sentiment_label` a partir de las probabilidades guardadas, como CASE de SQL.
+    Misma regla que `etiqueta_desde_probabilidades` (desempate positive > negative > neutral).
+    """
+    p_neg, p_neu, p_pos = Comment.prob_negative, Comment.prob_neutral, Comment.prob_positive
+    pos_wins = and_(p_pos >= p_neg, p_pos >= p_neu)
+    neg_wins = p_neg >= p_neu
+    top = case((pos_wins, p_pos), (neg_wins, p_neg), else_=p_neu)
+    return case(
+        (top < umbral, 'neutral'),
+        (pos_wins, 'positive'),
+        (neg_wins, 'negative'),
+        else_='neutral'
+    )
+
+
+def relabel_in_sql(social_network: Optional[str] = None, umbral: Optional[float] = None) -> int:
+    """
+    Re-deriva `sentiment_label` en bloque con un UPDATE por red. Sin `umbral` se aplica la
+    política de cada red (`UMBRAL_POR_RED`; 0.0 para las demás). Retorna las filas actualizadas.
+    """
+    session = SessionLocal()
+    try:
+        if social_network:
+            networks = [social_network]
+        else:
+            networks = [n for (n,) in session.query(Publication.red_social).distinct()]
+
+        updated = 0
+        for network in networks:
+            network_umbral = umbral if umbral is not None else UMBRAL_POR_RED.get(network, 0.0)
+            pub_ids = select(Publication.id).where(Publication.red_social == network)
+            count = (
+                session.query(Comment)
+                .filter(
+                    Comment.prob_negative.isnot(None), Comment.prob_neutral.isnot(None), Comment.prob_positive.isnot(None),
+                    Comment.publication_id.in_(pub_ids)
+                )
+                .update({Comment.sentiment_label: relabel_expression(network_umbral)}, synchronize_session=False)
+            )
+            print(f"✓ {network}: {count} comentarios re-etiquetados (umbral {network_umbral})")
+            updated += count
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    # Las etiquetas cambiaron sin nuevos IDs: los PDFs y gráficos en caché ya no valen
+    report_cache.invalidate()
+    clear_chart_cache()
+    return updated
+
+
+def range_job(target: BackfillTarget, model_name: str, low: int) -> str:
+    """
+    Checkpoint de un rango. Lleva el modelo: una re-puntuación interrumpida no se
+    reanuda con otro modelo (el prefijo sigue siendo `target.job`, para --reset).
+    """
+    return f"{target.job}@{model_name}@{low}"
+
+
+def _run_range(task: str, low: int, high: int, chunk_size: int) -> Tuple[int, int, int, float]:
+    target = task_target(task, _worker_model)
+    if task == "translate":
+        compute = lambda rows: translate_rows(_worker_model, rows, _worker_options.get("batch_size", BATCH_SIZE))
+    else:
+        compute = _score_rows
+    start = time.perf_counter()
+    job = range_job(target, _worker_options.get("model_name", ""), low)
+    # La caché de reportes la invalida el proceso principal al terminar (un índice, sin carreras)
+    updated = run_backfill(target, compute, chunk_size, job=job, after=low - 1, upper=high, invalidate_reports=False)
+    return low, high, updated, time.perf_counter() - start
+
+
+def run_parallel_backfill(
+    task: str,
+    workers: int = 2,
+    threads: Optional[int] = None,
+    model_name: Optional[str] = None,
+    range_size: int = RANGE_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+    batch_size: int = BATCH_SIZE,
+    umbral: Optional[float] = None
+) -> int:
+    """Lanza el relleno `task` en `workers` procesos y retorna las filas actualizadas."""
+    model_name = model_name or DEFAULT_MODELS[task]()
+    target = task_target(task, model_name)
+    ranges = plan_ranges(target, range_size)
+    if not ranges:
+        print("✅ No hay filas que procesar")
+        return 0
+
+    threads = threads or default_threads(workers)
+    print(f"🚀 {task}: {len(ranges)} rangos de {range_size} IDs | {workers} procesos x {threads} hilos | modelo {model_name}")
+
+    total = 0
+    start = time.perf_counter()
+    # "spawn": cada proceso carga su propio modelo desde cero (torch no es seguro tras fork)
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(task, model_name, threads, {"batch_size": batch_size, "umbral": umbral, "model_name": model_name})
+        ) as executor:
+            futures = [executor.submit(_run_range, task, low, high, chunk_size) for low, high in ranges]
+            for future in as_completed(futures):
+                low, high, updated, elapsed = future.result()
+                total += updated
+                rate = total / (time.perf_counter() - start)
+                print(f"✓ IDs {low}-{high}: {updated} filas en {elapsed:.1f} s | total {total} ({rate:.1f} filas/s)")
+    except BaseException:
+        # Los bloques ya confirmados (también los de un rango a medias) cambiaron los datos
+        report_cache.invalidate()
+        raise
+
+    elapsed = time.perf_counter() - start
+    print(f"🎉 {total} filas en {elapsed:.1f} s -> {total / elapsed if elapsed else 0:.1f} filas/s")
+
+    # Cada rango borra su checkpoint al terminar; aquí se retiran también los de
+    # ejecuciones anteriores (p. ej. con otro modelo) para que la próxima empiece de cero
+    session = SessionLocal()
+    try:
+        reset_checkpoints(session, f"{target.job}@")
+    finally:
+        session.close()
+
+    if task == "sentiment" and total:
+        # Etiqueta final según la política de cada red (o el umbral indicado); invalida los reportes
+        relabel_in_sql(umbral=umbral)
+    elif total:
+        # Traducciones nuevas con los mismos IDs: los PDFs en caché ya no valen
+        report_cache.invalidate()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relleno en paralelo de traducciones o sentimiento.")
+    parser.add_argument("task", choices=sorted(TASKS) + sorted(LOCAL_TASKS) + ["relabel"],
+                        help="translate: re-traducir | sentiment: re-puntuar | relabel: re-etiquetar en SQL | language: detectar idioma")
+    parser.add_argument("--workers", type=int, default=max(1, available_cpus() // 2), help="Procesos del pool")
+    parser.add_argument("--threads", type=int, default=None, help="Hilos de torch por proceso (por defecto núcleos / procesos)")
+    parser.add_argument("--model", default=None, help="Modelo de HuggingFace a usar")
+    parser.add_argument("--range-size", type=int, default=RANGE_SIZE, help="IDs por tarea del pool")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Filas por bloque confirmado")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Textos por lote del modelo")
+    parser.add_argument("--umbral", type=float, default=None, help="Confianza mínima para no marcar como neutral (por defecto, la de cada red)")
+    parser.add_argument("--red", default=None, help="Red social a re-etiquetar (relabel; por defecto todas)")
+    parser.add_argument("--reset", action="store_true", help="Olvida los checkpoints de la tarea y empieza de cero")
+    args = parser.parse_args()
+
+    init_db()  # crea la tabla de checkpoints / columnas nuevas si no existen
+    if args.task == "relabel":
+        print(f"🎉 {relabel_in_sql(args.red, args.umbral)} comentarios re-etiquetados")
+        return
+
+    target = TASKS.get(args.task) or LOCAL_TASKS[args.task]
+    if args.reset:
+        session = SessionLocal()
+        try:
+            print(f"🗑️ {reset_checkpoints(session, target.job)} checkpoints borrados")
+        finally:
+            session.close()
+
+    if args.task in LOCAL_TASKS:
+        start = time.perf_counter()
+        total = run_backfill(target, _detect_languages, args.chunk_size)
+        print(f"🎉 {total} filas en {time.perf_counter() - start:.1f} s")
+        return
+
+    run_parallel_backfill(
+        args.task, workers=args.workers, threads=args.threads, model_name=args.model,
+        range_size=args.range_size, chunk_size=args.chunk_size, batch_size=args.batch_size, umbral=args.umbral
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Lotes por presupuesto de tokens para el clasificador de sentimiento.
+
+Un `batch_size` fijo es demasiado pequeño para comentarios cortos (muchas llamadas
+al modelo) y demasiado grande para los largos (picos de memoria). Aquí los textos
+se ordenan por su longitud real en tokens y se agrupan hasta que el lote con
+padding (nº de textos x longitud del más largo) llega a `max_tokens`.
+
+El presupuesto óptimo depende de la máquina: `python -m backend.batching` mide el
+rendimiento con varios presupuestos y guarda el mejor por modelo, dispositivo y
+núcleos en CALIBRATION_FILE, de donde lo lee `SentimentClassifier`.
+
+Uso: python -m backend.batching [--model NOMBRE] [--seq-len 64]
+"""
+import argparse
+import json
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_TOKENS = 4096
+MAX_BATCH_SIZE = 256     # tope de textos por lote aunque sean muy cortos
+CALIBRATION_CANDIDATES = (512, 1024, 2048, 4096, 8192, 16384)
+CALIBRATION_FILE = os.path.join(os.path.expanduser("~"), ".cache", "sentimetrika", "token_budget.json")
+
+
+def token_budget_batches(lengths: Sequence[int], max_tokens: int, max_batch_size: int = MAX_BATCH_SIZE) -> List[List[int]]:
+    """
+    Índices agrupados en lotes cuyo coste con padding (textos x longitud máxima) no
+    supera `max_tokens`. Un texto más largo que el presupuesto va solo en su lote.
+    """
+    orden = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in orden:
+        # Orden ascendente: el texto nuevo es el más largo del lote
+        if current and ((len(current) + 1) * lengths[i] > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def dedupe_texts(texts: Sequence[str]) -> Tuple[List[str], List[int]]:
+    """
+    Textos únicos (en orden de aparición) y, para cada texto de entrada, la posición
+    de su único: `resultados_unicos[inversa[i]]` es el resultado del texto i.
+    """
+    positions: dict = {}
+    inverse = [positions.setdefault(text, len(positions)) for text in texts]
+    return list(positions), inverse
+
+
+def dedup_summary(total: int, unique: int) -> str:
+    """Texto para los mensajes de progreso: '120 únicos de 150 (20% duplicados)'."""
+    ratio = 1 - unique / total if total else 0.0
+    return f"{unique} únicos de {total} ({ratio:.0%} duplicados)"
+
+
+# --- Calibración por máquina ---
+
+def _calibration_key(model_name: str, device) -> str:
+    return f"{model_name}|{device}|{os.cpu_count()}"
+
+
+def load_calibration(model_name: str, device) -> Optional[int]:
+    """Presupuesto calibrado para este modelo en esta máquina, si existe."""
+    try:
+        with open(CALIBRATION_FILE, "r", encoding="utf-8") as f:
+            entry = json.load(f).get(_calibration_key(model_name, device))
+    except (OSError, ValueError):
+        return None
+    return entry.get("max_tokens") if entry else None
+
+
+def save_calibration(model_name: str, device, max_tokens: int, throughput: float) -> None:
+    try:
+        with open(CALIBRATION_FILE, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    index[_calibration_key(model_name, device)] = {"max_tokens": max_tokens, "tokens_per_second": round(throughput, 1)}
+    os.makedirs(os.path.dirname(CALIBRATION_FILE), exist_ok=True)
+    tmp_path = f"{CALIBRATION_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, CALIBRATION_FILE)
+
+
+def default_max_tokens(model_name: str, device) -> int:
+    """SENTIMENT_MAX_TOKENS (0 = lotes de tamaño fijo), la calibración guardada o DEFAULT_MAX_TOKENS."""
+    env = os.getenv("SENTIMENT_MAX_TOKENS")
+    if env is not None:
+        try:
+            return max(0, int(env))
+        except ValueError:
+            pass
+    return load_calibration(model_name, device) or DEFAULT_MAX_TOKENS
+
+
+def calibrate_token_budget(
+    classifier,
+    candidates: Sequence[int] = CALIBRATION_CANDIDATES,
+    seq_len: int = 64,
+    repeats: int = 2
+) -> Tuple[int, float]:
+    """
+    Mide tokens/s del clasificador con lotes de cada presupuesto (textos sintéticos de
+    `seq_len` tokens) y retorna (presupuesto, tokens/s) del menor presupuesto a un 5%
+    del mejor rendimiento.
+    Se detiene al agotar la memoria o cuando crecer deja de compensar.
+    """
+    sample = " ".join(["the service was fine but the delivery was late"] * max(1, seq_len // 9))
+    length = len(classifier._encode([sample])[0]) + classifier.tokenizer.num_special_tokens_to_add()
+    results = []
+    for budget in candidates:
+        texts = [sample] * max(1, budget // length)
+        try:
+            classifier.predict_logits(texts[:2], batch_size=2)  # calentamiento
+            best = min(_timed(classifier, texts, budget) for _ in range(repeats))
+        except (RuntimeError, MemoryError) as e:
+            print(f"  {budget:>6} tokens/lote: sin memoria ({e.__class__.__name__}), se detiene")
+            break
+        throughput = len(texts) * length / best
+        results.append((budget, throughput))
+        print(f"  {budget:>6} tokens/lote: {throughput:,.0f} tokens/s")
+        if len(results) >= 3 and throughput < max(t for _, t in results[:-1]) * 0.95:
+            break
+
+    if not results:
+        return DEFAULT_MAX_TOKENS, 0.0
+    top = max(t for _, t in results)
+    return min(((budget, t) for budget, t in results if t >= top * 0.95), key=lambda r: r[0])
+
+
+def _timed(classifier, texts: List[str], budget: int) -> float:
+    previous, classifier.max_tokens = classifier.max_tokens, budget
+    try:
+        start = time.perf_counter()
+        classifier.predict_logits(texts)
+        return time.perf_counter() - start
+    finally:
+        classifier.max_tokens = previous
+
+
+def main():
+    from .sentiment_classifier import SentimentClassifier, default_sentiment_model
+
+    parser = argparse.ArgumentParser(description="Calibra el presupuesto de tokens por lote del clasificador.")
+    parser.add_argument("--model", default=None, help="Modelo de HuggingFace (por defecto el de SENTIMENT_MODE)")
+    parser.add_argument("--seq-len", type=int, default=64, help="Longitud en tokens de los textos sintéticos")
+    args = parser.parse_args()
+
+    model_name = args.model or default_sentiment_model()
+    print(f"⏳ Cargando {model_name}...")
+    classifier = SentimentClassifier(model_name, chunk_long_texts=False)
+    print(f"📏 Calibrando en {classifier.device} ({os.cpu_count()} núcleos)...")
+    budget, throughput = calibrate_token_budget(classifier, seq_len=args.seq_len)
+    save_calibration(model_name, classifier.device, budget, throughput)
+    print(f"✅ Presupuesto elegido: {budget} tokens por lote (guardado en {CALIBRATION_FILE})")
+
+
+if __name__ == "__main__":
+    main()
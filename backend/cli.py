@@ -0,0 +1,118 @@
+"""
+Scraping sin interfaz: demonio que ejecuta los trabajos de `scrape_jobs` según su
+intervalo, con los modelos cargados una sola vez y sin importar Flet.
+
+Uso:
+    python -m backend.cli                                  (trabajos de scrape_jobs.json)
+    python -m backend.cli --config /etc/sentimetrika/jobs.json
+    python -m backend.cli --reddit Python --reddit chile --every 30
+    python -m backend.cli --mastodon-ids-file backend/mastodon_ids.txt --once
+    python -m backend.cli --list                           (muestra los trabajos y sale)
+
+Los trabajos se ejecutan de uno en uno (comparten modelo y base de datos). SIGINT o
+SIGTERM detienen el demonio al terminar el trabajo en curso (Reddit se detiene entre
+lotes). Con INFERENCE_WORKERS / SHARED_WEIGHTS los modelos van al pool de procesos,
+igual que en la app.
+"""
+import argparse
+import signal
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from .database import init_db
+from .inference_pool import load_analysis_models
+from .scrape_jobs import DEFAULT_EVERY_MINUTES, ScrapeJob, load_jobs, run_job
+
+
+def _log(message: str) -> None:
+    # flush: los registros del demonio (systemd, docker) deben salir al momento
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {message}", flush=True)
+
+
+def jobs_from_args(args) -> List[ScrapeJob]:
+    """Trabajos de la línea de comandos; si no se indica ninguno, los del fichero de configuración."""
+    every = args.every or DEFAULT_EVERY_MINUTES
+    jobs = [ScrapeJob("reddit", every, subreddit=name, posts=args.posts, comments=args.comments) for name in args.reddit]
+    jobs += [ScrapeJob("facebook", every, page_id=page_id, token_env=args.facebook_token_env) for page_id in args.facebook]
+    if args.mastodon_ids or args.mastodon_ids_file:
+        jobs.append(ScrapeJob("mastodon", every, ids=tuple(args.mastodon_ids), ids_file=args.mastodon_ids_file))
+    if jobs:
+        return jobs
+    jobs = load_jobs(args.config)
+    return [job._replace(every_minutes=args.every) for job in jobs] if args.every else jobs
+
+
+def run_schedule(
+    jobs: List[ScrapeJob],
+    translator: Optional[Callable],
+    sentiment: Optional[Callable],
+    stop_event: threading.Event,
+    once: bool = False
+) -> None:
+    """
+    Ejecuta cada trabajo al arrancar y después cada `every_minutes` (contados desde
+    que termina). Un trabajo que falla se registra y se reintenta en su siguiente turno.
+    """
+    next_run = [0.0] * len(jobs)
+    while not stop_event.is_set():
+        for i, job in enumerate(jobs):
+            if stop_event.is_set() or next_run[i] > time.monotonic():
+                continue
+            _log(f"🚀 {job.name}")
+            start = time.perf_counter()
+            try:
+                run_job(job, translator, sentiment, lambda msg, name=job.name: _log(f"  [{name}] {msg}"), stop_event=stop_event)
+                _log(f"✅ {job.name} en {time.perf_counter() - start:.1f} s")
+            except Exception as e:
+                _log(f"❌ {job.name}: {e}")
+            next_run[i] = time.monotonic() + job.every_minutes * 60
+        if once:
+            return
+        wait = max(1.0, min(next_run) - time.monotonic())
+        _log(f"💤 Próximo trabajo en {wait / 60:.1f} min")
+        stop_event.wait(wait)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demonio de scraping sin interfaz (sin Flet).")
+    parser.add_argument("--config", default=None, help="JSON de trabajos (por defecto SCRAPE_JOBS_FILE o scrape_jobs.json)")
+    parser.add_argument("--reddit", action="append", default=[], metavar="SUBREDDIT", help="Subreddit a scrapear (repetible)")
+    parser.add_argument("--posts", type=int, default=5, help="Publicaciones por subreddit")
+    parser.add_argument("--comments", type=int, default=5, help="Comentarios por publicación de Reddit")
+    parser.add_argument("--facebook", action="append", default=[], metavar="PAGE_ID", help="Página de Facebook (repetible)")
+    parser.add_argument("--facebook-token-env", default="PAGE_ACCESS_TOKEN", help="Variable de entorno con el token de las páginas")
+    parser.add_argument("--mastodon-ids", nargs="*", default=[], metavar="ID", help="IDs de toots de Mastodon")
+    parser.add_argument("--mastodon-ids-file", default=None, help="Fichero con IDs de Mastodon (uno por línea)")
+    parser.add_argument("--every", type=int, default=None, help="Minutos entre ejecuciones de cada trabajo")
+    parser.add_argument("--once", action="store_true", help="Ejecuta cada trabajo una vez y termina")
+    parser.add_argument("--no-translate", action="store_true", help="No traduce (clasifica el texto tal cual)")
+    parser.add_argument("--list", action="store_true", help="Muestra los trabajos configurados y sale")
+    args = parser.parse_args()
+
+    try:
+        jobs = jobs_from_args(args)
+    except (OSError, ValueError) as e:
+        parser.error(f"configuración de trabajos inválida: {e}")
+    if args.list or not jobs:
+        for job in jobs:
+            print(f"- {job.name}: cada {job.every_minutes} min")
+        if not jobs:
+            print("⚠️ No hay trabajos configurados.")
+        return
+
+    stop_event = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: (_log("🛑 Deteniendo tras el trabajo en curso..."), stop_event.set()))
+
+    _log(f"🔌 Verificando base de datos... ({len(jobs)} trabajos)")
+    init_db()
+    _log("⏳ Cargando modelos de IA...")
+    translator, sentiment = load_analysis_models(translate=not args.no_translate)
+    run_schedule(jobs, translator, sentiment, stop_event, once=args.once)
+    _log("👋 Demonio detenido.")
+
+
+if __name__ == "__main__":
+    main()
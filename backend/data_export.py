@@ -0,0 +1,157 @@
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, Publication, Comment
+from .report_generator import ReportCancelled
+
+# --- EXPORTACIÓN DE DATOS (CSV / JSONL / PARQUET) ---
+# Alternativa compacta al PDF para análisis posterior: una fila por comentario
+# (las publicaciones sin comentarios salen con los campos del comentario vacíos).
+# Las filas se leen del cursor de la BD por bloques y se escriben según llegan.
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_COLUMNS = (
+    "publication_id", "red_social", "publication_title",
+    "comment_id", "author", "text_original", "text_translated",
+    "sentiment_label", "sentiment_score",
+    "prob_negative", "prob_neutral", "prob_positive", "language", "cluster_id",
+)
+
+
+def _export_statement(social_network: str):
+    return (
+        select(
+            Publication.id, Publication.red_social,
+            func.coalesce(Publication.title_translated, Publication.title_original),
+            Comment.id, Comment.author, Comment.text_original, Comment.text_translated,
+            Comment.sentiment_label, Comment.sentiment_score,
+            Comment.prob_negative, Comment.prob_neutral, Comment.prob_positive, Comment.language,
+            Comment.cluster_id,
+        )
+        .outerjoin(Comment, Comment.publication_id == Publication.id)
+        .where(Publication.red_social == social_network)
+        .order_by(Publication.id, Comment.id)
+    )
+
+
+def _to_float(value: Any) -> Optional[float]:
+    # sentiment_score se guarda como texto en la BD
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def count_export_rows(session: Session, social_network: str) -> int:
+    return session.execute(select(func.count()).select_from(_export_statement(social_network).order_by(None).subquery())).scalar() or 0
+
+
+def iter_export_rows(session: Session, social_network: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Tuple]]:
+    """Genera bloques de filas (en el orden de EXPORT_COLUMNS) leídos del cursor con `yield_per`."""
+    result = session.execute(_export_statement(social_network).execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [(*row[:8], _to_float(row[8]), *row[9:]) for row in partition]
+
+
+# --- Escritores por formato ---
+
+def _write_csv(path: str, chunks: Iterator[List[Tuple]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+
+
+def _write_jsonl(path: str, chunks: Iterator[List[Tuple]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for rows in chunks:
+            f.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows)
+
+
+def _write_parquet(path: str, chunks: Iterator[List[Tuple]]) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("La exportación a Parquet requiere 'pyarrow' (pip install pyarrow)")
+
+    schema = pa.schema([
+        ("publication_id", pa.string()), ("red_social", pa.string()), ("publication_title", pa.string()),
+        ("comment_id", pa.int64()), ("author", pa.string()), ("text_original", pa.string()),
+        ("text_translated", pa.string()), ("sentiment_label", pa.string()), ("sentiment_score", pa.float64()),
+        ("prob_negative", pa.float64()), ("prob_neutral", pa.float64()), ("prob_positive", pa.float64()),
+        ("language", pa.string()), ("cluster_id", pa.int64()),
+    ])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def export_network(
+    social_network: str,
+    fmt: str,
+    session: Optional[Session] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    stop_event: Optional[threading.Event] = None
+) -> str:
+    """
+    Exporta publicaciones y comentarios de una red a `exports/` en el formato indicado.
+
+    `progress_callback(filas, total)` se llama tras cada bloque; si `stop_event` se activa
+    se lanza `ReportCancelled` y se borra el archivo parcial. Retorna la ruta absoluta.
+    """
+    fmt = fmt.lower()
+    if fmt not in _WRITERS:
+        raise ValueError(f"Formato de exportación no soportado: {fmt} (usa {', '.join(EXPORT_FORMATS)})")
+
+    output_dir = "exports"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # Formato: Sentimetrika_[RedSocial]_Datos_[Fecha].[ext]
+    social_network_name = social_network.replace(' ', '_')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"{output_dir}/Sentimetrika_{social_network_name}_Datos_{timestamp}.{fmt}"
+    partial = filename + ".part"
+
+    own_session = session is None
+    session = session or SessionLocal()
+    try:
+        total = count_export_rows(session, social_network)
+
+        def tracked_chunks() -> Iterator[List[Tuple]]:
+            done = 0
+            for rows in iter_export_rows(session, social_network, chunk_size):
+                if stop_event is not None and stop_event.is_set():
+                    raise ReportCancelled(f"Exportación de {social_network} cancelada")
+                yield rows
+                done += len(rows)
+                if progress_callback:
+                    progress_callback(done, total)
+
+        try:
+            _WRITERS[fmt](partial, tracked_chunks())
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        os.replace(partial, filename)
+        return os.path.abspath(filename)
+    finally:
+        if own_session:
+            session.close()
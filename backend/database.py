@@ -1,10 +1,11 @@
 import os
 from pathlib import Path
-from sqlalchemy import create_engine, Column, String, Integer, Text, ForeignKey, DateTime
+from sqlalchemy import create_engine, inspect, text, Column, String, Integer, Float, Text, ForeignKey, DateTime, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from sqlalchemy.engine import Engine
 from dotenv import load_dotenv
+from typing import List, Optional
 
 # --- Cargar variables de entorno desde el archivo .env ---
 env_path = Path(__file__).resolve().parent.parent / '.env'
@@ -54,6 +55,8 @@ class Publication(Base):
     red_social = Column(String, index=True)
     title_original = Column(Text)
     title_translated = Column(Text)
+    # Cuándo la pasó el relleno de traducción (aunque el traductor devolviera el mismo texto)
+    translated_at = Column(DateTime(timezone=True), nullable=True)
     
     comments = relationship("Comment", back_populates="publication", cascade="all, delete-orphan")
 
@@ -65,8 +68,20 @@ class Comment(Base):
     author = Column(String)
     text_original = Column(Text)
     text_translated = Column(Text)
+    # Cuándo lo pasó el relleno de traducción (aunque el traductor devolviera el mismo texto)
+    translated_at = Column(DateTime(timezone=True), nullable=True)
     sentiment_label = Column(String)
     sentiment_score = Column(String, nullable=True)
+    # Probabilidades crudas del modelo (permiten re-etiquetar en SQL sin re-inferencia)
+    prob_negative = Column(Float, nullable=True)
+    prob_neutral = Column(Float, nullable=True)
+    prob_positive = Column(Float, nullable=True)
+    # Idioma detectado del texto original ('es', 'en' o 'und'); solo 'es' pasa por el traductor
+    language = Column(String(8), nullable=True)
+    # Grupo de casi-duplicados (campañas, spam copiado) según el índice MinHash. Todo comentario
+    # con al menos MIN_SHINGLES shingles tiene grupo, aunque sea el único miembro (su firma es la
+    # que reconocerá a las copias futuras); NULL solo si es muy corto
+    cluster_id = Column(Integer, nullable=True)
 
     publication = relationship("Publication", back_populates="comments")
 
@@ -78,12 +93,62 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class BackfillCheckpoint(Base):
+    """Progreso de los trabajos de relleno (traducción, re-puntuación...) para poder reanudarlos."""
+    __tablename__ = "backfill_checkpoints"
+
+    job = Column(String, primary_key=True)
+    last_id = Column(String, nullable=True)  # último ID procesado (texto: sirve para IDs enteros y de texto)
+    processed = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CommentCluster(Base):
+    """
+    Grupo de comentarios casi idénticos: firma MinHash del primer comentario visto.
+    Se crea uno por cada comentario agrupable que no se parece a ninguno anterior
+    (ver `near_duplicates.assign_clusters` para el coste en filas).
+    """
+    __tablename__ = "comment_clusters"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    signature = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CommentClusterBand(Base):
+    """Índice LSH: cada banda de la firma apunta al grupo que la registró primero."""
+    __tablename__ = "comment_cluster_bands"
+
+    band_key = Column(String, primary_key=True)
+    cluster_id = Column(Integer, ForeignKey("comment_clusters.id", ondelete="CASCADE"), index=True)
+
 # --- INICIALIZACION ---
 
+def _add_missing_columns(bind: Engine = engine) -> List[str]:
+    """
+    Migración mínima: `create_all` no altera tablas existentes, así que las columnas
+    nuevas (nullable) de los modelos se añaden con ALTER TABLE. Retorna las añadidas.
+    """
+    inspector = inspect(bind)
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
 def init_db():
-    """Crea las tablas en la base de datos si no existen."""
+    """Crea las tablas en la base de datos si no existen y añade las columnas nuevas."""
     try:
         Base.metadata.create_all(bind=engine)
+        for column in _add_missing_columns():
+            print(f"[OK] Columna agregada: {column}")
         print("[OK] Tablas verificadas en base de datos.")
     except Exception as e:
         print(f"[ERROR] Error al inicializar tablas: {e}")
@@ -125,5 +190,57 @@ def delete_publications_by_network(network_name: str) -> int:
     finally:
         session.close()
 
+# --- FUNCIONES DE CONSULTA INCREMENTAL ---
+
+def get_publications_by_ids(publication_ids: List[str]) -> List[Publication]:
+    """Carga solo las publicaciones indicadas (usado para refrescos incrementales)."""
+    if not publication_ids:
+        return []
+    session = SessionLocal()
+    try:
+        return session.query(Publication).filter(Publication.id.in_(publication_ids)).all()
+    except Exception as e:
+        print(f"[ERROR] Error cargando publicaciones {publication_ids[:5]}...: {e}")
+        return []
+    finally:
+        session.close()
+
+def get_comments_by_ids(comment_ids: List[int]) -> List[Comment]:
+    """Carga solo los comentarios indicados, ordenados por ID."""
+    if not comment_ids:
+        return []
+    session = SessionLocal()
+    try:
+        return session.query(Comment).filter(Comment.id.in_(comment_ids)).order_by(Comment.id).all()
+    except Exception as e:
+        print(f"[ERROR] Error cargando comentarios: {e}")
+        return []
+    finally:
+        session.close()
+
+# --- CHECKPOINTS DE TRABAJOS DE RELLENO ---
+
+def get_checkpoint(session, job: str) -> Optional[BackfillCheckpoint]:
+    return session.get(BackfillCheckpoint, job)
+
+def save_checkpoint(session, job: str, last_id, processed: int) -> None:
+    """Actualiza el checkpoint en la sesión del lote (se confirma en el mismo commit que los datos)."""
+    checkpoint = session.get(BackfillCheckpoint, job)
+    if checkpoint is None:
+        checkpoint = BackfillCheckpoint(job=job, processed=0)
+        session.add(checkpoint)
+    checkpoint.last_id = str(last_id)
+    checkpoint.processed = (checkpoint.processed or 0) + processed
+
+def clear_checkpoint(session, job: str) -> None:
+    """Borra el checkpoint de un trabajo terminado en la sesión (se confirma con el último lote)."""
+    session.query(BackfillCheckpoint).filter(BackfillCheckpoint.job == job).delete(synchronize_session=False)
+
+def reset_checkpoints(session, prefix: str = "") -> int:
+    """Borra los checkpoints cuyo nombre empieza por `prefix`. Retorna cuántos se borraron."""
+    deleted = session.query(BackfillCheckpoint).filter(BackfillCheckpoint.job.startswith(prefix)).delete(synchronize_session=False)
+    session.commit()
+    return deleted
+
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
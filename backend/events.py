@@ -0,0 +1,112 @@
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+# --- FEED DE CAMBIOS EN PROCESO ---
+# Los scrapers publican aquí los IDs de las filas que acaban de confirmar en la BD
+# y los dashboards se suscriben para parchear solo las tarjetas afectadas.
+
+
+@dataclass
+class DataChangeEvent:
+    """Filas nuevas confirmadas (commit) para una red social."""
+    red_social: str
+    publication_ids: List[str] = field(default_factory=list)
+    comment_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class ScrapeBatchEvent:
+    """Resumen de un lote guardado por un scraper (para mostrar el avance en vivo)."""
+    red_social: str
+    publications_saved: int = 0
+    comments_saved: int = 0
+    label_counts: Dict[str, int] = field(default_factory=dict)
+
+
+class EventBus:
+    """Bus de eventos en proceso y seguro entre hilos.
+
+    Los callbacks se ejecutan en el hilo que publica el evento (normalmente el hilo
+    del scraper), por lo que deben ser rápidos y no bloquear.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[Optional[Type], Callable[[Any], None]]] = []
+
+    def subscribe(self, callback: Callable[[Any], None], event_type: Optional[Type] = None) -> Callable[[], None]:
+        """Registra un callback (opcionalmente filtrado por tipo). Retorna la función para desuscribirse."""
+        entry = (event_type, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def publish(self, event: Any) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event_type, callback in subscribers:
+            if event_type is not None and not isinstance(event, event_type):
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[ERROR] Suscriptor de eventos falló con {type(event).__name__}: {e}")
+
+
+# Instancia global compartida por scrapers y vistas
+event_bus = EventBus()
+
+
+class ChangeTracker:
+    """Acumula los IDs insertados en la transacción actual de un scraper.
+
+    Solo se publican tras un commit (`flush`); si hay rollback se descartan.
+    """
+
+    def __init__(self, red_social: str, bus: EventBus = event_bus):
+        self.red_social = red_social
+        self.bus = bus
+        self._publication_ids: List[str] = []
+        self._comment_ids: List[int] = []
+        self._label_counts: Counter = Counter()
+
+    def add_publications(self, publication_ids: List[str]) -> None:
+        self._publication_ids.extend(str(pid) for pid in publication_ids)
+
+    def add_comments(self, comment_ids: List[int], labels: Optional[Iterable[str]] = None) -> None:
+        self._comment_ids.extend(cid for cid in comment_ids if cid is not None)
+        if labels is not None:
+            self._label_counts.update(labels)
+
+    def flush(self) -> None:
+        """Publica los cambios pendientes (llamar justo después de `session.commit()`)."""
+        if not self._publication_ids and not self._comment_ids:
+            return
+        change = DataChangeEvent(
+            red_social=self.red_social,
+            publication_ids=self._publication_ids,
+            comment_ids=self._comment_ids
+        )
+        batch = ScrapeBatchEvent(
+            red_social=self.red_social,
+            publications_saved=len(self._publication_ids),
+            comments_saved=len(self._comment_ids),
+            label_counts=dict(self._label_counts)
+        )
+        self.discard()
+        self.bus.publish(change)
+        self.bus.publish(batch)
+
+    def discard(self) -> None:
+        """Olvida los cambios pendientes (llamar tras `session.rollback()`)."""
+        self._publication_ids = []
+        self._comment_ids = []
+        self._label_counts = Counter()
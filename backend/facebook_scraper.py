@@ -4,7 +4,13 @@ from dotenv import load_dotenv
 from .database import SessionLocal, Publication, Comment
 from typing import List, Dict, Any, Callable, Optional
 from sqlalchemy.orm import Session
-from .sentiment_utils import _mapear_sentimiento
+from .sentiment_utils import etiquetar_resultados, UMBRAL_POR_RED
+from .language_detect import detectar_idiomas
+from .sentiment_classifier import translator_for
+from .text_chunking import translate_in_chunks
+from .batching import dedupe_texts, dedup_summary
+from .near_duplicates import assign_clusters, cluster_summary, stored_labels
+from .events import ChangeTracker
 
 # Cargar .env al inicio por si acaso
 load_dotenv()
@@ -13,6 +19,7 @@ class FacebookScraper:
     # 1. MODIFICADO: Aceptamos credenciales directas en el constructor
     def __init__(self, progress_callback: Callable[[str], None], page_id: str = None, token: str = None):
         self.progress_callback = progress_callback
+        self.changes = ChangeTracker('Facebook')
         self.graph = None
         # Guardamos las credenciales manuales (vienen del dashboard)
         self.manual_page_id = page_id
@@ -88,6 +95,7 @@ class FacebookScraper:
 
         if new_pubs:
             session.bulk_save_objects(new_pubs)
+            self.changes.add_publications([p.id for p in new_pubs])
             self.progress_callback(f"  └ +{len(new_pubs)} pubs nuevas.")
             return len(new_pubs)
         return 0
@@ -125,15 +133,22 @@ class FacebookScraper:
         self.progress_callback(f"Procesando {len(unique_comments)} comentarios...")
         
         texts = [c['text'] for c in unique_comments]
+        languages = detectar_idiomas(texts)
         translations_to_english = {}
         sentiments = []
         
-        # PASO 1: Traducir a inglés SOLO para análisis de sentimiento
+        # PASO 1: Traducir a inglés SOLO para análisis de sentimiento (y solo lo que está en español)
         if translator:
             try:
-                self.progress_callback(f"Traduciendo {len(texts)} comentarios a inglés (para análisis)...")
-                res = translator(texts, max_length=512, truncation=True, batch_size=8)
-                translations_to_english = {t: r['translation_text'] for t, r in zip(texts, res)}
+                spanish_texts = [t for t, lang in zip(texts, languages) if lang == 'es']
+                # Los textos repetidos (spam, "+1", emojis) se traducen una sola vez; los casi-duplicados
+                # no: cada comentario guarda su propia traducción (cambian URLs, números, nombres...)
+                to_translate, _ = dedupe_texts(spanish_texts)
+                translations_to_english = {t: t for t in texts}
+                if to_translate:
+                    self.progress_callback(f"Traduciendo comentarios a inglés (para análisis): {dedup_summary(len(spanish_texts), len(to_translate))}...")
+                    res = translate_in_chunks(translator, to_translate, batch_size=8)
+                    translations_to_english.update(zip(to_translate, res))
             except Exception as e:
                 self.progress_callback(f"⚠️ Error traducción: {e}")
                 # Fallback: usar textos originales
@@ -141,15 +156,27 @@ class FacebookScraper:
         else:
             translations_to_english = {t: t for t in texts}
 
+        # Los casi-duplicados (campañas, spam con variaciones) se clasifican una vez por grupo
+        clusters = assign_clusters(session, texts)
+        if clusters.collapsed:
+            self.progress_callback(f"Agrupando comentarios casi idénticos: {cluster_summary(clusters)}...")
+        rep_texts = [texts[j] for j in clusters.representatives]
+
         # PASO 2: Analizar sentimiento sobre TEXTO EN INGLÉS - modelo está entrenado en inglés
+        # Cada texto distinto se clasifica una vez y el resultado se reparte a sus repeticiones
+        texts_for_sent, sentiment_index = dedupe_texts([translations_to_english.get(t, t) for t in rep_texts])
         if sentiment:
-            texts_for_sent = [translations_to_english.get(t, t) for t in texts]
             try:
-                self.progress_callback(f"Analizando sentimiento de {len(texts_for_sent)} comentarios (en inglés)...")
-                sentiments = sentiment(texts_for_sent, truncation=True, batch_size=8)
+                self.progress_callback(f"Analizando sentimiento (en inglés): {dedup_summary(len(rep_texts), len(texts_for_sent))}...")
+                sentiments = sentiment(texts_for_sent, truncation=True, batch_size=8, top_k=None)
             except Exception as e:
                 self.progress_callback(f"⚠️ Error análisis sentimiento: {e}")
 
+        etiquetas_unicas = etiquetar_resultados(sentiments, umbral_confianza=UMBRAL_POR_RED['Facebook'])
+        etiquetas = [etiquetas_unicas[j] for j in sentiment_index] if len(etiquetas_unicas) else []
+        # Cada comentario recibe el resultado de su representante (o el ya guardado de su grupo)
+        etiquetas = clusters.fan_out(etiquetas, lambda c: stored_labels(c, UMBRAL_POR_RED['Facebook']))
+
         to_save = []
         for i, c in enumerate(unique_comments):
             orig_text = c['text']  # Texto original tal como viene de Facebook
@@ -157,21 +184,27 @@ class FacebookScraper:
             
             s_label = 'neutral'
             s_score = '0.0'
-            if i < len(sentiments):
-                s_label = _mapear_sentimiento(sentiments[i]['label'])
-                s_score = str(round(sentiments[i]['score'], 4))
+            probs = {}
+            if etiquetas[i]:
+                s_label, s_score, probs = etiquetas[i]
             
             to_save.append(Comment(
                 publication_id=c['publication_id'],
                 author=c['author'],
                 text_original=orig_text,  # Guardar original tal como viene (probablemente español)
                 text_translated=translated_to_english,  # Guardar traducción a inglés (solo para referencia)
+                language=languages[i],
+                cluster_id=clusters.cluster_ids[i],
                 sentiment_label=s_label,
-                sentiment_score=s_score
+                sentiment_score=s_score,
+                prob_negative=probs.get('negative'),
+                prob_neutral=probs.get('neutral'),
+                prob_positive=probs.get('positive')
             ))
             
         if to_save:
-            session.bulk_save_objects(to_save)
+            session.bulk_save_objects(to_save, return_defaults=True)
+            self.changes.add_comments([c.id for c in to_save], labels=[c.sentiment_label for c in to_save])
             return len(to_save)
         return 0
 
@@ -197,12 +230,14 @@ class FacebookScraper:
             
             if n_pubs > 0 or n_comms > 0:
                 session.commit()
+                self.changes.flush()
                 self.progress_callback("✅ Guardado en BD con éxito.")
             else:
                 self.progress_callback("Todo al día.")
                 
         except Exception as e:
             session.rollback()
+            self.changes.discard()
             self.progress_callback(f"❌ Error Scraper: {e}")
         finally:
             session.close()
@@ -220,4 +255,5 @@ def run_facebook_scrape_opt(
     """
     # Pasamos los argumentos al constructor
     scraper = FacebookScraper(progress_callback, page_id=page_id, token=token)
-    scraper.scrape(translator, sentiment_analyzer)
\ No newline at end of file
+    # Con un modelo multilingüe no se traduce nada: se clasifica el texto original
+    scraper.scrape(translator_for(translator, sentiment_analyzer), sentiment_analyzer)
\ No newline at end of file
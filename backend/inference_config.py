@@ -0,0 +1,76 @@
+"""
+Configuración de hilos de torch para la inferencia en CPU.
+
+Por defecto torch usa todos los núcleos para cada operación (intra-op) y otro pool
+igual para operaciones en paralelo (inter-op), compitiendo con la UI de Flet, los
+hilos de los scrapers y la BD. Aquí se fijan explícitamente:
+
+- TORCH_NUM_THREADS: hilos intra-op (por defecto, los núcleos disponibles menos
+  uno que queda para la UI y los scrapers cuando hay más de dos).
+- TORCH_INTEROP_THREADS: hilos inter-op (por defecto 1: los modelos se ejecutan
+  de uno en uno y un pool grande solo añade hilos ociosos).
+
+`python backend/model_profiler.py` incluye un barrido de hilos intra-op para
+elegir el valor de cada máquina.
+"""
+import os
+from typing import List, Optional, Tuple
+
+
+def available_cpus() -> int:
+    """Núcleos que este proceso puede usar (respeta la afinidad / límites del contenedor)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def env_int(name: str) -> Optional[int]:
+    """Entero positivo de la variable de entorno `name`; None si falta, no es un número o es <= 0."""
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def default_torch_threads() -> Tuple[int, int]:
+    """(intra-op, inter-op) según TORCH_NUM_THREADS / TORCH_INTEROP_THREADS o la detección automática."""
+    cpus = available_cpus()
+    intra = env_int("TORCH_NUM_THREADS") or (cpus - 1 if cpus > 2 else cpus)
+    inter = env_int("TORCH_INTEROP_THREADS") or 1
+    return intra, inter
+
+
+def threads_per_process(workers: int) -> int:
+    """Hilos intra-op para cada uno de `workers` procesos: los núcleos repartidos sin sobresuscribir."""
+    return max(1, available_cpus() // max(1, workers))
+
+
+def configure_torch_threads(intra: Optional[int] = None, inter: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Aplica los hilos de torch (los no indicados, según `default_torch_threads`).
+    Los inter-op solo se pueden fijar una vez y antes de la primera inferencia; si ya
+    es tarde se mantienen los actuales. Retorna los valores efectivos.
+    """
+    import torch
+
+    default_intra, default_inter = default_torch_threads()
+    torch.set_num_threads(intra or default_intra)
+    try:
+        torch.set_interop_threads(inter or default_inter)
+    except RuntimeError:
+        pass
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+def thread_sweep_candidates(max_threads: Optional[int] = None) -> List[int]:
+    """1, 2, 4, ... hasta los núcleos disponibles (incluido el máximo)."""
+    max_threads = max_threads or available_cpus()
+    candidates = []
+    n = 1
+    while n < max_threads:
+        candidates.append(n)
+        n *= 2
+    candidates.append(max_threads)
+    return candidates
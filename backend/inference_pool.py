@@ -0,0 +1,234 @@
+"""
+Pool de procesos para la inferencia (opcional, INFERENCE_WORKERS=N).
+
+Con los modelos dentro del proceso de Flet, la tokenización y el post-procesado
+(que retienen el GIL) compiten con la UI y con los hilos de los scrapers. Con
+INFERENCE_WORKERS > 0, `main.load_models` arranca N procesos ("spawn") que cargan
+los modelos una sola vez cada uno. Los scrapers reciben objetos con la misma
+llamada que el traductor y el clasificador locales; los textos de cada llamada se
+reparten entre los procesos y viajan por las tuberías del pool.
+
+Comparativa de rendimiento frente al modo en proceso:
+    python -m backend.inference_pool [--workers 2] [--texts 600]
+"""
+import argparse
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .inference_config import available_cpus, configure_torch_threads, env_int, threads_per_process
+from .sentiment_classifier import default_sentiment_model, is_multilingual, load_sentiment_model
+from .shared_weights import load_translator
+
+TRANSLATOR_MODEL = "Helsinki-NLP/opus-mt-es-en"
+MIN_SHARD = 32  # textos mínimos por proceso: las llamadas pequeñas no se reparten
+
+
+def inference_workers() -> int:
+    """INFERENCE_WORKERS (0 o sin definir: los modelos se cargan en el proceso de la aplicación)."""
+    return env_int("INFERENCE_WORKERS") or 0
+
+
+# --- Lado del proceso de trabajo ---
+
+_worker_models: Dict[str, object] = {}
+_startup_barrier = None
+
+
+def _init_worker(sentiment_model: str, translator_model: Optional[str], threads: int, barrier) -> None:
+    global _startup_barrier
+    _startup_barrier = barrier
+    configure_torch_threads(threads, 1)
+    _worker_models["sentiment"] = load_sentiment_model(sentiment_model)
+    if translator_model:
+        # Con SHARED_WEIGHTS=1 todos los procesos mapean los mismos pesos en lugar de copiarlos
+        _worker_models["translator"] = load_translator(translator_model)
+
+
+def _ready() -> int:
+    # Cada proceso retiene su tarea hasta que todos han cargado: así cada una cae en un proceso distinto
+    _startup_barrier.wait()
+    return os.getpid()
+
+
+def _run(kind: str, texts: List[str], kwargs: Dict):
+    return _worker_models[kind](texts, **kwargs)
+
+
+# --- Lado de la aplicación ---
+
+class PooledModel:
+    """Llamable con la firma del modelo local que reparte cada llamada entre los procesos del pool."""
+
+    def __init__(self, pool: "InferencePool", kind: str, multilingual: bool = False):
+        self.pool = pool
+        self.kind = kind
+        self.multilingual = multilingual
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        size = max(MIN_SHARD, -(-len(texts) // self.pool.workers))
+        shards = [texts[i:i + size] for i in range(0, len(texts), size)] or [texts]
+        futures = [self.pool.executor.submit(_run, self.kind, shard, kwargs) for shard in shards]
+        parts = [future.result() for future in futures]
+        # El clasificador devuelve logits (N, 3); el traductor y el pipeline, listas
+        if isinstance(parts[0], np.ndarray):
+            return np.concatenate(parts)
+        return [result for part in parts for result in part]
+
+
+class InferencePool:
+    """
+    `workers` procesos con el modelo de sentimiento (y el traductor, salvo en modo
+    multilingüe) ya cargados. El constructor espera a que todos terminen de cargar,
+    así que los errores de carga aparecen aquí y no en el primer scrapeo.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        sentiment_model: Optional[str] = None,
+        translator_model: Optional[str] = TRANSLATOR_MODEL,
+        threads: Optional[int] = None
+    ):
+        sentiment_model = sentiment_model or default_sentiment_model()
+        multilingual = is_multilingual(sentiment_model)
+        if multilingual:
+            translator_model = None
+        self.workers = workers
+        self.threads = threads or threads_per_process(workers)
+        # "spawn": torch no es seguro tras fork y cada proceso carga su propio modelo
+        context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(sentiment_model, translator_model, self.threads, context.Barrier(workers))
+        )
+        self.pids = sorted({future.result() for future in [self.executor.submit(_ready) for _ in range(workers)]})
+        self.sentiment = PooledModel(self, "sentiment", multilingual)
+        self.translator = PooledModel(self, "translator") if translator_model else None
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def load_analysis_models(translate: bool = True) -> Tuple[Optional[Callable], Callable]:
+    """
+    (traductor, modelo de sentimiento) para los scrapers, como los usan la app y
+    `backend.cli`: en el pool si INFERENCE_WORKERS > 0 o en este proceso con los
+    hilos de torch acotados. Sin traductor en modo multilingüe o con `translate=False`.
+    """
+    translator_model = TRANSLATOR_MODEL if translate else None
+    workers = inference_workers()
+    if workers:
+        # Modelos en procesos aparte, sin competir por el GIL con la UI
+        pool = InferencePool(workers, translator_model=translator_model)
+        # La app y el demonio no tienen un punto de cierre común: los procesos se paran al salir
+        atexit.register(pool.shutdown)
+        print(f"✅ Modelos de IA cargados en {workers} procesos de inferencia ({pool.threads} hilos cada uno).")
+        return pool.translator, pool.sentiment
+    # Hilos de torch acotados: la UI, los scrapers y la BD comparten los núcleos
+    intra, inter = configure_torch_threads()
+    print(f"🧵 Hilos de inferencia: {intra} intra-op, {inter} inter-op (TORCH_NUM_THREADS / TORCH_INTEROP_THREADS)")
+    # Sentimiento (clasificador ligero; SENTIMENT_BACKEND=pipeline para el pipeline)
+    sentiment = load_sentiment_model()
+    # Traducción español -> inglés, innecesaria con SENTIMENT_MODE=multilingual
+    translator = None if is_multilingual(sentiment) or not translator_model else load_translator(translator_model)
+    return translator, sentiment
+
+
+# --- Comparativa ---
+
+class _LagMonitor:
+    """Hilo que mide cuánto se retrasa un tic de 10 ms (lo que notaría la UI de Flet)."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            time.sleep(self.interval)
+            self.max_lag = max(self.max_lag, time.perf_counter() - start - self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _benchmark(label: str, translator, sentiment, texts: Sequence[str], threads: int = 4) -> float:
+    """Traduce y clasifica `texts` desde `threads` hilos (como los scrapers) y retorna textos/s."""
+    shards = [list(texts[i::threads]) for i in range(threads)]
+
+    def work(shard):
+        english = [r['translation_text'] for r in translator(shard, batch_size=16)] if translator else shard
+        sentiment(english, batch_size=16, truncation=True, top_k=None)
+
+    work(list(texts[:16]))  # calentamiento
+    with _LagMonitor() as monitor:
+        start = time.perf_counter()
+        workers = [threading.Thread(target=work, args=(shard,)) for shard in shards]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+    rate = len(texts) / elapsed
+    print(f"  {label:<24} {rate:8.2f} textos/s | retraso máximo de la UI: {monitor.max_lag * 1000:.0f} ms")
+    return rate
+
+
+def main():
+    from transformers import pipeline
+
+    parser = argparse.ArgumentParser(description="Compara la inferencia en proceso con el pool de procesos.")
+    parser.add_argument("--workers", type=int, default=max(1, available_cpus() // 2), help="Procesos del pool")
+    parser.add_argument("--texts", type=int, default=600, help="Textos de prueba")
+    args = parser.parse_args()
+
+    sample = [
+        "Este es un día maravilloso y estoy muy feliz.",
+        "Odio el tráfico de la mañana, siempre llego tarde.",
+        "El servicio al cliente fue simplemente normal, ni bueno ni malo.",
+        "Mi pedido llegó dañado, estoy muy decepcionado.",
+        "La comida en ese restaurante es consistentemente deliciosa.",
+        "La conexión a internet ha estado muy lenta todo el día.",
+    ]
+    texts = [f"{sample[i % len(sample)]} ({i})" for i in range(args.texts)]
+    sentiment_model = default_sentiment_model()
+    translator_model = None if is_multilingual(sentiment_model) else TRANSLATOR_MODEL
+
+    print(f"⏳ En proceso ({sentiment_model})...")
+    configure_torch_threads()
+    sentiment = load_sentiment_model(sentiment_model)
+    translator = pipeline("translation", model=translator_model) if translator_model else None
+    local_rate = _benchmark("en proceso", translator, sentiment, texts)
+    del sentiment, translator
+
+    print(f"⏳ Pool de {args.workers} procesos...")
+    pool = InferencePool(args.workers, sentiment_model, translator_model)
+    try:
+        pool_rate = _benchmark(f"pool ({args.workers} x {pool.threads} hilos)", pool.translator, pool.sentiment, texts)
+    finally:
+        pool.shutdown()
+    print(f"✅ Pool frente a en proceso: x{pool_rate / local_rate:.2f} (INFERENCE_WORKERS={args.workers} para activarlo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Detección de idioma local y rápida (español / inglés) por trigramas de caracteres.
+
+Sirve para enviar al traductor es->en solo los comentarios que realmente están en
+español: en r/Python casi todo llega ya en inglés y traducirlo es la llamada más
+cara del proceso. Es un Naive Bayes sobre trigramas de letras (con las palabras
+rodeadas de espacios, así que las palabras funcionales pesan mucho) entrenado al
+importar con los textos de muestra de abajo; no descarga nada ni usa modelos.
+
+Los textos demasiado cortos o sin una diferencia clara entre idiomas se marcan
+como IDIOMA_DESCONOCIDO y no se traducen. Otros idiomas caen en el más parecido
+de los dos.
+"""
+import math
+import re
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+IDIOMA_DESCONOCIDO = "und"
+
+MIN_TRIGRAMAS = 6        # por debajo (p. ej. "ok", "jaja") no se decide
+MAX_TRIGRAMAS = 300      # los textos largos se deciden con su comienzo
+MARGEN_MINIMO = 0.15     # diferencia media de log-probabilidad por trigrama
+
+# Letras propias del español: cada una suma como un trigrama muy característico
+_MARCAS_ESPANOL = set("ñ¿¡áéíóú")
+_PESO_MARCA = 3.0
+
+_MUESTRAS = {
+    "es": """
+        Este es un día maravilloso y estoy muy feliz con el resultado. No me gusta
+        nada cómo nos trataron en la tienda, el servicio fue lento y la comida
+        llegó fría. ¿Alguien sabe si la nueva versión ya está disponible para
+        descargar? Gracias por compartir, me parece una idea muy interesante que
+        deberíamos probar en el trabajo. La verdad es que no entiendo por qué
+        siguen subiendo los precios si la calidad es cada vez peor. Qué bonito,
+        me encanta la foto y el lugar donde la tomaron. Estoy de acuerdo contigo,
+        pero creo que también hay que escuchar a los vecinos del barrio antes de
+        decidir. Hoy hace un tiempo perfecto para salir a caminar por el parque con
+        la familia. ¡Felicidades a todo el equipo por el esfuerzo y los resultados
+        de este año! Mi pedido todavía no ha llegado y nadie responde los correos,
+        estoy muy decepcionado con la empresa. Los jugadores no tuvieron su mejor
+        partido, pero la afición siguió apoyando hasta el final. Me gustaría saber
+        cuándo abren las inscripciones del curso y cuánto cuesta. Esa película es
+        aburrida y predecible, no la recomiendo para nada. Las noticias de hoy son
+        preocupantes para la gente que vive en la costa. Qué vergüenza lo que pasó
+        en el congreso, los políticos solo piensan en ellos mismos. Muchas gracias
+        por la información, ahora lo tengo más claro. Creo que tienes razón, hay
+        que esperar a ver qué dicen los expertos sobre el tema. Nunca había visto
+        algo así en mi ciudad, estamos todos muy contentos.
+    """,
+    "en": """
+        This is a wonderful day and I am very happy with the result. I really do
+        not like how they treated us at the store, the service was slow and the
+        food arrived cold. Does anyone know if the new version is already available
+        to download? Thanks for sharing, it seems like a really interesting idea
+        that we should try at work. The truth is that I do not understand why they
+        keep raising prices when the quality is getting worse. How nice, I love
+        the photo and the place where it was taken. I agree with you, but I think
+        we should also listen to the people in the neighborhood before deciding.
+        Today the weather is perfect for a walk in the park with the family.
+        Congratulations to the whole team for the effort and the results this
+        year! My order still has not arrived and nobody answers the emails, I am
+        very disappointed with the company. The players did not have their best
+        game, but the fans kept cheering until the end. I would like to know when
+        registration for the course opens and how much it costs. That movie was
+        boring and predictable, I would not recommend it at all. You should use a
+        virtual environment and pin your dependencies, otherwise the build will
+        break when a package is updated. What a shame what happened in congress,
+        politicians only think about themselves. Thank you for the information,
+        now it is much clearer. I think you are right, we have to wait and see
+        what the experts say about it. I have never seen anything like this in
+        my city, we are all very excited.
+    """,
+}
+
+_PALABRA = re.compile(r"[^\W\d_]+")
+
+
+def _trigramas(texto: str, limite: Optional[int] = MAX_TRIGRAMAS) -> List[str]:
+    """Trigramas de letras de cada palabra rodeada de espacios (" de", "de ", ...), hasta `limite`."""
+    palabras = (f" {palabra} " for palabra in _PALABRA.findall(texto.lower()))
+    return list(islice((p[i:i + 3] for p in palabras for i in range(len(p) - 2)), limite))
+
+
+def _entrenar(muestras: Dict[str, str]) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float]]:
+    """Log-probabilidades por trigrama y por idioma (suavizado de Laplace sobre el vocabulario común)."""
+    conteos = {idioma: Counter(_trigramas(texto, limite=None)) for idioma, texto in muestras.items()}
+    vocabulario = len(set().union(*conteos.values())) + 1
+    perfiles, por_defecto = {}, {}
+    for idioma, conteo in conteos.items():
+        denominador = sum(conteo.values()) + vocabulario
+        perfiles[idioma] = {t: math.log((c + 1) / denominador) for t, c in conteo.items()}
+        por_defecto[idioma] = math.log(1 / denominador)
+    return perfiles, por_defecto
+
+
+_PERFILES, _POR_DEFECTO = _entrenar(_MUESTRAS)
+IDIOMAS = tuple(_PERFILES)
+
+
+def detectar_idioma(texto: str) -> str:
+    """Código del idioma del texto ('es', 'en') o IDIOMA_DESCONOCIDO si no hay evidencia suficiente."""
+    trigramas = _trigramas(texto or "")
+    if len(trigramas) < MIN_TRIGRAMAS:
+        return IDIOMA_DESCONOCIDO
+
+    puntuaciones = {
+        idioma: sum(perfil.get(t, _POR_DEFECTO[idioma]) for t in trigramas) / len(trigramas)
+        for idioma, perfil in _PERFILES.items()
+    }
+    marcas = sum(1 for letra in texto[:MAX_TRIGRAMAS] if letra in _MARCAS_ESPANOL)
+    puntuaciones["es"] += _PESO_MARCA * marcas / len(trigramas)
+
+    (mejor, p1), (_, p2) = sorted(puntuaciones.items(), key=lambda item: item[1], reverse=True)[:2]
+    return mejor if p1 - p2 >= MARGEN_MINIMO else IDIOMA_DESCONOCIDO
+
+
+def detectar_idiomas(textos: Iterable[str]) -> List[str]:
+    """`detectar_idioma` para un lote (los textos repetidos se evalúan una sola vez)."""
+    cache: Dict[str, str] = {}
+    resultado = []
+    for texto in textos:
+        idioma = cache.get(texto)
+        if idioma is None:
+            idioma = cache[texto] = detectar_idioma(texto)
+        resultado.append(idioma)
+    return resultado
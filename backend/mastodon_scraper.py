@@ -6,13 +6,20 @@ from dotenv import load_dotenv
 from .database import SessionLocal, Publication, Comment
 from typing import List, Dict, Any, Callable, Optional
 from sqlalchemy.orm import Session
-from .sentiment_utils import _mapear_sentimiento
+from .sentiment_utils import etiquetar_resultados, UMBRAL_POR_RED
+from .language_detect import detectar_idioma, detectar_idiomas
+from .sentiment_classifier import translator_for
+from .text_chunking import translate_in_chunks
+from .batching import dedupe_texts, dedup_summary
+from .near_duplicates import assign_clusters, cluster_summary, stored_labels
+from .events import ChangeTracker
 
 load_dotenv()
 
 class MastodonScraper:
     def __init__(self, progress_callback: Callable[[str], None]):
         self.progress_callback = progress_callback
+        self.changes = ChangeTracker('Mastodon')
         self.mastodon = self._conectar_api_mastodon()
 
     def _limpiar_html(self, html_content: str) -> str:
@@ -80,6 +87,7 @@ class MastodonScraper:
         
         if new_pubs:
             session.bulk_save_objects(new_pubs)
+            self.changes.add_publications([p.id for p in new_pubs])
             self.progress_callback(f"  └ +{len(new_pubs)} toots nuevos.")
             return len(new_pubs)
         return 0
@@ -102,59 +110,82 @@ class MastodonScraper:
         
         # IA en lote
         texts = [c['text_original'] for c in unique]
+        languages = detectar_idiomas(texts)
         translations = {}
         sentiments = []
         
         # PASO 1: Traducir al inglés PRIMERO
         if translator:
             try:
-                # Filtrar textos vacíos o muy cortos para no gastar IA
-                to_translate = [t for t in texts if len(t) > 2]
+                # Filtrar textos vacíos o muy cortos (y los que no están en español) para no gastar IA
+                spanish_texts = [t for t, lang in zip(texts, languages) if len(t) > 2 and lang == 'es']
+                # Los textos repetidos (spam, "+1", emojis) se traducen una sola vez; los casi-duplicados
+                # no: cada respuesta guarda su propia traducción (cambian URLs, números, nombres...)
+                to_translate, _ = dedupe_texts(spanish_texts)
                 if to_translate:
-                    self.progress_callback(f"Traduciendo {len(to_translate)} respuestas al inglés...")
-                    res = translator(to_translate, max_length=512, truncation=True, batch_size=8)
-                    translations = {t: r['translation_text'] for t, r in zip(to_translate, res)}
+                    self.progress_callback(f"Traduciendo respuestas al inglés: {dedup_summary(len(spanish_texts), len(to_translate))}...")
+                    res = translate_in_chunks(translator, to_translate, batch_size=8)
+                    translations = dict(zip(to_translate, res))
             except Exception as e:
                 self.progress_callback(f"⚠️ Error traducción: {e}")
         
         # Si no hay traductor, usar textos originales
         if not translations:
             translations = {t: t for t in texts}
+
+        # Los casi-duplicados (campañas, spam con variaciones) se clasifican una vez por grupo
+        clusters = assign_clusters(session, texts)
+        if clusters.collapsed:
+            self.progress_callback(f"Agrupando respuestas casi idénticas: {cluster_summary(clusters)}...")
+        rep_texts = [texts[j] for j in clusters.representatives]
             
         # PASO 2: Analizar sentimiento sobre TEXTO TRADUCIDO (inglés) - modelo está en inglés
+        # Cada texto distinto se clasifica una vez y el resultado se reparte a sus repeticiones
+        with_content = [j for j, t in enumerate(rep_texts) if len(t) > 2]
+        texts_sent, sentiment_index = dedupe_texts([translations.get(rep_texts[j], rep_texts[j]) for j in with_content])
         if sentiment:
-            texts_sent = [translations.get(t, t) for t in texts if len(t) > 2]
             if texts_sent:
                 try:
-                    self.progress_callback(f"Analizando sentimiento de {len(texts_sent)} respuestas (en inglés)...")
-                    sentiments = sentiment(texts_sent, truncation=True, batch_size=8)
+                    self.progress_callback(f"Analizando sentimiento (en inglés): {dedup_summary(len(with_content), len(texts_sent))}...")
+                    sentiments = sentiment(texts_sent, truncation=True, batch_size=8, top_k=None)
                 except Exception as e:
                     self.progress_callback(f"⚠️ Error análisis sentimiento: {e}")
 
+        etiquetas_unicas = etiquetar_resultados(sentiments, umbral_confianza=UMBRAL_POR_RED['Mastodon'])
+        etiquetas = [None] * len(rep_texts)
+        if len(etiquetas_unicas):
+            for j, k in zip(with_content, sentiment_index):
+                etiquetas[j] = etiquetas_unicas[k]
+        # Cada respuesta recibe el resultado de su representante (o el ya guardado de su grupo)
+        etiquetas = clusters.fan_out(etiquetas, lambda c: stored_labels(c, UMBRAL_POR_RED['Mastodon']))
+
         to_save = []
-        sent_idx = 0
-        for c in unique:
+        for i, (c, lang) in enumerate(zip(unique, languages)):
             txt = c['text_original']
             trans = translations.get(txt, txt)
             
-            s_l, s_s = "neutral", "0.0"
-            # Solo procesar sentimiento si el texto tiene contenido
-            if len(txt) > 2 and sent_idx < len(sentiments):
-                s_l = _mapear_sentimiento(sentiments[sent_idx]['label'])
-                s_s = str(round(sentiments[sent_idx]['score'], 4))
-                sent_idx += 1
+            s_l, s_s, probs = "neutral", "0.0", {}
+            # Solo hay sentimiento si el texto tiene contenido
+            if etiquetas[i]:
+                s_l, s_s, probs = etiquetas[i]
                 
             to_save.append(Comment(
                 publication_id=c['publication_id'],
                 author=c['author'],
                 text_original=txt,  # Guardar original tal como viene
                 text_translated=trans,  # Guardar traducción a inglés
+                language=lang,
+                cluster_id=clusters.cluster_ids[i],
                 sentiment_label=s_l,
-                sentiment_score=s_s
+                sentiment_score=s_s,
+                prob_negative=probs.get('negative'),
+                prob_neutral=probs.get('neutral'),
+                prob_positive=probs.get('positive')
             ))
             
         if to_save:
-            session.bulk_save_objects(to_save)
+            session.bulk_save_objects(to_save, return_defaults=True)
+            self.changes.add_comments([c.id for c in to_save], labels=[c.sentiment_label for c in to_save])
             return len(to_save)
         return 0
 
@@ -195,7 +226,7 @@ class MastodonScraper:
                         
                         # Traducción preliminar del post (para guardar en Publication)
                         trans_title = text_clean
-                        if translator and text_clean:
+                        if translator and text_clean and detectar_idioma(text_clean) == 'es':
                             try:
                                 res = translator(text_clean[:512])
                                 trans_title = res[0]['translation_text']
@@ -237,9 +268,11 @@ class MastodonScraper:
                         # Commit incremental por lote
                         if nuevos_pubs > 0 or nuevos_comms > 0:
                             session.commit()
+                            self.changes.flush()
                             self.progress_callback(f"  └ Lote guardado: +{nuevos_pubs} toots, +{nuevos_comms} respuestas")
                     except Exception as e:
                         session.rollback()
+                        self.changes.discard()
                         self.progress_callback(f"⚠️ Error en lote: {e}")
                         continue
 
@@ -250,6 +283,7 @@ class MastodonScraper:
 
         except Exception as e:
             session.rollback()
+            self.changes.discard()
             self.progress_callback(f"❌ Error general: {e}")
         finally:
             session.close()
@@ -270,4 +304,5 @@ def run_mastodon_scrape_opt(progress_callback, translator, sentiment, target_ids
         except: 
             pass
             
-    scraper.scrape(ids_to_use, translator, sentiment)
\ No newline at end of file
+    # Con un modelo multilingüe no se traduce nada: se clasifica el texto original
+    scraper.scrape(ids_to_use, translator_for(translator, sentiment), sentiment)
\ No newline at end of file
@@ -1,13 +1,28 @@
+import os
+import sys
 import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from transformers import pipeline
 
+from backend.sentiment_classifier import SentimentClassifier, SENTIMENT_MODEL, MULTILINGUAL_SENTIMENT_MODEL
+from backend.sentiment_utils import etiquetar_resultados
+from backend.inference_config import configure_torch_threads, thread_sweep_candidates
+from backend.inference_pool import InferencePool
+from backend.shared_weights import process_memory
+
 def profile_models():
     """Profiles the translation and sentiment analysis models."""
     
+    intra, inter = configure_torch_threads()
+    print(f"🧵 Hilos de torch: {intra} intra-op, {inter} inter-op")
     print("Cargando modelos...")
     try:
         translator = pipeline("translation", model="Helsinki-NLP/opus-mt-es-en")
-        sentiment_analyzer = pipeline("text-classification", model="cardiffnlp/twitter-roberta-base-sentiment-latest")
+        sentiment_analyzer = pipeline("text-classification", model=SENTIMENT_MODEL)
+        classifier = SentimentClassifier(SENTIMENT_MODEL)
         print("✅ Modelos cargados.")
     except Exception as e:
         print(f"❌ Error cargando modelos: {e}")
@@ -43,14 +58,101 @@ def profile_models():
     print(f"Tiempo total: {translation_time:.4f} segundos")
     print(f"Frases por segundo: {len(sample_texts) / translation_time:.2f}")
 
-    # --- Profile Sentiment Analysis ---
+    # --- Profile Sentiment Analysis (pipeline, ruta actual de los scrapers) ---
+    sentiment_analyzer(translated_texts[:16], batch_size=16, truncation=True, top_k=None)  # calentamiento
     start_time = time.time()
-    sentiments = sentiment_analyzer(translated_texts, batch_size=16, truncation=True)
+    sentiments = sentiment_analyzer(translated_texts, batch_size=16, truncation=True, top_k=None)
+    pipeline_labels = etiquetar_resultados(sentiments)
     end_time = time.time()
     sentiment_time = end_time - start_time
-    print(f"\n--- Análisis de Sentimiento ---")
+    print(f"\n--- Análisis de Sentimiento (pipeline) ---")
     print(f"Tiempo total: {sentiment_time:.4f} segundos")
     print(f"Frases por segundo: {len(sample_texts) / sentiment_time:.2f}")
 
+    # --- Profile Lean Classifier (logits NumPy) ---
+    classifier(translated_texts[:16], batch_size=16)  # calentamiento
+    start_time = time.time()
+    logits = classifier(translated_texts, batch_size=16)
+    classifier_labels = etiquetar_resultados(logits)
+    end_time = time.time()
+    classifier_time = end_time - start_time
+    agreement = sum(a[0] == b[0] for a, b in zip(pipeline_labels, classifier_labels)) / len(sample_texts)
+    print(f"\n--- Análisis de Sentimiento (clasificador ligero) ---")
+    print(f"Tiempo total: {classifier_time:.4f} segundos")
+    print(f"Frases por segundo: {len(sample_texts) / classifier_time:.2f}")
+    print(f"Aceleración frente al pipeline: x{sentiment_time / classifier_time:.2f}")
+    print(f"Coincidencia de etiquetas con el pipeline: {agreement:.1%}")
+
+    # --- Thread Sweep (hilos intra-op del clasificador) ---
+    import torch
+    print(f"\n--- Barrido de hilos (clasificador ligero) ---")
+    sweep = []
+    for threads in thread_sweep_candidates():
+        torch.set_num_threads(threads)
+        classifier(translated_texts[:16], batch_size=16)  # calentamiento
+        start_time = time.time()
+        classifier(translated_texts, batch_size=16)
+        rate = len(sample_texts) / (time.time() - start_time)
+        sweep.append((rate, threads))
+        print(f"{threads:>3} hilos: {rate:.2f} frases por segundo")
+    best_rate, best_threads = max(sweep)
+    print(f"Mejor: {best_threads} hilos ({best_rate:.2f} frases/s) -> fija TORCH_NUM_THREADS={best_threads} en este equipo")
+    torch.set_num_threads(intra)
+
+    # --- Profile Multilingual (texto original, sin traducción) ---
+    try:
+        multilingual = SentimentClassifier(MULTILINGUAL_SENTIMENT_MODEL)
+    except Exception as e:
+        print(f"\n⚠️ Modelo multilingüe no disponible ({MULTILINGUAL_SENTIMENT_MODEL}): {e}")
+        return
+    multilingual(sample_texts[:16], batch_size=16)  # calentamiento
+    start_time = time.time()
+    multilingual_labels = etiquetar_resultados(multilingual(sample_texts, batch_size=16))
+    end_time = time.time()
+    multilingual_time = end_time - start_time
+    two_model_time = translation_time + classifier_time
+    agreement = sum(a[0] == b[0] for a, b in zip(classifier_labels, multilingual_labels)) / len(sample_texts)
+    print(f"\n--- Análisis de Sentimiento (multilingüe, sin traducir) ---")
+    print(f"Tiempo total: {multilingual_time:.4f} segundos (traducir + clasificar: {two_model_time:.4f})")
+    print(f"Frases por segundo: {len(sample_texts) / multilingual_time:.2f}")
+    print(f"Aceleración frente a traducir + clasificar: x{two_model_time / multilingual_time:.2f}")
+    print(f"Coincidencia de etiquetas con traducir + clasificar: {agreement:.1%}")
+
+def profile_worker_memory(workers: int = 2):
+    """RSS/PSS de cada proceso del pool de inferencia, con los pesos copiados y mapeados."""
+    if not process_memory():
+        print("\n⚠️ Informe de memoria no disponible (requiere /proc/<pid>/smaps_rollup, Linux)")
+        return
+    texts = ["El servicio fue rápido y amable, volveré pronto."] * 32
+    previous = os.environ.get("SHARED_WEIGHTS")
+    for shared, label in (("0", "pesos copiados"), ("1", "SHARED_WEIGHTS=1, pesos mapeados")):
+        # Los procesos "spawn" heredan el entorno del proceso padre al arrancar
+        os.environ["SHARED_WEIGHTS"] = shared
+        print(f"\n--- Memoria del pool ({workers} procesos, {label}) ---")
+        try:
+            pool = InferencePool(workers)
+        except Exception as e:
+            print(f"❌ Error arrancando el pool: {e}")
+            continue
+        try:
+            # Una llamada completa para que todas las páginas de los pesos se lean
+            pool.sentiment(texts * workers)
+            if pool.translator:
+                pool.translator(texts * workers)
+            total_rss = total_pss = 0
+            for pid in pool.pids:
+                usage = process_memory(pid)
+                total_rss += usage.get("rss", 0)
+                total_pss += usage.get("pss", 0)
+                print(f"  PID {pid}: RSS {usage.get('rss', 0) / 1024:7.1f} MB | PSS {usage.get('pss', 0) / 1024:7.1f} MB | compartida {usage.get('shared', 0) / 1024:7.1f} MB")
+            print(f"  Total: RSS {total_rss / 1024:.1f} MB | PSS {total_pss / 1024:.1f} MB (la PSS es lo que realmente ocupa el pool)")
+        finally:
+            pool.shutdown()
+    if previous is None:
+        os.environ.pop("SHARED_WEIGHTS", None)
+    else:
+        os.environ["SHARED_WEIGHTS"] = previous
+
 if __name__ == "__main__":
     profile_models()
+    profile_worker_memory()
@@ -0,0 +1,217 @@
+"""
+Índice de casi-duplicados (MinHash + LSH) para comentarios.
+
+Las avalanchas de bots y las campañas de copiar y pegar generan miles de
+comentarios casi idénticos (cambia una URL, un número, un emoji...). El texto se
+normaliza, se parte en shingles de caracteres y se resume en una firma MinHash;
+las bandas de la firma se guardan en la BD (`comment_cluster_bands`) para que los
+grupos se reconozcan entre lotes y entre ejecuciones. Cada comentario recibe el
+`cluster_id` de su grupo y solo un representante por grupo pasa por el clasificador
+de sentimiento. La traducción no se reparte: cada comentario guarda la suya (la
+deduplicación exacta ya evita traducir dos veces el mismo texto).
+
+Los textos muy cortos ("+1", emojis) no se agrupan aquí: de esos se encarga la
+deduplicación exacta de `batching.dedupe_texts`.
+
+Coste en la BD: un comentario agrupable que no se parece a ninguno anterior abre su
+propio grupo (aunque nunca llegue a tener copias), es decir, una fila en
+`comment_clusters` (firma de NUM_PERM * 8 = 512 bytes) y hasta BANDS (16) filas en
+`comment_cluster_bands` (solo las bandas que aún no usaba otro grupo). Es el precio
+de reconocer la primera copia en un lote o en una ejecución posterior.
+"""
+import re
+import unicodedata
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from .database import Comment, CommentCluster, CommentClusterBand
+from .sentiment_utils import CLASES_SENTIMIENTO, etiqueta_desde_probabilidades
+
+NUM_PERM = 64
+BANDS = 16               # 16 bandas x 4 filas: ~50% de probabilidad de ser candidato con Jaccard 0.5
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 20        # por debajo (~25 caracteres) el texto no se agrupa
+SIMILARITY_THRESHOLD = 0.7  # Jaccard estimado mínimo para unirse a un grupo
+_QUERY_CHUNK = 5000
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)  # semilla fija: las firmas deben ser estables entre ejecuciones
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_MENCION = re.compile(r"[@#]\w+")
+_NO_ALFANUMERICO = re.compile(r"[\W_]+")
+_NUMERO = re.compile(r"\d+")
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sin tildes, URLs, menciones ni números concretos, y espacios colapsados."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _URL.sub(" url ", text)
+    text = _MENCION.sub(" @ ", text)
+    text = _NUMERO.sub("0", text)
+    return " ".join(_NO_ALFANUMERICO.sub(" ", text).split())
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """Firma MinHash (NUM_PERM enteros) del texto normalizado, o None si es demasiado corto."""
+    normalized = normalize_text(text)
+    shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def band_keys(signature: np.ndarray) -> List[str]:
+    return [f"{band}:{signature[band * ROWS:(band + 1) * ROWS].tobytes().hex()}" for band in range(BANDS)]
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard estimado entre dos firmas (fracción de posiciones iguales)."""
+    return float(np.mean(a == b))
+
+
+class ClusterAssignment(NamedTuple):
+    """Resultado de `assign_clusters` para un lote de textos."""
+    cluster_ids: List[Optional[int]]   # grupo de cada texto (None: único o muy corto)
+    representatives: List[int]         # posiciones del lote que deben pasar por los modelos
+    source: List[int]                  # por texto, posición de su representante en el lote (o -1)
+    stored: Dict[int, Comment]         # grupo ya visto en otra ejecución -> su primer comentario analizado
+
+    @property
+    def collapsed(self) -> int:
+        """Textos que no necesitan inferencia propia."""
+        return len(self.source) - len(self.representatives)
+
+    def fan_out(self, results: Sequence, stored: Callable[[Comment], Any]) -> List:
+        """
+        Resultado por texto: el de su representante (`results` va en el orden de
+        `representatives`; None si falta) o, si el grupo ya estaba en la BD, `stored(comentario)`.
+        """
+        position = {j: k for k, j in enumerate(self.representatives)}
+        return [
+            stored(self.stored[cluster_id]) if source < 0
+            else (results[position[source]] if position[source] < len(results) else None)
+            for source, cluster_id in zip(self.source, self.cluster_ids)
+        ]
+
+
+def assign_clusters(session: Session, texts: Sequence[str]) -> ClusterAssignment:
+    """
+    Asigna cada texto a un grupo de casi-duplicados (creando los grupos nuevos en la
+    sesión, también para los textos sin parecido con ninguno: ver el coste en el
+    docstring del módulo) y elige qué textos deben analizarse: el primero de cada grupo
+    nuevo en el lote. Los grupos que ya tienen un comentario analizado en la BD se reutilizan
+    (`stored`) y no necesitan ningún representante (source = -1).
+    """
+    signatures = [minhash_signature(t) for t in texts]
+    keys = [band_keys(sig) if sig is not None else [] for sig in signatures]
+
+    # Bandas ya registradas en ejecuciones anteriores (por bloques, por el límite de parámetros del IN)
+    all_keys = list({k for group in keys for k in group})
+    band_index: Dict[str, Any] = {}
+    for start in range(0, len(all_keys), _QUERY_CHUNK):
+        band_index.update(
+            session.query(CommentClusterBand.band_key, CommentClusterBand.cluster_id)
+            .filter(CommentClusterBand.band_key.in_(all_keys[start:start + _QUERY_CHUNK]))
+        )
+    known_signatures: Dict[Any, np.ndarray] = {
+        cluster_id: np.frombuffer(signature, dtype=np.uint64)
+        for cluster_id, signature in session.query(CommentCluster.id, CommentCluster.signature)
+        .filter(CommentCluster.id.in_(set(band_index.values())))
+    }
+    existing = set(known_signatures)
+
+    # Los grupos nuevos se identifican por su objeto hasta el único flush del final
+    assigned: List[Any] = []
+    new_clusters: List[Tuple[CommentCluster, List[str]]] = []
+    for signature, group in zip(signatures, keys):
+        if signature is None:
+            assigned.append(None)
+            continue
+        match = next((
+            cluster for cluster in dict.fromkeys(band_index[k] for k in group if k in band_index)
+            if estimated_similarity(signature, known_signatures[cluster]) >= SIMILARITY_THRESHOLD
+        ), None)
+        if match is None:
+            match = CommentCluster(signature=signature.astype(np.uint64).tobytes())
+            known_signatures[match] = signature
+            new_clusters.append((match, group))
+            for k in group:
+                band_index.setdefault(k, match)
+        assigned.append(match)
+
+    if new_clusters:
+        session.add_all(cluster for cluster, _ in new_clusters)
+        session.flush()  # IDs de los grupos nuevos
+        # Solo se registran las bandas libres (una banda pertenece al primer grupo que la usó);
+        # son BANDS filas por grupo, así que van con un insert de core y no como objetos ORM
+        bands = [
+            {"band_key": k, "cluster_id": cluster.id}
+            for cluster, group in new_clusters for k in group if band_index[k] is cluster
+        ]
+        if bands:
+            session.execute(insert(CommentClusterBand), bands)
+    cluster_ids: List[Optional[int]] = [c.id if isinstance(c, CommentCluster) else c for c in assigned]
+
+    # Grupos de ejecuciones anteriores con un comentario ya analizado: se reutiliza su resultado
+    stored: Dict[int, Comment] = {}
+    reused_ids = existing & {c for c in cluster_ids if c is not None}
+    if reused_ids:
+        first_ids = (
+            session.query(func.min(Comment.id))
+            .filter(Comment.cluster_id.in_(reused_ids), Comment.prob_positive.isnot(None))
+            .group_by(Comment.cluster_id)
+        )
+        stored = {c.cluster_id: c for c in session.query(Comment).filter(Comment.id.in_(first_ids))}
+
+    representatives: List[int] = []
+    source: List[int] = []
+    first_in_batch: Dict[int, int] = {}
+    for position, cluster_id in enumerate(cluster_ids):
+        if cluster_id is None:
+            representatives.append(position)
+            source.append(position)
+        elif cluster_id in stored:
+            source.append(-1)
+        else:
+            if cluster_id not in first_in_batch:
+                first_in_batch[cluster_id] = position
+                representatives.append(position)
+            source.append(first_in_batch[cluster_id])
+    return ClusterAssignment(cluster_ids, representatives, source, stored)
+
+
+def cluster_summary(assignment: ClusterAssignment) -> str:
+    """Texto para los mensajes de progreso: '40 a analizar de 150 (73% casi-duplicados)'."""
+    total = len(assignment.source)
+    ratio = assignment.collapsed / total if total else 0.0
+    return f"{len(assignment.representatives)} a analizar de {total} ({ratio:.0%} casi-duplicados)"
+
+
+def stored_labels(comment: Comment, umbral_confianza: float) -> tuple:
+    """(etiqueta, score, probabilidades) de un comentario ya analizado, con el umbral de la red actual."""
+    probs = {clase: getattr(comment, f"prob_{clase}") for clase in CLASES_SENTIMIENTO}
+    probs = {clase: p for clase, p in probs.items() if p is not None}
+    label, score = etiqueta_desde_probabilidades(probs, umbral_confianza)
+    return (label, str(round(score, 4)), probs)
+
+
+def campaign_sizes(session: Session, cluster_ids) -> Dict[int, int]:
+    """Número de comentarios guardados en cada grupo (tamaño de la campaña)."""
+    ids = {c for c in cluster_ids if c is not None}
+    if not ids:
+        return {}
+    return dict(
+        session.query(Comment.cluster_id, func.count(Comment.id))
+        .filter(Comment.cluster_id.in_(ids))
+        .group_by(Comment.cluster_id)
+    )
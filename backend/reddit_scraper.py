@@ -14,11 +14,18 @@ CLIENT_ID: str = os.getenv("REDDIT_CLIENT_ID")
 CLIENT_SECRET: str = os.getenv("REDDIT_CLIENT_SECRET")
 USER_AGENT: str = "python:SentimentApp:v2.0 (by /u/SentimetrikaBot)"
 
-from .sentiment_utils import _mapear_sentimiento, analizar_sentimiento_con_umbral
+from .sentiment_utils import etiquetar_resultados, UMBRAL_POR_RED
+from .language_detect import detectar_idioma, detectar_idiomas
+from .sentiment_classifier import translator_for
+from .text_chunking import translate_in_chunks
+from .batching import dedupe_texts, dedup_summary
+from .near_duplicates import assign_clusters, cluster_summary, stored_labels
+from .events import ChangeTracker
 
 class RedditScraper:
     def __init__(self, progress_callback: Callable[[str], None]):
         self.progress_callback = progress_callback
+        self.changes = ChangeTracker('Reddit')
         self.reddit = self._initialize_reddit()
 
     def _initialize_reddit(self) -> Optional[praw.Reddit]:
@@ -48,7 +55,9 @@ class RedditScraper:
 
         for post in posts:
             if post.id not in existing_pub_ids:
-                titles_to_translate.append(post.title)
+                # Solo se traducen los títulos en español (en Reddit casi todo llega ya en inglés)
+                if detectar_idioma(post.title) == 'es':
+                    titles_to_translate.append(post.title)
                 pub_id_to_title[post.id] = post.title
 
         translated_titles: Dict[str, str] = {}
@@ -74,6 +83,7 @@ class RedditScraper:
 
         if new_pubs_to_add:
             session.bulk_save_objects(new_pubs_to_add)
+            self.changes.add_publications([p.id for p in new_pubs_to_add])
             self.progress_callback(f"  └ +{len(new_pubs_to_add)} publicaciones nuevas agregadas.")
             return len(new_pubs_to_add)
         return 0
@@ -113,27 +123,23 @@ class RedditScraper:
 
         self.progress_callback(f"Procesando {len(unique_comments)} comentarios únicos...")
 
-        # PASO 1: Preparar textos originales
-        texts_original = [c['text_original'][:512] for c in unique_comments]
+        # PASO 1: Preparar textos originales (completos: los largos se trocean por frases)
+        texts_original = [c['text_original'] for c in unique_comments]
+        languages = detectar_idiomas(texts_original)
         translations_to_english: Dict[str, str] = {}
 
         # Si hay un traductor disponible, traducir a inglés ANTES del análisis
-        if translator and texts_original:
-            self.progress_callback(f"Traduciendo {len(texts_original)} comentarios a inglés para análisis...")
+        # (solo lo que está en español: el resto ya está en inglés o no se puede decidir)
+        spanish_texts = [t for t, lang in zip(texts_original, languages) if lang == 'es']
+        # Los textos repetidos (spam, "+1", emojis) se traducen una sola vez; los casi-duplicados
+        # no: cada comentario guarda su propia traducción (cambian URLs, números, nombres...)
+        texts_to_translate, _ = dedupe_texts(spanish_texts)
+        if translator and texts_to_translate:
+            self.progress_callback(f"Traduciendo comentarios en español a inglés para análisis: {dedup_summary(len(spanish_texts), len(texts_to_translate))}...")
             try:
-                # El traductor puede devolver una lista de dicts o directamente strings según implementación
-                trans_results = translator(texts_original, max_length=512, batch_size=16)
-                translated_texts = []
-                for i, tres in enumerate(trans_results):
-                    if isinstance(tres, dict) and 'translation_text' in tres:
-                        translated_texts.append(tres['translation_text'])
-                    elif isinstance(tres, str):
-                        translated_texts.append(tres)
-                    else:
-                        # Fallback: mantener original si la respuesta no es reconocida
-                        translated_texts.append(texts_original[i])
-
-                for orig, tr in zip(texts_original, translated_texts):
+                translated_texts = translate_in_chunks(translator, texts_to_translate, batch_size=16)
+                translations_to_english = {t: t for t in texts_original}
+                for orig, tr in zip(texts_to_translate, translated_texts):
                     translations_to_english[orig] = tr
             except Exception as e:
                 self.progress_callback(f"❌ Error al traducir comentarios: {e}")
@@ -142,32 +148,40 @@ class RedditScraper:
             # No hay traductor: asumimos que el texto ya está en inglés
             translations_to_english = {t: t for t in texts_original}
 
+        # Los casi-duplicados (campañas, spam con variaciones) se clasifican una vez por grupo
+        clusters = assign_clusters(session, texts_original)
+        if clusters.collapsed:
+            self.progress_callback(f"Agrupando comentarios casi idénticos: {cluster_summary(clusters)}...")
+        rep_texts = [texts_original[j] for j in clusters.representatives]
+
         # PASO 2: Analizar sentimiento sobre el TEXTO EN INGLÉS (el modelo está entrenado en inglés)
         # Usar la traducción si existe
-        texts_for_sentiment = [translations_to_english.get(t, t) for t in texts_original]
+        # Cada texto distinto se clasifica una vez y el resultado se reparte a sus repeticiones
+        texts_for_sentiment, sentiment_index = dedupe_texts([translations_to_english.get(t, t) for t in rep_texts])
         sentiments = []
         if sentiment_analyzer and texts_for_sentiment:
-            self.progress_callback(f"Analizando sentimiento de {len(texts_for_sentiment)} comentarios (en inglés para mayor precisión)...")
+            self.progress_callback(f"Analizando sentimiento (en inglés para mayor precisión): {dedup_summary(len(rep_texts), len(texts_for_sentiment))}...")
             try:
-                results = sentiment_analyzer(texts_for_sentiment, batch_size=16, truncation=True)
+                results = sentiment_analyzer(texts_for_sentiment, batch_size=16, truncation=True, top_k=None)
                 sentiments = results
             except Exception as e:
                 self.progress_callback(f"❌ Error analizando sentimientos: {e}")
 
+        # Mapeo de etiquetas + umbral de confianza en una sola pasada vectorizada
+        # Umbral reducido para ser menos conservador en Reddit (texto en inglés)
+        etiquetas_unicas = etiquetar_resultados(sentiments, umbral_confianza=UMBRAL_POR_RED['Reddit'])
+        etiquetas = [etiquetas_unicas[j] for j in sentiment_index] if len(etiquetas_unicas) else []
+        # Cada comentario recibe el resultado de su representante (o el ya guardado de su grupo)
+        etiquetas = clusters.fan_out(etiquetas, lambda c: stored_labels(c, UMBRAL_POR_RED['Reddit']))
+
         new_comments_to_add: List[Comment] = []
         for i, comment_data in enumerate(unique_comments):
             sentiment_label = 'neutral'
             sentiment_score = '0.0'
+            probs = {}
             
-            if i < len(sentiments):
-                s_res = sentiments[i]
-                raw_label = s_res['label']
-                raw_score = s_res.get('score', 0.0)
-                
-                # Aplicar umbral de confianza para evitar exceso de 'neutral'
-                # Umbral reducido para ser menos conservador en Reddit (texto en inglés)
-                sentiment_label, used_score = analizar_sentimiento_con_umbral(raw_label, raw_score, umbral_confianza=0.35)
-                sentiment_score = str(round(used_score, 4))
+            if etiquetas[i]:
+                sentiment_label, sentiment_score, probs = etiquetas[i]
             
             # Obtener la traducción a inglés (para análisis)
             english_text = translations_to_english.get(comment_data['text_original'], comment_data['text_original'])
@@ -179,13 +193,20 @@ class RedditScraper:
                 author=comment_data['author'],
                 text_original=comment_data['text_original'],  # Texto original (puede ser español/inglés)
                 text_translated=english_text,  # Versión en inglés (para referencia)
+                language=languages[i],
+                cluster_id=clusters.cluster_ids[i],
                 sentiment_label=sentiment_label,
-                sentiment_score=sentiment_score
+                sentiment_score=sentiment_score,
+                prob_negative=probs.get('negative'),
+                prob_neutral=probs.get('neutral'),
+                prob_positive=probs.get('positive')
             )
             new_comments_to_add.append(new_comment)
 
         if new_comments_to_add:
-            session.bulk_save_objects(new_comments_to_add)
+            # return_defaults=True rellena los IDs autogenerados para el feed de cambios
+            session.bulk_save_objects(new_comments_to_add, return_defaults=True)
+            self.changes.add_comments([c.id for c in new_comments_to_add], labels=[c.sentiment_label for c in new_comments_to_add])
             self.progress_callback(f"  └ +{len(new_comments_to_add)} comentarios nuevos guardados.")
             return len(new_comments_to_add)
         return 0
@@ -283,6 +304,7 @@ class RedditScraper:
             nuevas_publicaciones_totales += added_pubs
             if added_pubs > 0:
                 session.commit()
+                self.changes.flush()
                 self.progress_callback(f"  └ {added_pubs} publicaciones nuevas guardadas.")
             
             # Segundo: Procesar comentarios de TODOS los posts (nuevos y existentes)
@@ -299,6 +321,7 @@ class RedditScraper:
                 if stop_event is not None and stop_event.is_set():
                     self.progress_callback("⏹️ Detención solicitada. Guardando progreso parcial...")
                     session.commit()
+                    self.changes.flush()
                     break
 
                 added_comments = self._process_and_save_comments(session, batch, comment_limit, translator, sentiment_analyzer)
@@ -306,12 +329,14 @@ class RedditScraper:
                 # Commit incremental
                 if added_comments > 0:
                     session.commit()
+                    self.changes.flush()
 
             if nuevas_publicaciones_totales == 0 and nuevos_comentarios_totales == 0:
                 self.progress_callback("ℹ️ No se encontraron datos nuevos (ya tienes estos posts/comentarios en la BD).")
 
         except Exception as e:
             session.rollback()
+            self.changes.discard()
             self.progress_callback(f"❌ Error durante el scraping: {e}")
         finally:
             session.close()
@@ -330,4 +355,6 @@ def run_reddit_scrape_opt(
     Versión PostgreSQL optimizada para Reddit con procesamiento por lotes.
     """
     scraper = RedditScraper(progress_callback)
+    # Con un modelo multilingüe no se traduce nada: se clasifica el texto original
+    translator = translator_for(translator, sentiment_analyzer)
     scraper.scrape(subreddit_name, post_limit, comment_limit, translator, sentiment_analyzer, stop_event=stop_event)
\ No newline at end of file
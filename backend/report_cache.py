@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .database import Publication, Comment
+
+# --- CACHÉ DE REPORTES POR VERSIÓN DE DATOS ---
+# Cada PDF generado se registra en un índice JSON dentro de reports/ junto con la
+# "versión" de los datos usados (último ID de comentario y número de filas). Si al
+# pedir de nuevo el reporte la versión es la misma, se devuelve el archivo existente.
+
+REPORT_CACHE_INDEX = os.path.join("reports", "report_cache.json")
+
+
+def network_data_version(session: Session, social_network: str) -> List:
+    """
+    [último ID de comentario, nº de comentarios, nº de publicaciones, último ID de publicación]
+    de una red. El último ID de publicación detecta borrar una publicación y añadir otra
+    (mismo conteo) aunque ninguna de las dos tenga comentarios.
+    """
+    last_id, comments = (
+        session.query(func.max(Comment.id), func.count(Comment.id))
+        .join(Publication, Comment.publication_id == Publication.id)
+        .filter(Publication.red_social == social_network)
+        .one()
+    )
+    publications, last_publication = (
+        session.query(func.count(Publication.id), func.max(Publication.id))
+        .filter(Publication.red_social == social_network)
+        .one()
+    )
+    return [last_id or 0, comments or 0, publications or 0, last_publication or ""]
+
+
+def publication_data_version(comments) -> List[int]:
+    """[último ID de comentario, nº de comentarios] de una publicación ya cargada."""
+    return [max((c.id or 0 for c in comments), default=0), len(comments)]
+
+
+class ReportCache:
+    """Índice clave -> {versión, ruta} persistido en JSON (seguro entre hilos)."""
+
+    def __init__(self, index_path: str = REPORT_CACHE_INDEX):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, index: Dict[str, dict]) -> None:
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, key: str, version: List[int]) -> Optional[str]:
+        """Ruta del reporte generado con exactamente esta versión de datos, si aún existe."""
+        with self._lock:
+            entry = self._load().get(key)
+        if entry and entry.get("version") == list(version) and os.path.exists(entry.get("path", "")):
+            return entry["path"]
+        return None
+
+    def store(self, key: str, version: List[int], path: str) -> None:
+        with self._lock:
+            index = self._load()
+            index[key] = {"version": list(version), "path": path, "created": datetime.now().isoformat(timespec="seconds")}
+            self._save(index)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Olvida una entrada (o todas si `key` es None), p. ej. si cambian las etiquetas sin nuevos IDs."""
+        with self._lock:
+            index = self._load()
+            if key is None:
+                index.clear()
+            else:
+                index.pop(key, None)
+            self._save(index)
+
+    def get_or_build(self, key: str, version: List[int], build: Callable[[], str]) -> str:
+        """Devuelve el PDF en caché para `version` o lo genera con `build()` y lo registra."""
+        path = self.lookup(key, version)
+        if path:
+            print(f"[CACHE] Reporte sin cambios ({key}), reutilizando {os.path.basename(path)}")
+            return path
+        path = build()
+        self.store(key, version, path)
+        return path
+
+
+# Instancia global compartida por la cola de reportes y las vistas
+report_cache = ReportCache()
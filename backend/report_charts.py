@@ -0,0 +1,145 @@
+import glob
+import hashlib
+import os
+import re
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .database import Publication, Comment
+
+# --- GRÁFICOS DE SENTIMIENTO PARA LOS REPORTES ---
+# Los conteos salen de un GROUP BY en la BD (nunca se recorren objetos Comment)
+# y las imágenes se dibujan con Pillow (ya instalado como dependencia de fpdf2).
+# Cada PNG se guarda en caché con la clave (publicación, último ID de comentario,
+# huella de los conteos): si los datos no han cambiado, regenerar el reporte
+# reutiliza la imagen. Borrados y re-etiquetados cambian los conteos sin cambiar
+# el último ID, por eso la huella forma parte de la clave.
+
+CHART_CACHE_DIR = os.path.join("reports", ".chart_cache")
+
+CHART_SIZE = (900, 330)
+# Mismo orden y colores que el resto de la app (verde / gris / rojo)
+CHART_SERIES = (
+    ("positive", "Positivos", (67, 160, 71)),
+    ("neutral", "Neutrales", (158, 158, 158)),
+    ("negative", "Negativos", (229, 57, 53)),
+)
+
+
+class SentimentAggregate(NamedTuple):
+    key: str                 # ID de publicación (o "red_<nombre>" para el total)
+    title: str
+    counts: Dict[str, int]
+    last_comment_id: int
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def version(self) -> str:
+        """Último ID de comentario y huella corta de los conteos, para la clave de la caché."""
+        counts = repr(sorted((str(label), count) for label, count in self.counts.items()))
+        return f"{self.last_comment_id}_{hashlib.sha1(counts.encode('utf-8')).hexdigest()[:10]}"
+
+
+def query_publication_sentiment(session: Session, social_network: str) -> List[SentimentAggregate]:
+    """Conteo por etiqueta y último ID de comentario de cada publicación, en una sola consulta."""
+    rows = (
+        session.query(
+            Publication.id, Publication.title_translated, Publication.title_original,
+            Comment.sentiment_label, func.count(Comment.id), func.max(Comment.id)
+        )
+        .join(Comment, Comment.publication_id == Publication.id)
+        .filter(Publication.red_social == social_network)
+        .group_by(Publication.id, Publication.title_translated, Publication.title_original, Comment.sentiment_label)
+        .order_by(Publication.id)
+        .all()
+    )
+    aggregates: Dict[str, SentimentAggregate] = {}
+    for pub_id, title_translated, title_original, label, count, last_id in rows:
+        agg = aggregates.get(pub_id)
+        if agg is None:
+            agg = aggregates[pub_id] = SentimentAggregate(pub_id, title_translated or title_original or "Sin Titulo", {}, 0)
+        agg.counts[label] = count
+        if last_id > agg.last_comment_id:
+            aggregates[pub_id] = agg._replace(last_comment_id=last_id)
+    return list(aggregates.values())
+
+
+def network_aggregate(social_network: str, publications: List[SentimentAggregate]) -> SentimentAggregate:
+    """Suma los agregados por publicación para el gráfico general de la red."""
+    counts: Dict[str, int] = {}
+    for agg in publications:
+        for label, count in agg.counts.items():
+            counts[label] = counts.get(label, 0) + count
+    last_id = max((agg.last_comment_id for agg in publications), default=0)
+    return SentimentAggregate(f"red_{social_network}", f"Distribucion general - {social_network}", counts, last_id)
+
+
+def _cache_prefix(key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", key)
+
+
+def render_sentiment_chart(agg: SentimentAggregate, cache_dir: str = CHART_CACHE_DIR) -> str:
+    """Retorna la ruta del PNG con la distribución de `agg`, dibujándolo solo si no está en caché."""
+    prefix = _cache_prefix(agg.key)
+    path = os.path.join(cache_dir, f"{prefix}_{agg.version}.png")
+    if os.path.exists(path):
+        return path
+
+    from PIL import Image, ImageDraw, ImageFont
+
+    os.makedirs(cache_dir, exist_ok=True)
+    width, height = CHART_SIZE
+    image = Image.new("RGB", CHART_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=26)
+    except TypeError:  # Pillow < 10.1 sin fuentes escalables
+        font = ImageFont.load_default()
+
+    # Barras horizontales: etiqueta | barra | cantidad (porcentaje)
+    total = agg.total or 1
+    label_w, value_w, margin = 170, 210, 20
+    bar_area = width - label_w - value_w - 2 * margin
+    row_h = (height - 2 * margin) // len(CHART_SERIES)
+    for i, (label, name, color) in enumerate(CHART_SERIES):
+        count = agg.counts.get(label, 0)
+        top = margin + i * row_h
+        bar_top, bar_bottom = top + row_h * 0.2, top + row_h * 0.8
+        text_y = top + row_h / 2
+        draw.text((margin, text_y), name, fill=(33, 33, 33), font=font, anchor="lm")
+        x0 = margin + label_w
+        draw.rectangle([x0, bar_top, x0 + bar_area, bar_bottom], fill=(238, 238, 238))
+        if count:
+            draw.rectangle([x0, bar_top, x0 + max(2, bar_area * count / total), bar_bottom], fill=color)
+        draw.text((x0 + bar_area + 15, text_y), f"{count} ({count / total * 100:.1f}%)", fill=(33, 33, 33), font=font, anchor="lm")
+
+    # Se escribe a un temporal y se renombra para no dejar PNGs a medias en la caché
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp_path, format="PNG", optimize=True)
+    os.replace(tmp_path, path)
+
+    # Las versiones anteriores de esta publicación ya no se usarán
+    for old in glob.glob(os.path.join(cache_dir, f"{prefix}_*.png")):
+        if old != path and re.fullmatch(rf"{re.escape(prefix)}_\d+(_[0-9a-f]+)?\.png", os.path.basename(old)):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return path
+
+
+def clear_chart_cache(cache_dir: str = CHART_CACHE_DIR) -> int:
+    """Borra todas las imágenes en caché (p. ej. tras re-etiquetar comentarios). Retorna cuántas se borraron."""
+    removed = 0
+    for path in glob.glob(os.path.join(cache_dir, "*.png")):
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
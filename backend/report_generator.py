@@ -1,8 +1,29 @@
 from fpdf import FPDF, XPos, YPos
-from typing import List, Dict
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from collections import Counter
 from datetime import datetime
 import os
-from .database import Publication, Comment
+import threading
+import unicodedata
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .database import SessionLocal, Publication, Comment
+from .report_charts import CHART_SIZE, SentimentAggregate, network_aggregate, query_publication_sentiment, render_sentiment_chart
+
+# Filas leídas de la BD por consulta en los reportes en streaming
+REPORT_CHUNK_SIZE = 500
+
+
+# Puntuación tipográfica sin equivalente ASCII bajo NFKD (la elipsis sí se descompone en "...")
+_PUNCTUATION_FOLDING = (
+    ('\u2018', "'"), ('\u2019', "'"),  # Curly apostrophe
+    ('\u201c', '"'), ('\u201d', '"'),  # Curly quotes
+    ('\u2013', '-'), ('\u2014', '-'),  # En/Em dash
+)
+
+
+class ReportCancelled(Exception):
+    """Se lanza cuando se solicita cancelar un reporte en curso."""
 
 class PDFReportGenerator(FPDF):
     def __init__(self):
@@ -13,6 +34,8 @@ class PDFReportGenerator(FPDF):
         # All text will be sanitized to remove problematic Unicode characters
         self.current_font_name = "Helvetica"
         self.set_font(self.current_font_name, size=12)
+        # Las partes del reporte multiproceso se numeran al unirlas (ver report_parallel)
+        self.number_pages = True
 
     def header(self):
         # Logo
@@ -27,6 +50,8 @@ class PDFReportGenerator(FPDF):
         self.ln(5)
 
     def footer(self):
+        if not self.number_pages:
+            return
         self.set_y(-15)
         self.set_font(self.current_font_name, style='I', size=8)
         self.cell(0, 10, f'Pagina {self.page_no()}', new_x=XPos.RIGHT, new_y=YPos.TOP, align='C')
@@ -35,27 +60,16 @@ class PDFReportGenerator(FPDF):
         """Sanitize text to remove problematic Unicode characters"""
         if not text:
             return ""
-        
-        # Replace common problematic characters
-        replacements = {
-            ''': "'",  # Curly apostrophe
-            ''': "'",
-            '"': '"',  # Curly quotes
-            '"': '"',
-            '–': '-',  # En dash
-            '—': '-',  # Em dash
-            '…': '...',  # Ellipsis
-            'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',  # Accented vowels
-            'Á': 'A', 'É': 'E', 'Í': 'I', 'Ó': 'O', 'Ú': 'U',
-            'ñ': 'n', 'Ñ': 'N',  # Spanish n with tilde
-            'ü': 'u', 'Ü': 'U',  # U with diaeresis
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        
-        # Remove any remaining non-ASCII characters
-        text = text.encode('ascii', 'ignore').decode('ascii')
-        return text
+        if text.isascii():
+            return text
+
+        for old, new in _PUNCTUATION_FOLDING:
+            if old in text:
+                text = text.replace(old, new)
+
+        # NFKD separa letra y acento (ç -> c + ¸, ﬁ -> fi); al pasar a ASCII se pierde solo
+        # el acento y los caracteres sin equivalente (emojis, CJK...)
+        return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
 
     def generate_single_publication_report(self, publication: Publication, comments: List[Comment]) -> str:
         self.add_page()
@@ -149,7 +163,9 @@ class PDFReportGenerator(FPDF):
         self.output(filename)
         return os.path.abspath(filename)
 
-    def generate_report(self, social_network: str, publications: List[Publication], comments_map: Dict[str, List[Comment]]) -> str:
+    # --- Bloques comunes de los reportes de red social ---
+
+    def _write_network_header(self, social_network: str):
         self.add_page()
         self.set_font(self.current_font_name, style='B', size=16)
         self.cell(0, 10, f'Reporte de {social_network}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
@@ -158,15 +174,7 @@ class PDFReportGenerator(FPDF):
         self.cell(0, 10, f'Fecha de generacion: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
         self.ln(5)
 
-        # --- Estadísticas Generales ---
-        total_pubs = len(publications)
-        total_comments = sum(len(comments) for comments in comments_map.values())
-        
-        all_comments = [c for comments in comments_map.values() for c in comments]
-        pos_count = sum(1 for c in all_comments if c.sentiment_label == 'positive')
-        neg_count = sum(1 for c in all_comments if c.sentiment_label == 'negative')
-        neu_count = sum(1 for c in all_comments if c.sentiment_label == 'neutral')
-
+    def _write_network_summary(self, total_pubs: int, total_comments: int, label_counts: Dict[str, int]):
         self.set_font(self.current_font_name, style='B', size=14)
         self.cell(0, 10, 'Resumen Estadistico', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
         
@@ -185,61 +193,84 @@ class PDFReportGenerator(FPDF):
             
             row = table.row()
             row.cell("Positivos")
-            row.cell(str(pos_count))
+            row.cell(str(label_counts.get('positive', 0)))
             
             row = table.row()
             row.cell("Negativos")
-            row.cell(str(neg_count))
+            row.cell(str(label_counts.get('negative', 0)))
             
             row = table.row()
             row.cell("Neutrales")
-            row.cell(str(neu_count))
+            row.cell(str(label_counts.get('neutral', 0)))
             
         self.ln(10)
 
+    def _write_sentiment_charts(self, social_network: str, publications: List[SentimentAggregate]):
+        """Páginas de gráficos: distribución general de la red y una por publicación (2 columnas)."""
+        self.add_page()
+        self.set_font(self.current_font_name, style='B', size=14)
+        self.cell(0, 10, 'Graficos de Sentimiento', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        self.ln(2)
+
+        overall = network_aggregate(social_network, publications)
+        width = self.epw
+        self.image(render_sentiment_chart(overall), x=self.l_margin, w=width, h=width * CHART_SIZE[1] / CHART_SIZE[0])
+        self.ln(5)
+
+        col_w = (self.epw - 6) / 2
+        img_h = col_w * CHART_SIZE[1] / CHART_SIZE[0]
+        cell_h = 7 + img_h + 4
+        for i, agg in enumerate(publications):
+            col = i % 2
+            if col == 0 and self.get_y() + cell_h > self.page_break_trigger:
+                self.add_page()
+            x = self.l_margin + col * (col_w + 6)
+            y = self.get_y()
+            self.set_xy(x, y)
+            self.set_font(self.current_font_name, style='B', size=9)
+            title = self._sanitize_text(agg.title)
+            self.cell(col_w, 7, f"{title[:55]}{'...' if len(title) > 55 else ''} ({agg.total})")
+            self.image(render_sentiment_chart(agg), x=x, y=y + 7, w=col_w, h=img_h)
+            if col == 1 or i == len(publications) - 1:
+                self.set_xy(self.l_margin, y + cell_h)
+
+    def _write_details_heading(self):
         # --- Detalle por Publicación ---
         self.set_font(self.current_font_name, style='B', size=14)
         self.cell(0, 10, 'Detalle de Publicaciones', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
         self.ln(5)
 
-        for pub in publications:
-            # Título de la publicación
-            self.set_font(self.current_font_name, style='B', size=11)
-            title = getattr(pub, 'title_translated', None) or getattr(pub, 'title_original', None) or "Sin Titulo"
-            title = self._sanitize_text(title)
-            
-            self.multi_cell(0, 8, f"Post: {title}", border=0)
-            self.ln(2)
-            
-            pub_comments = comments_map.get(pub.id, [])
-            
-            if not pub_comments:
-                self.set_font(self.current_font_name, style='I', size=10)
-                self.cell(0, 8, "  Sin comentarios.", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            else:
-                self.set_font(self.current_font_name, size=9)
-                # Tabla de comentarios
-                # Definir anchos relativos: Autor (20%), Sentimiento (15%), Comentario (65%)
-                with self.table(col_widths=(20, 15, 65)) as table:
-                    header = table.row()
-                    header.cell("Autor", align='C')
-                    header.cell("Sentimiento", align='C')
-                    header.cell("Comentario", align='C')
-                    
-                    for c in pub_comments:
-                        row = table.row()
-                        
-                        # Limpieza básica de texto
-                        author = self._sanitize_text(getattr(c, 'author', None) or "Anon")
-                        text = self._sanitize_text(getattr(c, 'text_translated', None) or getattr(c, 'text_original', None) or "")
-                        sentiment = getattr(c, 'sentiment_label', None) or "N/A"
-
-                        row.cell(author)
-                        row.cell(sentiment)
-                        row.cell(text)
+    def _write_publication_title(self, title: str):
+        self.set_font(self.current_font_name, style='B', size=11)
+        title = self._sanitize_text(title or "Sin Titulo")
+        self.multi_cell(0, 8, f"Post: {title}", border=0)
+        self.ln(2)
+
+    def _write_no_comments(self):
+        self.set_font(self.current_font_name, style='I', size=10)
+        self.cell(0, 8, "  Sin comentarios.", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def _write_comments_table(self, rows: Iterable[Tuple[str, str, str]], with_header: bool = True):
+        """Escribe una tabla de comentarios a partir de tuplas (autor, sentimiento, texto)."""
+        self.set_font(self.current_font_name, size=9)
+        # Tabla de comentarios
+        # Definir anchos relativos: Autor (20%), Sentimiento (15%), Comentario (65%)
+        with self.table(col_widths=(20, 15, 65), first_row_as_headings=with_header) as table:
+            if with_header:
+                header = table.row()
+                header.cell("Autor", align='C')
+                header.cell("Sentimiento", align='C')
+                header.cell("Comentario", align='C')
             
-            self.ln(5)
+            for author, sentiment, text in rows:
+                row = table.row()
+                
+                # Limpieza básica de texto
+                row.cell(self._sanitize_text(author or "Anon"))
+                row.cell(sentiment or "N/A")
+                row.cell(self._sanitize_text(text or ""))
 
+    def _save_network_report(self, social_network: str) -> str:
         # Guardar archivo con nombre descriptivo
         output_dir = "reports"
         if not os.path.exists(output_dir):
@@ -251,3 +282,173 @@ class PDFReportGenerator(FPDF):
         filename = f"{output_dir}/Sentimetrika_{social_network_name}_General_{timestamp}.pdf"
         self.output(filename)
         return os.path.abspath(filename)
+
+    def generate_report(self, social_network: str, publications: List[Publication], comments_map: Dict[str, List[Comment]]) -> str:
+        self._write_network_header(social_network)
+
+        # --- Estadísticas Generales (una sola pasada sobre los comentarios) ---
+        total_pubs = len(publications)
+        label_counts = Counter(c.sentiment_label for comments in comments_map.values() for c in comments)
+        total_comments = sum(label_counts.values())
+        self._write_network_summary(total_pubs, total_comments, label_counts)
+        self._write_details_heading()
+
+        for pub in publications:
+            # Título de la publicación
+            self._write_publication_title(getattr(pub, 'title_translated', None) or getattr(pub, 'title_original', None))
+            
+            pub_comments = comments_map.get(pub.id, [])
+            
+            if not pub_comments:
+                self._write_no_comments()
+            else:
+                self._write_comments_table(_comment_row(c) for c in pub_comments)
+            
+            self.ln(5)
+
+        return self._save_network_report(social_network)
+
+    def write_network_section(
+        self,
+        session: Session,
+        social_network: str,
+        publications: Iterable[Tuple[str, str]],
+        summary: Optional[Tuple[int, int, Dict[str, int]]] = None,
+        chunk_size: int = REPORT_CHUNK_SIZE,
+        include_charts: bool = True,
+        stop_event: Optional[threading.Event] = None,
+        on_publication: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Escribe una sección del reporte de una red a partir de la BD: con `summary`
+        (total_pubs, total_comentarios, conteo_por_etiqueta) abre con la cabecera, el
+        resumen y los gráficos; sin él empieza en una página nueva. Después escribe el
+        detalle de `publications` [(id, título)], leyendo los comentarios por bloques.
+
+        `on_publication(hechas)` se llama tras cada publicación; si `stop_event` se
+        activa, se lanza `ReportCancelled`. Retorna las publicaciones escritas.
+        """
+        if summary is not None:
+            self._write_network_header(social_network)
+            self._write_network_summary(*summary)
+            if include_charts:
+                self._write_sentiment_charts(social_network, query_publication_sentiment(session, social_network))
+                self.add_page()
+            self._write_details_heading()
+        else:
+            self.add_page()
+
+        done = 0
+        for pub_id, title in publications:
+            self._write_publication_title(title)
+
+            has_comments = False
+            for rows in iter_comment_rows(session, pub_id, chunk_size):
+                if stop_event is not None and stop_event.is_set():
+                    raise ReportCancelled(f"Reporte de {social_network} cancelado")
+                self._write_comments_table(rows, with_header=not has_comments)
+                has_comments = True
+            if not has_comments:
+                self._write_no_comments()
+
+            self.ln(5)
+            done += 1
+            if on_publication:
+                on_publication(done)
+        return done
+
+    def generate_report_from_db(
+        self,
+        social_network: str,
+        session: Optional[Session] = None,
+        chunk_size: int = REPORT_CHUNK_SIZE,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+        include_charts: bool = True
+    ) -> str:
+        """
+        Versión en streaming de `generate_report` para redes grandes.
+
+        Las estadísticas se calculan con agregados SQL y las publicaciones/comentarios se
+        leen por bloques de `chunk_size` filas (paginación por ID), escribiendo cada bloque
+        como una tabla independiente; nunca se materializa la red completa en memoria.
+
+        `progress_callback(hechas, total)` se llama tras cada publicación; si `stop_event`
+        se activa, se lanza `ReportCancelled` y no se escribe ningún archivo.
+        Con `include_charts` se añaden las páginas de gráficos (ver `report_charts`).
+        """
+        own_session = session is None
+        session = session or SessionLocal()
+        try:
+            label_counts = query_sentiment_counts(session, social_network)
+            total_pubs = session.query(func.count(Publication.id)).filter(Publication.red_social == social_network).scalar() or 0
+            self.write_network_section(
+                session, social_network,
+                iter_publication_titles(session, social_network, chunk_size),
+                summary=(total_pubs, sum(label_counts.values()), label_counts),
+                chunk_size=chunk_size,
+                include_charts=include_charts,
+                stop_event=stop_event,
+                on_publication=(lambda done: progress_callback(done, total_pubs)) if progress_callback else None
+            )
+
+            if stop_event is not None and stop_event.is_set():
+                raise ReportCancelled(f"Reporte de {social_network} cancelado")
+
+            return self._save_network_report(social_network)
+        finally:
+            if own_session:
+                session.close()
+
+
+# --- Consultas en streaming para los reportes ---
+
+def _comment_row(c: Comment) -> Tuple[str, str, str]:
+    return (
+        getattr(c, 'author', None),
+        getattr(c, 'sentiment_label', None),
+        getattr(c, 'text_translated', None) or getattr(c, 'text_original', None)
+    )
+
+
+def query_sentiment_counts(session: Session, social_network: str) -> Dict[str, int]:
+    """Cuenta los comentarios por etiqueta de sentimiento con un GROUP BY en la BD."""
+    query = (
+        session.query(Comment.sentiment_label, func.count(Comment.id))
+        .join(Publication, Comment.publication_id == Publication.id)
+        .filter(Publication.red_social == social_network)
+        .group_by(Comment.sentiment_label)
+    )
+    return {label: count for label, count in query}
+
+
+def iter_publication_titles(session: Session, social_network: str, chunk_size: int = REPORT_CHUNK_SIZE) -> Iterator[Tuple[str, str]]:
+    """Genera (id, título) de las publicaciones de una red, paginando por ID."""
+    last_id = None
+    while True:
+        query = session.query(Publication.id, Publication.title_translated, Publication.title_original).filter(Publication.red_social == social_network)
+        if last_id is not None:
+            query = query.filter(Publication.id > last_id)
+        chunk = query.order_by(Publication.id).limit(chunk_size).all()
+        if not chunk:
+            return
+        for pub_id, title_translated, title_original in chunk:
+            yield pub_id, title_translated or title_original
+        last_id = chunk[-1][0]
+
+
+def iter_comment_rows(session: Session, publication_id: str, chunk_size: int = REPORT_CHUNK_SIZE) -> Iterator[List[Tuple[str, str, str]]]:
+    """Genera bloques de filas (autor, sentimiento, texto) de una publicación, paginando por ID."""
+    last_id = 0
+    while True:
+        chunk = (
+            session.query(Comment.id, Comment.author, Comment.sentiment_label, Comment.text_translated, Comment.text_original)
+            .filter(Comment.publication_id == publication_id, Comment.id > last_id)
+            .order_by(Comment.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not chunk:
+            return
+        yield [(author, label, translated or original) for _, author, label, translated, original in chunk]
+        last_id = chunk[-1][0]
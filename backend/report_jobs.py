@@ -0,0 +1,182 @@
+import itertools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from .data_export import export_network
+from .database import SessionLocal
+from .report_cache import network_data_version, report_cache
+from .report_generator import PDFReportGenerator, ReportCancelled
+from .report_parallel import default_workers, generate_report_parallel
+
+# --- EJECUTOR DE REPORTES EN SEGUNDO PLANO ---
+# Los reportes se encolan y se generan en hilos de trabajo para no bloquear
+# los manejadores de eventos de Flet. Cada trabajo informa su progreso, puede
+# cancelarse (en cola o en curso) y entrega la ruta del PDF por callback.
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+# target(progress_callback(hechas, total), stop_event) -> ruta del archivo generado
+ReportTarget = Callable[[Callable[[int, int], None], threading.Event], str]
+
+
+class ReportJob:
+    """Un reporte en cola o en ejecución."""
+
+    def __init__(
+        self,
+        job_id: int,
+        description: str,
+        target: ReportTarget,
+        on_progress: Optional[Callable[["ReportJob"], None]] = None,
+        on_done: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        unit: str = "publicaciones"
+    ):
+        self.id = job_id
+        self.description = description
+        self.target = target
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.unit = unit
+
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "En cola..."
+        self.result_path: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, CANCELLED, FAILED)
+
+    def cancel(self) -> None:
+        """Cancela el trabajo: si aún está en cola no llega a ejecutarse."""
+        self.cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            self._fail(CANCELLED, ReportCancelled(f"{self.description} cancelado"))
+
+    def _report_progress(self, done: int, total: int) -> None:
+        self.progress = done / total if total else 1.0
+        self.message = f"{self.description}: {done}/{total} {self.unit}"
+        self._notify_progress()
+
+    def _notify_progress(self) -> None:
+        if self.on_progress:
+            try:
+                self.on_progress(self)
+            except Exception as e:
+                print(f"[ERROR] Callback de progreso del reporte falló: {e}")
+
+    def _fail(self, status: str, error: Exception) -> None:
+        self.status = status
+        self.error = error
+        self.message = "Cancelado" if status == CANCELLED else f"Error: {error}"
+        self._notify_progress()
+        if self.on_error:
+            self.on_error(error)
+
+    def run(self) -> None:
+        if self.cancel_event.is_set():
+            self._fail(CANCELLED, ReportCancelled(f"{self.description} cancelado"))
+            return
+
+        self.status = RUNNING
+        self.message = f"{self.description}: iniciando..."
+        self._notify_progress()
+        try:
+            path = self.target(self._report_progress, self.cancel_event)
+        except ReportCancelled as e:
+            self._fail(CANCELLED, e)
+            return
+        except Exception as e:
+            print(f"[ERROR] {self.description}: {e}")
+            self._fail(FAILED, e)
+            return
+
+        self.status = DONE
+        self.progress = 1.0
+        self.result_path = path
+        self.message = f"{self.description}: listo"
+        self._notify_progress()
+        if self.on_done:
+            self.on_done(path)
+
+
+class ReportJobRunner:
+    """Cola de reportes atendida por un pool de hilos (por defecto uno: los reportes se generan en orden)."""
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs: List[ReportJob] = []
+
+    def submit(
+        self,
+        description: str,
+        target: ReportTarget,
+        on_progress: Optional[Callable[[ReportJob], None]] = None,
+        on_done: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        unit: str = "publicaciones"
+    ) -> ReportJob:
+        job = ReportJob(next(self._ids), description, target, on_progress, on_done, on_error, unit)
+        with self._lock:
+            self._jobs = [j for j in self._jobs if not j.finished]
+            self._jobs.append(job)
+        job.future = self._executor.submit(job.run)
+        return job
+
+    def submit_network_report(self, social_network: str, **callbacks) -> ReportJob:
+        """Encola el reporte general (modo streaming) de una red social.
+
+        Con REPORT_PROCESSES > 1 las secciones se renderizan en varios procesos. Si los
+        datos no han cambiado desde el último reporte se devuelve ese PDF (`report_cache`).
+        """
+        def build(progress_callback, stop_event):
+            workers = default_workers() if os.getenv("REPORT_PROCESSES") else 1
+            if workers > 1:
+                return generate_report_parallel(social_network, workers=workers, progress_callback=progress_callback, stop_event=stop_event)
+            generator = PDFReportGenerator()
+            return generator.generate_report_from_db(social_network, progress_callback=progress_callback, stop_event=stop_event)
+
+        def target(progress_callback, stop_event):
+            session = SessionLocal()
+            try:
+                version = network_data_version(session, social_network)
+            finally:
+                session.close()
+            return report_cache.get_or_build(f"red:{social_network}", version, lambda: build(progress_callback, stop_event))
+
+        return self.submit(f"Reporte {social_network}", target, **callbacks)
+
+    def submit_export(self, social_network: str, fmt: str, **callbacks) -> ReportJob:
+        """Encola la exportación de datos (CSV / JSONL / Parquet) de una red social."""
+        def target(progress_callback, stop_event):
+            return export_network(social_network, fmt, progress_callback=progress_callback, stop_event=stop_event)
+
+        return self.submit(f"Exportación {fmt.upper()} {social_network}", target, unit="filas", **callbacks)
+
+    def active_jobs(self) -> List[ReportJob]:
+        """Trabajos en cola o en ejecución, en orden de llegada."""
+        with self._lock:
+            return [j for j in self._jobs if not j.finished]
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        if cancel_pending:
+            for job in self.active_jobs():
+                job.cancel()
+        self._executor.shutdown(wait=False)
+
+
+# Instancia global compartida por los dashboards
+report_runner = ReportJobRunner()
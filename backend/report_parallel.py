@@ -0,0 +1,201 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from fpdf import FPDF
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+from . import database
+from .database import Publication, Comment
+from .report_generator import PDFReportGenerator, ReportCancelled, REPORT_CHUNK_SIZE, query_sentiment_counts
+
+# --- RENDERIZADO DE REPORTES EN VARIOS PROCESOS ---
+# fpdf2 maqueta las tablas en Python puro (un solo núcleo). En este modo las
+# publicaciones se reparten en secciones contiguas que se renderizan en un pool
+# de procesos como PDFs independientes; luego se unen con pypdf y se estampa la
+# numeración de páginas global (cada parte se genera sin pie de página).
+
+# Secciones por proceso: más de una para repartir bien la carga entre núcleos
+SECTIONS_PER_WORKER = 4
+
+# (índice, red social, [(id, título)], resumen o None)
+# El resumen (total_pubs, total_comentarios, conteo_por_etiqueta) solo lo lleva la
+# primera sección de cada red, que además escribe la cabecera del reporte.
+Summary = Tuple[int, int, Dict[str, int]]
+Section = Tuple[int, str, List[Tuple[str, str]], Optional[Summary]]
+
+
+def default_workers() -> int:
+    """Procesos a usar: variable REPORT_PROCESSES o el número de núcleos."""
+    try:
+        return max(1, int(os.getenv("REPORT_PROCESSES", "0")) or os.cpu_count() or 1)
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def plan_sections(session: Session, social_network: str, sections: int, first_index: int = 0) -> List[Section]:
+    """
+    Divide las publicaciones de una red (en orden de ID, como el reporte secuencial)
+    en `sections` bloques contiguos de peso similar (número de comentarios + 1).
+    """
+    rows = (
+        session.query(Publication.id, Publication.title_translated, Publication.title_original, func.count(Comment.id))
+        .outerjoin(Comment, Comment.publication_id == Publication.id)
+        .filter(Publication.red_social == social_network)
+        .group_by(Publication.id, Publication.title_translated, Publication.title_original)
+        .order_by(Publication.id)
+        .all()
+    )
+    label_counts = query_sentiment_counts(session, social_network)
+    summary = (len(rows), sum(label_counts.values()), label_counts)
+
+    total_weight = sum(count + 1 for *_, count in rows)
+    target = max(1, total_weight // max(1, sections))
+
+    result: List[Section] = []
+    current: List[Tuple[str, str]] = []
+    weight = 0
+    for pub_id, title_translated, title_original, count in rows:
+        current.append((pub_id, title_translated or title_original))
+        weight += count + 1
+        if weight >= target:
+            result.append((first_index + len(result), social_network, current, None))
+            current, weight = [], 0
+    if current or not result:
+        result.append((first_index + len(result), social_network, current, None))
+
+    index, network, pubs, _ = result[0]
+    result[0] = (index, network, pubs, summary)
+    return result
+
+
+# --- Lado del proceso de trabajo ---
+
+def _init_worker(database_url: Optional[str]) -> None:
+    if database_url:
+        database.SessionLocal.configure(bind=create_engine(database_url))
+    else:
+        # Las conexiones heredadas del proceso padre no deben reutilizarse
+        database.engine.dispose(close=False)
+
+
+def _render_section(section: Section, output_dir: str, chunk_size: int, include_charts: bool) -> Tuple[int, str, int]:
+    index, social_network, publications, summary = section
+    pdf = PDFReportGenerator()
+    pdf.number_pages = False
+
+    session = database.SessionLocal()
+    try:
+        pdf.write_network_section(session, social_network, publications, summary, chunk_size, include_charts)
+    finally:
+        session.close()
+
+    path = os.path.join(output_dir, f"part_{index:05d}.pdf")
+    pdf.output(path)
+    return index, path, len(publications)
+
+
+# --- Unión de las partes ---
+
+def _page_number_overlay(page_count: int, font_name: str) -> bytes:
+    """PDF transparente con solo el pie 'Pagina N' (mismo formato que `PDFReportGenerator.footer`)."""
+    overlay = FPDF()
+    overlay.set_auto_page_break(auto=False)
+    for _ in range(page_count):
+        overlay.add_page()
+        overlay.set_y(-15)
+        overlay.set_font(font_name, style='I', size=8)
+        overlay.cell(0, 10, f'Pagina {overlay.page_no()}', align='C')
+    return bytes(overlay.output())
+
+
+def merge_sections(part_paths: Sequence[str], filename: str, font_name: str = "Helvetica") -> None:
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for path in part_paths:
+        writer.append(path)
+
+    overlay = PdfReader(io.BytesIO(_page_number_overlay(len(writer.pages), font_name)))
+    for page, stamp in zip(writer.pages, overlay.pages):
+        page.merge_page(stamp)
+
+    with open(filename, "wb") as f:
+        writer.write(f)
+
+
+def generate_report_parallel(
+    social_networks: Union[str, Sequence[str]],
+    workers: Optional[int] = None,
+    session: Optional[Session] = None,
+    database_url: Optional[str] = None,
+    chunk_size: int = REPORT_CHUNK_SIZE,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    include_charts: bool = True
+) -> str:
+    """
+    Genera el reporte general de una o varias redes renderizando las secciones en
+    `workers` procesos y uniendo los PDFs resultantes en un único archivo.
+
+    El contenido es el mismo que `generate_report_from_db`; la única diferencia visible
+    es que cada sección empieza en una página nueva. `database_url` permite que los
+    procesos lean de otra BD (por defecto, la configurada en `backend.database`).
+    """
+    networks = [social_networks] if isinstance(social_networks, str) else list(social_networks)
+    workers = workers or default_workers()
+
+    own_session = session is None
+    session = session or database.SessionLocal()
+    try:
+        sections: List[Section] = []
+        for network in networks:
+            sections.extend(plan_sections(session, network, workers * SECTIONS_PER_WORKER, first_index=len(sections)))
+    finally:
+        if own_session:
+            session.close()
+
+    total_pubs = sum(len(pubs) for _, _, pubs, _ in sections)
+    done_pubs = 0
+    part_paths: Dict[int, str] = {}
+
+    # "spawn": el reporte se lanza desde hilos (cola de reportes / Flet) y no es seguro hacer fork
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="sentimetrika_report_") as tmp_dir:
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(sections)),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(database_url,)
+        )
+        try:
+            pending = {executor.submit(_render_section, s, tmp_dir, chunk_size, include_charts) for s in sections}
+            while pending:
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                if stop_event is not None and stop_event.is_set():
+                    raise ReportCancelled(f"Reporte de {', '.join(networks)} cancelado")
+                for future in finished:
+                    index, path, pubs = future.result()
+                    part_paths[index] = path
+                    done_pubs += pubs
+                    if progress_callback:
+                        progress_callback(done_pubs, total_pubs)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        output_dir = "reports"
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        # Formato: Sentimetrika_[RedSocial|Global]_General_[Fecha].pdf
+        name = networks[0].replace(' ', '_') if len(networks) == 1 else "Global"
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"{output_dir}/Sentimetrika_{name}_General_{timestamp}.pdf"
+        merge_sections([part_paths[i] for i in sorted(part_paths)], filename)
+        return os.path.abspath(filename)
@@ -0,0 +1,131 @@
+"""
+Trabajos de scraping configurables, sin dependencias de la interfaz.
+
+Los usan el botón de actualización global de la app y el demonio sin interfaz
+(`python -m backend.cli`). Se leen de un JSON (SCRAPE_JOBS_FILE o
+scrape_jobs.json en la raíz del proyecto):
+
+    {
+      "jobs": [
+        {"network": "reddit", "subreddit": "Python", "posts": 5, "comments": 5, "every_minutes": 60},
+        {"network": "facebook", "page_id": "1234567890", "token_env": "PAGE_ACCESS_TOKEN", "every_minutes": 120},
+        {"network": "mastodon", "ids_file": "backend/mastodon_ids.txt", "every_minutes": 30}
+      ]
+    }
+
+Facebook sin `page_id` usa PAGE_ID / PAGE_ACCESS_TOKEN del .env, como el dashboard.
+Mastodon necesita `ids` o `ids_file`. Sin fichero de configuración se usan
+DEFAULT_JOBS: Reddit y Facebook como hacía la app (sin IDs no hay trabajo de Mastodon).
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .reddit_scraper import run_reddit_scrape_opt
+from .facebook_scraper import run_facebook_scrape_opt
+from .mastodon_scraper import run_mastodon_scrape_opt
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+JOBS_FILE = PROJECT_ROOT / "scrape_jobs.json"
+DEFAULT_EVERY_MINUTES = 60
+NETWORKS = ("reddit", "facebook", "mastodon")
+
+
+class ScrapeJob(NamedTuple):
+    """Un scrapeo de una red con su intervalo en modo demonio."""
+    network: str
+    every_minutes: int = DEFAULT_EVERY_MINUTES
+    # Reddit
+    subreddit: Optional[str] = None
+    posts: int = 5
+    comments: int = 5
+    # Facebook: variable de entorno con el token de la página (no se guardan tokens en el JSON)
+    page_id: Optional[str] = None
+    token_env: Optional[str] = None
+    # Mastodon: IDs de toots y/o fichero con un ID por línea
+    ids: Tuple[str, ...] = ()
+    ids_file: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        if self.network == "reddit":
+            return f"Reddit r/{self.subreddit}"
+        if self.network == "facebook":
+            return f"Facebook {self.page_id or '(PAGE_ID)'}"
+        return f"Mastodon ({len(self.ids)} IDs{', ' + self.ids_file if self.ids_file else ''})"
+
+
+DEFAULT_JOBS = [
+    ScrapeJob("reddit", subreddit="Python", posts=5, comments=5),
+    ScrapeJob("facebook"),
+]
+
+
+def parse_job(data: dict) -> ScrapeJob:
+    """Valida una entrada del JSON de trabajos (ValueError si no es válida)."""
+    if not isinstance(data, dict):
+        raise ValueError(f"Cada trabajo debe ser un objeto JSON: {data!r}")
+    unknown = set(data) - set(ScrapeJob._fields)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en el trabajo {data}: {', '.join(sorted(unknown))}")
+    network = str(data.get("network", "")).lower()
+    if network not in NETWORKS:
+        raise ValueError(f"Red no soportada: {network!r} (usa {', '.join(NETWORKS)})")
+    ids = data.get("ids", [])
+    if not isinstance(ids, list):
+        raise ValueError(f"'ids' debe ser una lista de IDs: {ids!r}")
+    job = ScrapeJob(**{**data, "network": network, "ids": tuple(str(i) for i in ids)})
+    if network == "reddit" and not job.subreddit:
+        raise ValueError("Los trabajos de Reddit necesitan 'subreddit'")
+    if network == "facebook" and job.page_id and not job.token_env:
+        # Sin token propio, el scraper vuelve a PAGE_ID / PAGE_ACCESS_TOKEN del .env e ignora page_id
+        raise ValueError(f"El trabajo de Facebook {job.page_id} necesita 'token_env'")
+    if network == "mastodon" and not (job.ids or job.ids_file):
+        # Sin IDs el scraper no tiene nada que leer: mejor avisar que no hacer nada en silencio
+        raise ValueError("Los trabajos de Mastodon necesitan 'ids' o 'ids_file'")
+    if not isinstance(job.every_minutes, int) or job.every_minutes <= 0:
+        raise ValueError(f"'every_minutes' debe ser un entero positivo ({job.name})")
+    return job
+
+
+def load_jobs(path: Optional[str] = None) -> List[ScrapeJob]:
+    """
+    Trabajos del fichero indicado, de SCRAPE_JOBS_FILE o de scrape_jobs.json; si no
+    existe, DEFAULT_JOBS. Un fichero mal formado lanza ValueError.
+    """
+    path = path or os.getenv("SCRAPE_JOBS_FILE") or JOBS_FILE
+    if not os.path.exists(path):
+        return list(DEFAULT_JOBS)
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict) or not isinstance(config.get("jobs", []), list):
+        raise ValueError(f"{path}: se esperaba un objeto con una lista 'jobs'")
+    return [parse_job(entry) for entry in config.get("jobs", [])]
+
+
+def read_ids_file(path: str) -> List[str]:
+    """IDs numéricos de un fichero (uno por línea o separados por comas); las rutas relativas, desde la raíz."""
+    full_path = Path(path) if os.path.isabs(path) else PROJECT_ROOT / path
+    with open(full_path, "r", encoding="utf-8") as f:
+        raw_text = f.read()
+    return [i.strip() for i in raw_text.replace(",", "\n").split("\n") if i.strip().isdigit()]
+
+
+def run_job(
+    job: ScrapeJob,
+    translator: Optional[Callable],
+    sentiment: Optional[Callable],
+    progress_callback: Callable[[str], None],
+    stop_event: Optional[threading.Event] = None
+) -> None:
+    """Ejecuta un trabajo con los modelos ya cargados."""
+    if job.network == "reddit":
+        run_reddit_scrape_opt(progress_callback, translator, sentiment, job.subreddit, job.posts, job.comments, stop_event=stop_event)
+    elif job.network == "facebook":
+        token = os.getenv(job.token_env) if job.token_env else None
+        run_facebook_scrape_opt(progress_callback, translator, sentiment, page_id=job.page_id, token=token)
+    else:
+        ids = list(dict.fromkeys(list(job.ids) + (read_ids_file(job.ids_file) if job.ids_file else [])))
+        run_mastodon_scrape_opt(progress_callback, translator, sentiment, ids)
@@ -0,0 +1,213 @@
+"""
+Clasificador de sentimiento ligero, sin el pipeline `text-classification`.
+
+El pipeline tokeniza, aplica softmax y construye un dict por texto y clase, y los
+scrapers solo se quedan con la etiqueta y las probabilidades. Aquí se tokeniza por
+lotes (ordenados por longitud para reducir el padding), se ejecuta el modelo bajo
+`torch.inference_mode()` y se devuelven directamente los logits como array NumPy
+(N, 3) en el orden de CLASES_SENTIMIENTO, que `etiquetar_resultados` ya acepta.
+
+Los textos que no caben en el modelo se trocean por frases y las probabilidades de
+los trozos se promedian por comentario, en lugar de truncarlos (SENTIMENT_CHUNKING=0
+vuelve a truncar).
+
+Modo multilingüe (SENTIMENT_MODE=multilingual): se usa un checkpoint XLM-R que
+clasifica el español directamente, así que los scrapers no pasan por el traductor.
+
+Con SHARED_WEIGHTS=1 los pesos se mapean desde el fichero safetensors en lugar de
+copiarse (ver `shared_weights`), para que los procesos del pool los compartan.
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .sentiment_utils import CLASES_SENTIMIENTO, _indice_etiqueta, probabilidades_lote
+from .text_chunking import chunk_texts, pool_probabilities
+from .batching import default_max_tokens, token_budget_batches
+from .shared_weights import load_shared_model, shared_weights_enabled
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+MULTILINGUAL_SENTIMENT_MODEL = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
+# Checkpoints que entienden el texto original (no necesitan la traducción a inglés)
+MULTILINGUAL_MODELS = {MULTILINGUAL_SENTIMENT_MODEL}
+BATCH_SIZE = 16
+MAX_LENGTH = 512
+
+# Backends de `load_sentiment_model` (variable de entorno SENTIMENT_BACKEND)
+SENTIMENT_BACKENDS = ("classifier", "pipeline")
+# Modos (variable de entorno SENTIMENT_MODE): traducir y clasificar en inglés, o clasificar directamente
+SENTIMENT_MODES = {"english": SENTIMENT_MODEL, "multilingual": MULTILINGUAL_SENTIMENT_MODEL}
+
+
+def default_sentiment_model() -> str:
+    """Checkpoint según SENTIMENT_MODE (por defecto 'english', el de siempre)."""
+    mode = (os.getenv("SENTIMENT_MODE") or "english").lower()
+    if mode not in SENTIMENT_MODES:
+        raise ValueError(f"SENTIMENT_MODE no soportado: {mode} (usa {', '.join(SENTIMENT_MODES)})")
+    return SENTIMENT_MODES[mode]
+
+
+def is_multilingual(model) -> bool:
+    """Si el modelo (o el nombre del checkpoint) clasifica el texto original sin traducir."""
+    if isinstance(model, str):
+        return model in MULTILINGUAL_MODELS
+    return bool(getattr(model, "multilingual", False))
+
+
+def translator_for(translator, sentiment_model):
+    """El traductor solo hace falta para el análisis si el modelo de sentimiento no es multilingüe."""
+    return None if is_multilingual(sentiment_model) else translator
+
+
+def _from_pretrained(loader, model_name: str):
+    # Primero la caché local (sin red); si no está, se descarga como siempre
+    try:
+        return loader.from_pretrained(model_name, local_files_only=True)
+    except OSError:
+        return loader.from_pretrained(model_name)
+
+
+class SentimentClassifier:
+    """Tokenizador + modelo de HuggingFace que devuelve logits NumPy por lotes."""
+
+    def __init__(
+        self,
+        model_name: str = SENTIMENT_MODEL,
+        device: Optional[str] = None,
+        max_length: int = MAX_LENGTH,
+        chunk_long_texts: Optional[bool] = None,
+        max_tokens: Optional[int] = None,
+        shared_weights: Optional[bool] = None
+    ):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self._torch = torch
+        self.model_name = model_name
+        self.multilingual = is_multilingual(model_name)
+        self.device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+        self.tokenizer = _from_pretrained(AutoTokenizer, model_name)
+        if shared_weights is None:
+            shared_weights = shared_weights_enabled()
+        if shared_weights:
+            model = load_shared_model(AutoModelForSequenceClassification, model_name)
+        else:
+            model = _from_pretrained(AutoModelForSequenceClassification, model_name)
+        self.model = model.to(self.device).eval()
+        self.max_length = min(max_length, self.tokenizer.model_max_length)
+        if chunk_long_texts is None:
+            chunk_long_texts = os.getenv("SENTIMENT_CHUNKING", "1") != "0"
+        self.chunk_long_texts = chunk_long_texts
+        # Tokens (con padding) por lote; 0 vuelve a los lotes de `batch_size` textos
+        self.max_tokens = default_max_tokens(model_name, self.device) if max_tokens is None else max_tokens
+
+        # Columna del modelo -> columna en CLASES_SENTIMIENTO (LABEL_0, 'negative', ... se normalizan)
+        id2label = self.model.config.id2label
+        self._columnas = np.array([_indice_etiqueta(id2label[i]) for i in range(len(id2label))])
+        if len(set(self._columnas.tolist())) != len(self._columnas):
+            raise ValueError(f"Las etiquetas de {model_name} ({list(id2label.values())}) no corresponden a clases distintas")
+
+    def _encode(self, texts: List[str]) -> List[List[int]]:
+        return self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+
+    def predict_logits(self, texts: Sequence[str], batch_size: int = BATCH_SIZE) -> np.ndarray:
+        """
+        Logits (N, 3) en el orden de CLASES_SENTIMIENTO; las clases que el modelo no tiene
+        quedan en -inf. Con `chunk_long_texts`, los textos largos se evalúan por trozos y
+        se devuelve el logaritmo de sus probabilidades promediadas.
+        """
+        textos = list(texts)
+        if not self.chunk_long_texts or not textos:
+            return self._forward(textos, batch_size)
+
+        # Los IDs con los que se mide cada texto (y cada frase) se reutilizan en `_forward`
+        known: Dict[str, List[int]] = {}
+
+        def count_tokens(items: List[str]) -> List[int]:
+            ids = self._encode(items)
+            known.update(zip(items, ids))
+            return [len(i) for i in ids]
+
+        budget = self.max_length - self.tokenizer.num_special_tokens_to_add()
+        chunks, owners, weights = chunk_texts(textos, count_tokens, budget)
+        if len(chunks) == len(textos):
+            return self._forward(textos, batch_size, known)  # todos caben: nada que agregar
+
+        # Todos los trozos de todos los textos van en los mismos lotes
+        probs = pool_probabilities(probabilidades_lote(self._forward(chunks, batch_size, known)), owners, weights, len(textos))
+        with np.errstate(divide="ignore"):
+            return np.log(probs).astype(np.float32)
+
+    def _forward(self, textos: List[str], batch_size: int, known: Optional[Dict[str, List[int]]] = None) -> np.ndarray:
+        """`known`: IDs ya calculados (sin tokens especiales) por texto; solo se tokenizan los que faltan."""
+        torch = self._torch
+        salida = np.full((len(textos), len(CLASES_SENTIMIENTO)), -np.inf, dtype=np.float32)
+        if not textos:
+            return salida
+
+        # Se tokeniza una sola vez; cada lote solo se rellena hasta su texto más largo
+        if known is None:
+            encoded = self.tokenizer(textos, truncation=True, max_length=self.max_length)
+            features = [dict(zip(encoded.keys(), values)) for values in zip(*encoded.values())]
+        else:
+            missing = [t for t in dict.fromkeys(textos) if t not in known]
+            if missing:
+                known.update(zip(missing, self._encode(missing)))
+            features = [
+                self.tokenizer.prepare_for_model(known[t], truncation=True, max_length=self.max_length)
+                for t in textos
+            ]
+        lengths = [len(f["input_ids"]) for f in features]
+        if self.max_tokens:
+            batches = token_budget_batches(lengths, self.max_tokens)
+        else:
+            orden = sorted(range(len(textos)), key=lengths.__getitem__)
+            batches = [orden[i:i + batch_size] for i in range(0, len(orden), batch_size)]
+
+        with torch.inference_mode():
+            for indices in batches:
+                batch = self.tokenizer.pad([features[i] for i in indices], return_tensors="pt").to(self.device)
+                logits = self.model(**batch).logits.float().cpu().numpy()
+                salida[np.ix_(indices, self._columnas)] = logits
+        return salida
+
+    def predict_proba(self, texts: Sequence[str], batch_size: int = BATCH_SIZE) -> np.ndarray:
+        """Probabilidades (N, 3) en el orden de CLASES_SENTIMIENTO."""
+        return probabilidades_lote(self.predict_logits(texts, batch_size))
+
+    def __call__(self, texts: Union[str, Sequence[str]], batch_size: int = BATCH_SIZE, **kwargs) -> np.ndarray:
+        """
+        Misma llamada que hacen los scrapers al pipeline (`truncation`, `top_k`... se ignoran:
+        siempre se trunca y se devuelven todas las clases; `batch_size` solo se usa si no hay
+        presupuesto de tokens). Retorna los logits (N, 3).
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        return self.predict_logits(texts, batch_size)
+
+
+def load_sentiment_model(model_name: Optional[str] = None, backend: Optional[str] = None):
+    """
+    Carga el modelo de sentimiento (por defecto el de SENTIMENT_MODE). Por defecto
+    `SentimentClassifier`; con SENTIMENT_BACKEND=pipeline se usa el pipeline de
+    transformers de siempre. El resultado lleva `multilingual` para los scrapers.
+    """
+    model_name = model_name or default_sentiment_model()
+    backend = (backend or os.getenv("SENTIMENT_BACKEND") or "classifier").lower()
+    if backend == "pipeline":
+        from transformers import pipeline
+        if shared_weights_enabled():
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+            sentiment = pipeline(
+                "text-classification",
+                model=load_shared_model(AutoModelForSequenceClassification, model_name),
+                tokenizer=AutoTokenizer.from_pretrained(model_name)
+            )
+        else:
+            sentiment = pipeline("text-classification", model=model_name)
+        sentiment.multilingual = is_multilingual(model_name)
+        return sentiment
+    if backend != "classifier":
+        raise ValueError(f"SENTIMENT_BACKEND no soportado: {backend} (usa {', '.join(SENTIMENT_BACKENDS)})")
+    return SentimentClassifier(model_name)
@@ -1,3 +1,30 @@
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+
+# Mapeo de las distintas variantes de etiquetas del modelo (se construye una sola vez)
+_MAPEO_ETIQUETAS = {
+    # Variantes positivas
+    'POSITIVE': 'positive', 
+    'LABEL_2': 'positive', 
+    'POS': 'positive',
+    '2': 'positive',
+    
+    # Variantes negativas
+    'NEGATIVE': 'negative', 
+    'LABEL_0': 'negative', 
+    'NEG': 'negative',
+    '0': 'negative',
+    
+    # Variantes neutrales
+    'NEUTRAL': 'neutral',
+    'LABEL_1': 'neutral',
+    '1': 'neutral'
+}
+
+
 def _mapear_sentimiento(label_original: str) -> str:
     """Normaliza las etiquetas del modelo de forma más concisa.
     
@@ -7,28 +34,7 @@ def _mapear_sentimiento(label_original: str) -> str:
     - LABEL_2: Positive
     """
     label_upper = str(label_original).upper().strip()
-    
-    # Mapeo para diferentes variantes de etiquetas
-    mapping = {
-        # Variantes positivas
-        'POSITIVE': 'positive', 
-        'LABEL_2': 'positive', 
-        'POS': 'positive',
-        '2': 'positive',
-        
-        # Variantes negativas
-        'NEGATIVE': 'negative', 
-        'LABEL_0': 'negative', 
-        'NEG': 'negative',
-        '0': 'negative',
-        
-        # Variantes neutrales
-        'NEUTRAL': 'neutral',
-        'LABEL_1': 'neutral',
-        '1': 'neutral'
-    }
-    
-    return mapping.get(label_upper, 'neutral')
+    return _MAPEO_ETIQUETAS.get(label_upper, 'neutral')
 
 
 def analizar_sentimiento_con_umbral(label: str, score: float, umbral_confianza: float = 0.5) -> tuple:
@@ -52,3 +58,175 @@ def analizar_sentimiento_con_umbral(label: str, score: float, umbral_confianza:
         return ('neutral', score)
     
     return (sentiment_mapped, score)
+
+
+# --- PROBABILIDADES CRUDAS Y POLÍTICA DE ETIQUETADO ---
+# Con `top_k=None` el pipeline devuelve la probabilidad de las tres clases. Se guardan
+# tal cual en el comentario (prob_negative / prob_neutral / prob_positive) para poder
+# recalcular etiquetas y umbrales en SQL sin volver a ejecutar el modelo.
+
+CLASES_SENTIMIENTO = ('negative', 'neutral', 'positive')
+
+# Umbral de confianza por red (0.0 = la clase más probable, sin umbral)
+UMBRAL_POR_RED = {
+    'Reddit': 0.35,
+    'Facebook': 0.0,
+    'Mastodon': 0.0,
+}
+
+
+def probabilidades_de_resultado(resultado) -> dict:
+    """Convierte la salida del pipeline de un texto en {'negative': p, 'neutral': p, 'positive': p}.
+
+    Acepta la lista de clases (`top_k=None`) o un único dict {label, score}; en ese
+    caso solo se conoce la probabilidad de la clase ganadora.
+    """
+    if isinstance(resultado, dict):
+        resultado = [resultado]
+    probs = {}
+    for item in resultado:
+        probs[_mapear_sentimiento(item['label'])] = float(item.get('score', 0.0))
+    return probs
+
+
+def etiqueta_desde_probabilidades(probs: dict, umbral_confianza: float = 0.0) -> tuple:
+    """
+    Aplica la política de etiquetado a unas probabilidades: la clase más probable
+    (desempate: positive > negative > neutral) o 'neutral' si no supera el umbral.
+    Es la misma regla que `backfill relabel` aplica en SQL.
+
+    Returns:
+        (sentiment_label, score de la clase más probable)
+    """
+    if not probs:
+        return ('neutral', 0.0)
+    p_pos = probs.get('positive') or 0.0
+    p_neg = probs.get('negative') or 0.0
+    p_neu = probs.get('neutral') or 0.0
+
+    if p_pos >= p_neg and p_pos >= p_neu:
+        label, score = 'positive', p_pos
+    elif p_neg >= p_neu:
+        label, score = 'negative', p_neg
+    else:
+        label, score = 'neutral', p_neu
+
+    if score < umbral_confianza:
+        return ('neutral', score)
+    return (label, score)
+
+
+def etiquetar_resultado(resultado, umbral_confianza: float = 0.0) -> tuple:
+    """
+    Etiqueta la salida del pipeline para un texto.
+
+    Returns:
+        (sentiment_label, sentiment_score como texto, probabilidades por clase)
+    """
+    probs = probabilidades_de_resultado(resultado)
+    label, score = etiqueta_desde_probabilidades(probs, umbral_confianza)
+    return (label, str(round(score, 4)), probs)
+
+
+# --- API POR LOTES (VECTORIZADA) ---
+# Convierte la salida completa del pipeline (o los logits crudos) en arrays de
+# etiquetas / scores / probabilidades en una sola pasada de NumPy, en lugar de
+# mapear y aplicar el umbral comentario a comentario.
+
+# Índice de columna de cada etiqueta normalizada (orden de CLASES_SENTIMIENTO)
+_INDICE_CLASE = {clase: i for i, clase in enumerate(CLASES_SENTIMIENTO)}
+# Orden de desempate de `etiqueta_desde_probabilidades`: positive > negative > neutral
+_ORDEN_DESEMPATE = [_INDICE_CLASE['positive'], _INDICE_CLASE['negative'], _INDICE_CLASE['neutral']]
+
+
+class _IndicePorEtiqueta(dict):
+    """Variante de etiqueta -> columna; -1 si no se reconoce tal cual (se normaliza aparte)."""
+    def __missing__(self, key):
+        return -1
+
+
+# Índice de columna para cada variante de etiqueta del modelo (mayúsculas y minúsculas)
+_INDICE_ETIQUETA = _IndicePorEtiqueta(
+    {variante: _INDICE_CLASE[clase] for variante, clase in _MAPEO_ETIQUETAS.items()},
+    **{clase: i for clase, i in _INDICE_CLASE.items()}
+)
+_obtener_label = itemgetter('label')
+
+
+def _obtener_score(resultado) -> float:
+    return resultado.get('score', 0.0)
+
+
+def _indice_etiqueta(label) -> int:
+    return _INDICE_CLASE[_mapear_sentimiento(label)]
+
+
+def probabilidades_lote(resultados) -> "np.ndarray":
+    """
+    Matriz (N, 3) de probabilidades en el orden de CLASES_SENTIMIENTO.
+
+    Acepta la lista de salidas del pipeline (listas de clases con `top_k=None`, o un
+    dict {label, score} por texto, en cuyo caso las otras clases quedan en NaN) o un
+    array de logits (N, 3) en el orden del modelo (negative, neutral, positive), al
+    que se aplica softmax.
+    """
+    if isinstance(resultados, np.ndarray):
+        logits = resultados.astype(np.float64, copy=False)
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    n = len(resultados)
+    probs = np.full((n, len(CLASES_SENTIMIENTO)), np.nan)
+    if n == 0:
+        return probs
+    if isinstance(resultados[0], dict):
+        planos = resultados
+        filas = np.arange(n)
+    else:
+        # top_k=None: las clases de cada texto (ordenadas por score, no por clase)
+        planos = list(chain.from_iterable(resultados))
+        filas = np.repeat(np.arange(n), [len(clases) for clases in resultados])
+
+    etiquetas = list(map(_obtener_label, planos))
+    columnas = np.fromiter(map(_INDICE_ETIQUETA.__getitem__, etiquetas), dtype=np.intp, count=len(planos))
+    scores = np.fromiter(map(_obtener_score, planos), dtype=np.float64, count=len(planos))
+    desconocidas = np.flatnonzero(columnas < 0)
+    if len(desconocidas):
+        # Variantes en minúsculas / con espacios: normalización lenta solo para esas
+        columnas[desconocidas] = [_indice_etiqueta(etiquetas[i]) for i in desconocidas]
+    probs[filas, columnas] = scores
+    return probs
+
+
+def etiquetar_lote(resultados, umbral_confianza: float = 0.0):
+    """
+    Versión vectorizada de `etiquetar_resultado` para un lote completo.
+
+    Returns:
+        (etiquetas: array de str, scores: array float, probabilidades: matriz (N, 3))
+    """
+    probs = probabilidades_lote(resultados)
+    if len(probs) == 0:
+        return np.array([], dtype='<U8'), np.array([], dtype=np.float64), probs
+
+    ordenadas = np.nan_to_num(probs[:, _ORDEN_DESEMPATE], nan=0.0)
+    ganadora = np.argmax(ordenadas, axis=1)  # argmax devuelve la primera en caso de empate
+    scores = ordenadas[np.arange(len(probs)), ganadora]
+    clases = np.array(CLASES_SENTIMIENTO)[_ORDEN_DESEMPATE]
+    # Sin ninguna probabilidad conocida (salida vacía) -> neutral, como `etiqueta_desde_probabilidades`
+    sin_datos = np.isnan(probs).all(axis=1)
+    etiquetas = np.where((scores < umbral_confianza) | sin_datos, 'neutral', clases[ganadora])
+    return etiquetas, scores, probs
+
+
+def etiquetar_resultados(resultados, umbral_confianza: float = 0.0) -> list:
+    """
+    Como `etiquetar_resultado` pero para todo el lote de un scraper: el mapeo y el
+    umbral se hacen vectorizados y se devuelve [(etiqueta, score como texto, probabilidades)].
+    """
+    etiquetas, scores, probs = etiquetar_lote(resultados, umbral_confianza)
+    clases = [{'negative': p_neg, 'neutral': p_neu, 'positive': p_pos} for p_neg, p_neu, p_pos in probs.tolist()]
+    for i in np.flatnonzero(np.isnan(probs).any(axis=1)).tolist():
+        # Solo se conoce la clase ganadora (salida top-1): se omiten las demás
+        clases[i] = {clase: p for clase, p in clases[i].items() if p == p}  # NaN != NaN
+    return list(zip(etiquetas.tolist(), [str(round(score, 4)) for score in scores.tolist()], clases))
@@ -0,0 +1,143 @@
+"""
+Pesos compartidos entre procesos: safetensors mapeados en memoria (solo lectura).
+
+Con el pool de inferencia (INFERENCE_WORKERS) o el relleno en paralelo, cada
+proceso carga su propia copia de RoBERTa y Marian (~800 MB entre los dos). Con
+SHARED_WEIGHTS=1 los parámetros no se copian a memoria anónima: son vistas sobre
+el fichero .safetensors mapeado en modo lectura, así que todos los procesos usan
+las mismas páginas de la caché del sistema (la PSS de cada uno baja con el número
+de procesos).
+
+Los checkpoints que solo publican `pytorch_model.bin` se convierten una vez a
+safetensors en SHARED_WEIGHTS_DIR. `process_memory` lee RSS/PSS de /proc para el
+informe de `model_profiler`.
+"""
+import json
+import mmap
+import os
+import struct
+import warnings
+from typing import Dict, Optional, Tuple
+
+SHARED_WEIGHTS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sentimetrika", "weights")
+
+# Tipos del formato safetensors -> nombre del dtype de torch
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def shared_weights_enabled() -> bool:
+    """SHARED_WEIGHTS=1 activa los pesos mapeados en memoria (por defecto, desactivado)."""
+    return os.getenv("SHARED_WEIGHTS", "0") == "1"
+
+
+def read_header(path: str) -> Tuple[Dict, int]:
+    """Cabecera JSON de un fichero safetensors y el offset donde empiezan los datos."""
+    with open(path, "rb") as f:
+        (size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(size))
+    header.pop("__metadata__", None)
+    return header, 8 + size
+
+
+def mmap_state_dict(path: str):
+    """
+    state_dict cuyos tensores son vistas de solo lectura sobre el fichero mapeado.
+    Retorna (state_dict, mapa); el mapa debe vivir tanto como el modelo.
+    """
+    import torch
+
+    header, data_start = read_header(path)
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    state = {}
+    with warnings.catch_warnings():
+        # torch avisa de que el buffer no es escribible: la inferencia nunca escribe los pesos
+        warnings.simplefilter("ignore", UserWarning)
+        for name, info in header.items():
+            dtype = getattr(torch, _DTYPES[info["dtype"]])
+            start, end = info["data_offsets"]
+            count = (end - start) // torch.empty((), dtype=dtype).element_size()
+            tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + start) if count else torch.empty(0, dtype=dtype)
+            state[name] = tensor.reshape(info["shape"])
+    return state, mapped
+
+
+def safetensors_path(loader, model_name: str) -> str:
+    """model.safetensors del checkpoint (de la caché de HuggingFace) o la conversión local."""
+    from huggingface_hub import hf_hub_download
+
+    for local_only in (True, False):
+        try:
+            return hf_hub_download(model_name, "model.safetensors", local_files_only=local_only)
+        except Exception:
+            # No está en la caché, o el repositorio solo publica pytorch_model.bin
+            continue
+
+    converted = os.path.join(SHARED_WEIGHTS_DIR, model_name.replace("/", "--") + ".safetensors")
+    if not os.path.exists(converted):
+        from safetensors.torch import save_model
+
+        print(f"🔄 Convirtiendo {model_name} a safetensors (solo la primera vez)...")
+        os.makedirs(SHARED_WEIGHTS_DIR, exist_ok=True)
+        tmp_path = f"{converted}.tmp"
+        save_model(loader.from_pretrained(model_name), tmp_path)
+        os.replace(tmp_path, converted)
+    return converted
+
+
+def load_shared_model(loader, model_name: str):
+    """
+    Modelo de `loader` (AutoModelFor...) con los parámetros asignados directamente a
+    los tensores mapeados (`load_state_dict(assign=True)`, sin copia). Si el
+    checkpoint no encaja con la arquitectura, se carga de la forma normal.
+    """
+    from transformers import AutoConfig
+    from transformers.modeling_utils import no_init_weights
+
+    path = safetensors_path(loader, model_name)
+    state, mapped = mmap_state_dict(path)
+    # Sin inicialización aleatoria: los tensores de partida nunca se tocan y se liberan al asignar
+    with no_init_weights():
+        model = loader.from_config(AutoConfig.from_pretrained(model_name))
+    missing, _ = model.load_state_dict(state, strict=False, assign=True)
+    model.tie_weights()
+    tied = set(getattr(model, "_tied_weights_keys", None) or ())
+    if set(missing) - tied:
+        print(f"⚠️ {model_name}: {len(set(missing) - tied)} pesos sin mapear, se carga sin compartir")
+        return loader.from_pretrained(model_name)
+    model._shared_weights_map = mapped  # el mapa debe vivir tanto como el modelo
+    return model.eval()
+
+
+def load_translator(model_name: str, task: str = "translation"):
+    """Pipeline de traducción; con SHARED_WEIGHTS=1, con los pesos mapeados."""
+    from transformers import pipeline
+
+    if not shared_weights_enabled():
+        return pipeline(task, model=model_name)
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    return pipeline(task, model=load_shared_model(AutoModelForSeq2SeqLM, model_name), tokenizer=AutoTokenizer.from_pretrained(model_name))
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, int]:
+    """
+    Memoria del proceso en KB según /proc/<pid>/smaps_rollup (Linux): rss, pss
+    (las páginas compartidas, repartidas entre los procesos que las usan), shared y
+    private. Vacío si el sistema no lo ofrece.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+              "Private_Clean": "private", "Private_Dirty": "private"}
+    usage: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = usage.get(fields[key], 0) + int(value.split()[0])
+    except OSError:
+        return {}
+    return usage
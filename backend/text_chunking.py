@@ -0,0 +1,124 @@
+"""
+Troceado de textos largos por frases para los modelos con límite de longitud.
+
+En lugar de truncar (y perder el final de los comentarios largos), los textos que
+superan el presupuesto se parten en frases y se agrupan en trozos que caben en el
+modelo. Todos los trozos de un lote se procesan juntos y luego se vuelven a unir
+por comentario: las probabilidades de sentimiento se promedian ponderadas por la
+longitud de cada trozo y las traducciones se concatenan en orden.
+"""
+import re
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+MAX_CHARS = 512  # presupuesto por trozo del traductor (en caracteres)
+
+_FIN_DE_FRASE = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Frases del texto (cortes tras . ! ? … seguidos de espacio, y en los saltos de línea)."""
+    return [s.strip() for s in _FIN_DE_FRASE.split(text) if s and s.strip()]
+
+
+def _split_words(sentence: str, length: int, budget: int) -> List[Tuple[str, int]]:
+    # Frase más larga que el presupuesto: se reparte por palabras en partes de longitud similar
+    words = sentence.split()
+    pieces = -(-length // budget)
+    per_piece = max(1, -(-len(words) // pieces))
+    return [
+        (" ".join(words[i:i + per_piece]), length * len(words[i:i + per_piece]) // len(words))
+        for i in range(0, len(words), per_piece)
+    ]
+
+
+def pack_sentences(sentences: Sequence[str], lengths: Sequence[int], budget: int) -> List[Tuple[str, int]]:
+    """
+    Agrupa frases consecutivas en trozos (texto, longitud) de como mucho `budget`.
+    El espacio que une dos frases cuenta como 1 (en caracteres es exacto; en tokens, conservador).
+    """
+    chunks: List[Tuple[str, int]] = []
+    current: List[str] = []
+    used = 0
+    for sentence, length in zip(sentences, lengths):
+        if current and used + 1 + length > budget:
+            chunks.append((" ".join(current), used))
+            current, used = [], 0
+        if length > budget:
+            chunks.extend(_split_words(sentence, length, budget))
+            continue
+        used += length + (1 if current else 0)
+        current.append(sentence)
+    if current:
+        chunks.append((" ".join(current), used))
+    return chunks
+
+
+def chunk_texts(
+    texts: Sequence[str],
+    count: Callable[[List[str]], List[int]],
+    budget: int
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Trocea los textos cuya longitud (`count`, en tokens o caracteres) supera `budget`.
+
+    Returns:
+        (trozos, índice del texto de cada trozo, peso de cada trozo = su longitud).
+        Los textos que caben quedan como un único trozo, en su orden original.
+    """
+    lengths = count(list(texts))
+    chunks: List[str] = []
+    owners: List[int] = []
+    weights: List[int] = []
+    long_texts = []
+    for i, (text, length) in enumerate(zip(texts, lengths)):
+        if length > budget:
+            long_texts.append(i)
+        else:
+            chunks.append(text)
+            owners.append(i)
+            weights.append(max(1, length))
+
+    if long_texts:
+        sentences = [split_sentences(texts[i]) for i in long_texts]
+        # Una sola llamada a `count` para las frases de todos los textos largos
+        sentence_lengths = iter(count([s for group in sentences for s in group]))
+        for i, group in zip(long_texts, sentences):
+            for chunk, length in pack_sentences(group, [next(sentence_lengths) for _ in group], budget):
+                chunks.append(chunk)
+                owners.append(i)
+                weights.append(max(1, length))
+    return chunks, np.asarray(owners, dtype=np.intp), np.asarray(weights, dtype=np.float64)
+
+
+def pool_probabilities(probs: np.ndarray, owners: np.ndarray, weights: np.ndarray, n: int) -> np.ndarray:
+    """Probabilidades (n, C) por texto: media de las de sus trozos ponderada por longitud."""
+    pooled = np.zeros((n, probs.shape[1]))
+    totals = np.zeros(n)
+    np.add.at(pooled, owners, probs * weights[:, None])
+    np.add.at(totals, owners, weights)
+    return pooled / totals[:, None]
+
+
+def _translation_text(result, fallback: str) -> str:
+    # El traductor puede devolver una lista de dicts o directamente strings según implementación
+    if isinstance(result, dict) and 'translation_text' in result:
+        return result['translation_text']
+    if isinstance(result, str):
+        return result
+    return fallback
+
+
+def translate_in_chunks(translator, texts: Sequence[str], batch_size: int = 16, max_chars: int = MAX_CHARS) -> List[str]:
+    """
+    Traduce textos de cualquier longitud: los largos se trocean por frases (hasta
+    `max_chars` por trozo), todos los trozos se traducen en un solo lote y se vuelven
+    a unir en orden.
+    """
+    chunks, owners, _ = chunk_texts(texts, lambda items: [len(t) for t in items], max_chars)
+    results = translator(chunks, max_length=512, truncation=True, batch_size=batch_size)
+    parts: List[List[str]] = [[] for _ in texts]
+    for owner, chunk, result in zip(owners.tolist(), chunks, results):
+        parts[owner].append(_translation_text(result, chunk))
+    return [" ".join(p) for p in parts]
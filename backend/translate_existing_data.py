@@ -1,20 +1,209 @@
 """
-Script simple para traducir datos existentes
+Traduce los datos existentes como un trabajo de relleno reanudable.
+
+Las filas se leen por rangos de ID (paginación por ID, sin cargar la tabla entera),
+se traducen en lotes agrupados por longitud y cada bloque se confirma junto con su
+checkpoint en `backfill_checkpoints`. Si el proceso se interrumpe, al relanzarlo
+continúa desde el último bloque confirmado. Al terminar el recorrido el checkpoint
+se borra: la siguiente ejecución vuelve a empezar desde el principio y solo toca
+las filas aún pendientes (omitidas por error o añadidas después).
+
+Uso: python backend/translate_existing_data.py [--reset] [--chunk-size N] [--batch-size N]
 """
+import argparse
 import os
 import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 # Agregar el directorio raíz al path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
+from sqlalchemy import func, or_
+
+from backend.database import (
+    SessionLocal, Publication, Comment, init_db,
+    get_checkpoint, save_checkpoint, clear_checkpoint, reset_checkpoints
+)
+from backend.report_cache import report_cache
+from backend.text_chunking import translate_in_chunks
+
+TRANSLATION_MODEL = "Helsinki-NLP/opus-mt-en-es"
+CHUNK_SIZE = 500      # filas por rango de ID (un commit + checkpoint por bloque)
+BATCH_SIZE = 16       # textos por llamada al traductor
+
+
+class BackfillTarget(NamedTuple):
+    """Columna a rellenar: `dst` se calcula a partir de `src` en las filas de `model`.
+
+    Con `only_pending=False` se recorren todas las filas con texto (p. ej. re-puntuar
+    tras cambiar de modelo); `src_fallback` se usa cuando `src` está vacío.
+    Con `retry_identity=True` (traducciones) también están pendientes las filas cuyo
+    destino es igual al origen; el resto solo rellena las filas con `dst` NULL.
+    `done_column` registra cuándo se procesó cada fila: las marcadas dejan de estar
+    pendientes aunque el resultado coincida con el origen.
+    """
+    job: str
+    model: type
+    src: str
+    dst: str
+    id_type: type
+    only_pending: bool = True
+    src_fallback: Optional[str] = None
+    retry_identity: bool = False
+    done_column: Optional[str] = None
+
+    def source(self):
+        src = getattr(self.model, self.src)
+        return func.coalesce(src, getattr(self.model, self.src_fallback)) if self.src_fallback else src
+
+
+TARGETS = (
+    BackfillTarget("translate:comments", Comment, "text_original", "text_translated", int,
+                   retry_identity=True, done_column="translated_at"),
+    BackfillTarget("translate:publications", Publication, "title_original", "title_translated", str,
+                   retry_identity=True, done_column="translated_at"),
+)
+
+
+def pending_filter(target: BackfillTarget):
+    """
+    Filas con texto de origen y sin valor en destino (o igual al original, con `retry_identity`).
+    Con `done_column`, solo las que aún no tienen marca: una traducción idéntica al
+    original no deja la fila pendiente para siempre.
+    """
+    src = target.source()
+    if not target.only_pending:
+        return src.isnot(None), src != ""
+    dst = getattr(target.model, target.dst)
+    pending = or_(dst.is_(None), dst == src) if target.retry_identity else dst.is_(None)
+    if target.done_column:
+        return src.isnot(None), src != "", pending, getattr(target.model, target.done_column).is_(None)
+    return src.isnot(None), src != "", pending
+
+
+def iter_id_ranges(session, target: BackfillTarget, after=None, chunk_size: int = CHUNK_SIZE, upper=None):
+    """Genera bloques [(id, texto)] pendientes en orden de ID, a partir de `after` (exclusivo) y hasta `upper` (inclusivo)."""
+    model_id = target.model.id
+    src = target.source()
+    last_id = after
+    while True:
+        query = session.query(model_id, src).filter(*pending_filter(target))
+        if last_id is not None:
+            query = query.filter(model_id > last_id)
+        if upper is not None:
+            query = query.filter(model_id <= upper)
+        chunk = query.order_by(model_id).limit(chunk_size).all()
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+def length_bucketed_batches(rows: List[Tuple], batch_size: int) -> List[List[Tuple]]:
+    """Agrupa las filas por longitud de texto para minimizar el padding dentro de cada lote."""
+    ordered = sorted(rows, key=lambda r: len(r[1]))
+    return [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+
+
+def translate_rows(translator, rows: List[Tuple], batch_size: int = BATCH_SIZE) -> Dict:
+    """
+    Traduce [(id, texto)] y retorna {id: traducción}. Los textos largos se trocean por
+    frases (`translate_in_chunks`) en lugar de cortarse. Si un lote falla, se reintenta fila a fila.
+    """
+    results = {}
+    for batch in length_bucketed_batches(rows, batch_size):
+        texts = [text for _, text in batch]
+        try:
+            outputs = translate_in_chunks(translator, texts, batch_size)
+            results.update((row_id, out) for (row_id, _), out in zip(batch, outputs))
+        except Exception as e:
+            print(f"✗ Error en lote ({e}), reintentando uno a uno...")
+            for row_id, text in batch:
+                try:
+                    results[row_id] = translate_in_chunks(translator, [text], batch_size)[0]
+                except Exception as row_error:
+                    print(f"✗ Fila {row_id} omitida: {row_error}")
+    return results
+
+
+def run_backfill(
+    target: BackfillTarget,
+    compute: Callable[[List[Tuple]], Dict],
+    chunk_size: int = CHUNK_SIZE,
+    job: Optional[str] = None,
+    after=None,
+    upper=None,
+    invalidate_reports: bool = True
+) -> int:
+    """
+    Recorre las filas pendientes de `target` por rangos de ID; `compute` recibe cada bloque
+    [(id, texto)] y retorna {id: valor} (o {id: {columna: valor}} para varias columnas).
+    Cada bloque se escribe con una actualización masiva y se confirma junto a su
+    checkpoint (`job`), así que relanzar tras una interrupción reanuda donde se quedó.
+    Si el recorrido termina, el checkpoint se borra. Retorna el número de filas actualizadas.
+    Con `target.done_column` cada fila escrita queda marcada como procesada; las omitidas
+    (ausentes de `compute`) siguen pendientes para la próxima ejecución.
+
+    Si se actualiza alguna fila se invalida `report_cache` (la versión de los datos solo
+    mira IDs y conteos); el relleno en paralelo lo hace una vez al final (`invalidate_reports`).
+    """
+    job = job or target.job
+    session = SessionLocal()
+    updated = 0
+    try:
+        checkpoint = get_checkpoint(session, job)
+        if checkpoint is not None and checkpoint.last_id is not None:
+            after = target.id_type(checkpoint.last_id)
+            print(f"↻ Reanudando {job} después del ID {after} ({checkpoint.processed} filas ya procesadas)")
+
+        for chunk in iter_id_ranges(session, target, after, chunk_size, upper):
+            values = compute(chunk)
+            done = {target.done_column: datetime.now()} if target.done_column else {}
+            session.bulk_update_mappings(target.model, [
+                {"id": row_id, **done, **(value if isinstance(value, dict) else {target.dst: value})}
+                for row_id, value in values.items()
+            ])
+            save_checkpoint(session, job, chunk[-1][0], len(chunk))
+            session.commit()
+            updated += len(values)
+            print(f"✓ {job}: {updated} filas (hasta ID {chunk[-1][0]})")
+
+        # Recorrido completo: sin checkpoint, la próxima ejecución revisa también las filas
+        # por debajo del último ID (omitidas por error, o publicaciones nuevas con ID menor)
+        clear_checkpoint(session, job)
+        session.commit()
+        return updated
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+        # También tras una interrupción: los bloques ya confirmados cambiaron los textos
+        if updated and invalidate_reports:
+            report_cache.invalidate()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Traduce los datos existentes (reanudable).")
+    parser.add_argument("--reset", action="store_true", help="Olvida los checkpoints y empieza desde el principio")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Filas por bloque confirmado")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Textos por lote del traductor")
+    args = parser.parse_args()
+
     print("🌐 Iniciando traducción...")
-    
-    # Importar después de agregar al path
-    from backend.database import SessionLocal, Publication, Comment
-    
+    init_db()  # crea la tabla de checkpoints si no existe
+
+    if args.reset:
+        session = SessionLocal()
+        try:
+            print(f"🗑️ {reset_checkpoints(session, 'translate:')} checkpoints borrados")
+        finally:
+            session.close()
+
     try:
         from transformers import pipeline
         print("✅ Transformers cargado")
@@ -22,93 +211,32 @@ def main():
         print("❌ Error: No se puede importar transformers")
         print("Ejecuta: pip install transformers")
         return
-    
+
     print("⏳ Cargando modelo de traducción...")
     try:
-        translator = pipeline("translation_en_to_es", model="Helsinki-NLP/opus-mt-en-es")
+        translator = pipeline("translation_en_to_es", model=TRANSLATION_MODEL)
         print("✅ Modelo cargado\n")
     except Exception as e:
         print(f"❌ Error cargando modelo: {e}")
         return
-    
-    session = SessionLocal()
-    
+
+    start = time.perf_counter()
     try:
-        # Traducir comentarios
-        print("� Buscando comentarios para traducir...")
-        comments = session.query(Comment).all()
-        
-        to_translate = []
-        for c in comments:
-            if not c.text_translated or c.text_translated == c.text_original:
-                if c.text_original:
-                    to_translate.append(c)
-        
-        print(f"Encontrados: {len(to_translate)} comentarios\n")
-        
-        if len(to_translate) == 0:
-            print("✅ No hay comentarios para traducir")
-        else:
-            count = 0
-            batch_size = 8
-            
-            for i in range(0, len(to_translate), batch_size):
-                batch = to_translate[i:i+batch_size]
-                texts = [c.text_original[:512] for c in batch]
-                
-                try:
-                    results = translator(texts, max_length=512, batch_size=len(texts), truncation=True)
-                    
-                    for comment, result in zip(batch, results):
-                        comment.text_translated = result['translation_text']
-                        count += 1
-                    
-                    session.commit()
-                    print(f"✓ {count}/{len(to_translate)}")
-                    
-                except Exception as e:
-                    print(f"✗ Error: {e}")
-                    session.rollback()
-            
-            print(f"\n🎉 {count} comentarios traducidos!")
-        
-        # Traducir publicaciones
-        print("\n� Buscando publicaciones para traducir...")
-        publications = session.query(Publication).all()
-        
-        pub_to_translate = []
-        for p in publications:
-            if not p.title_translated or p.title_translated == p.title_original:
-                if p.title_original:
-                    pub_to_translate.append(p)
-        
-        print(f"Encontradas: {len(pub_to_translate)} publicaciones")
-        
-        if len(pub_to_translate) == 0:
-            print("✅ No hay publicaciones para traducir")
-        else:
-            pub_count = 0
-            for pub in pub_to_translate:
-                try:
-                    result = translator(pub.title_original[:512], max_length=512)
-                    pub.title_translated = result[0]['translation_text']
-                    pub_count += 1
-                except:
-                    pass
-            
-            session.commit()
-            print(f"🎉 {pub_count} publicaciones traducidas!\n")
-        
-        print("=" * 50)
-        print("✅ TRADUCCIÓN COMPLETADA")
-        print("💡 Reinicia la app para ver los cambios")
-        print("=" * 50)
-        
+        for target in TARGETS:
+            print(f"\n🔎 Procesando {target.job}...")
+            count = run_backfill(target, lambda rows: translate_rows(translator, rows, args.batch_size), args.chunk_size)
+            print(f"🎉 {count} filas traducidas en {target.job}")
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrumpido: el progreso confirmado se conserva, relanza el script para continuar.")
+        return
     except Exception as e:
         print(f"❌ Error: {e}")
-        session.rollback()
-    finally:
-        session.close()
+        return
+
+    print("=" * 50)
+    print(f"✅ TRADUCCIÓN COMPLETADA en {time.perf_counter() - start:.1f} s")
+    print("💡 Reinicia la app para ver los cambios")
+    print("=" * 50)
 
 if __name__ == "__main__":
     main()
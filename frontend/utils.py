@@ -1,4 +1,16 @@
 import flet as ft
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.data_export import EXPORT_FORMATS
+from backend.database import get_publications_by_ids, get_comments_by_ids
+from backend.events import event_bus, DataChangeEvent, ScrapeBatchEvent
+from backend.report_generator import ReportCancelled
+from backend.report_jobs import ReportJob, RUNNING, report_runner
 
 def show_snackbar(page: ft.Page, message: str, is_error: bool = False):
     """
@@ -36,4 +48,311 @@ def show_snackbar(page: ft.Page, message: str, is_error: bool = False):
         duration=5000 if is_error else 3000
     )
     page.snack_bar.open = True
-    page.update()
\ No newline at end of file
+    page.update()
+
+# Frecuencia máxima de refresco de la UI durante procesos en segundo plano
+UI_UPDATE_HZ = 4.0
+
+
+class UIUpdateThrottle:
+    """
+    Agrupa actualizaciones de la UI hechas desde hilos en segundo plano y llama a
+    `page.update()` como máximo `max_hz` veces por segundo.
+
+    `schedule(fn, key)` encola una función que modifica controles; si se repite la
+    misma `key` solo se ejecuta la última. Las pendientes se aplican juntas en el
+    siguiente flush (inmediato si ya pasó el intervalo, o mediante un temporizador).
+    Llamar a `flush()` al terminar para aplicar lo que quede.
+    """
+
+    def __init__(self, page: ft.Page, max_hz: float = UI_UPDATE_HZ):
+        self.page = page
+        self.interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Any, Callable[[], None]] = {}
+        self._seq = itertools.count()
+        self._timer: Optional[threading.Timer] = None
+        self._last_flush = 0.0
+
+    def schedule(self, fn: Callable[[], None], key: Any = None) -> None:
+        with self._lock:
+            if key is None:
+                key = ("_", next(self._seq))
+            self._pending[key] = fn
+            wait = self.interval - (time.monotonic() - self._last_flush)
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                pending = list(self._pending.values())
+                self._pending.clear()
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._last_flush = time.monotonic()
+
+            if not pending:
+                return
+            for fn in pending:
+                try:
+                    fn()
+                except Exception as e:
+                    print(f"[UI] Error aplicando actualización: {e}")
+            try:
+                self.page.update()
+            except Exception:
+                pass
+
+
+class CoalescingProgressReporter:
+    """
+    `progress_callback` para scrapers que no serializa el hilo de trabajo detrás de la UI.
+
+    Cada mensaje se entrega a `on_message` (que solo debe modificar controles, sin llamar
+    a `page.update()`), y el refresco de la página se agrupa mediante un `UIUpdateThrottle`
+    para hacerse como máximo `max_hz` veces por segundo. `close()` fuerza el último refresco.
+    """
+
+    def __init__(self, page: ft.Page, on_message: Callable[[str], None], max_hz: float = UI_UPDATE_HZ, throttle: Optional[UIUpdateThrottle] = None):
+        self.on_message = on_message
+        self.throttle = throttle or UIUpdateThrottle(page, max_hz)
+        self.messages = 0
+
+    def __call__(self, msg: str) -> None:
+        self.messages += 1
+        self.on_message(msg)
+        # Todas las peticiones comparten clave: varios mensajes seguidos = un solo refresco
+        self.throttle.schedule(_noop, key=self)
+
+    def close(self) -> None:
+        self.throttle.flush()
+
+
+def _noop() -> None:
+    pass
+
+
+def patch_publication_cards(
+    changes: List[DataChangeEvent],
+    publications: List[Any],
+    comments_map: Dict[str, List[Any]],
+    cards_by_id: Dict[str, ft.Control],
+    column: ft.Column,
+    create_card: Callable[[Any, int], ft.Control],
+    render_all: Callable[[], None],
+    newest_first: bool = False
+) -> None:
+    """
+    Parchea solo las tarjetas afectadas por los cambios en lugar de recargar toda la red:
+    añade las publicaciones nuevas (al final, o al principio con `newest_first`) y
+    reemplaza las tarjetas cuyo contador de comentarios cambió. No llama a `page.update()`
+    salvo si la vista estaba vacía (entonces se redibuja entera con `render_all`).
+    """
+    pub_ids = [pid for ch in changes for pid in ch.publication_ids]
+    comment_ids = [cid for ch in changes for cid in ch.comment_ids]
+    if not pub_ids and not comment_ids:
+        return
+
+    was_empty = not publications
+    order = {pid: i for i, pid in enumerate(pub_ids)}
+    new_pubs = [p for p in get_publications_by_ids(pub_ids) if p.id not in comments_map]
+    new_pubs.sort(key=lambda p: order.get(p.id, 0))
+    for post in new_pubs:
+        comments_map[post.id] = []
+
+    touched = set()
+    for c in get_comments_by_ids(comment_ids):
+        if c.publication_id in comments_map:
+            comments_map[c.publication_id].append(c)
+            touched.add(c.publication_id)
+
+    if was_empty:
+        publications.extend(new_pubs)
+        render_all()
+        return
+
+    for post in (reversed(new_pubs) if newest_first else new_pubs):
+        card = create_card(post, len(comments_map[post.id]))
+        cards_by_id[post.id] = card
+        if newest_first:
+            publications.insert(0, post)
+            column.controls.insert(0, card)
+        else:
+            publications.append(post)
+            column.controls.append(card)
+
+    new_ids = {p.id for p in new_pubs}
+    pubs_by_id = {p.id: p for p in publications if p.id in touched}
+    for pid in touched - new_ids:
+        old_card = cards_by_id.get(pid)
+        if old_card is None or pid not in pubs_by_id:
+            continue
+        card = create_card(pubs_by_id[pid], len(comments_map[pid]))
+        cards_by_id[pid] = card
+        column.controls[column.controls.index(old_card)] = card
+
+
+class LiveScrapeFeed:
+    """
+    Streaming en vivo de un scraper en su dashboard: cada lote guardado (`DataChangeEvent`)
+    se entrega a `on_changes` y el avance (`ScrapeBatchEvent`) se escribe en `stats_text`,
+    todo agrupado en un `UIUpdateThrottle` (compártelo con `CoalescingProgressReporter`).
+    Llamar a `close()` al terminar para dejar de escuchar el bus.
+    """
+
+    def __init__(
+        self,
+        page: ft.Page,
+        red_social: str,
+        on_changes: Callable[[List[DataChangeEvent]], None],
+        stats_text: ft.Text,
+        noun: str = "publicaciones"
+    ):
+        self.red_social = red_social
+        self.on_changes = on_changes
+        self.stats_text = stats_text
+        self.noun = noun
+        self.throttle = UIUpdateThrottle(page)
+        self._pending: List[DataChangeEvent] = []
+        self._totals = {"pubs": 0, "comments": 0, "labels": Counter()}
+        self._unsubscribe = [
+            event_bus.subscribe(self._on_data_change, DataChangeEvent),
+            event_bus.subscribe(self._on_scrape_batch, ScrapeBatchEvent),
+        ]
+
+    def _drain_changes(self) -> None:
+        batch = self._pending[:]
+        del self._pending[:len(batch)]
+        self.on_changes(batch)
+
+    def _render_stats(self) -> None:
+        totals, labels = self._totals, self._totals["labels"]
+        self.stats_text.value = (
+            f"+{totals['pubs']} {self.noun} · +{totals['comments']} comentarios "
+            f"(👍 {labels['positive']}  👎 {labels['negative']}  ➖ {labels['neutral']})"
+        )
+
+    def _on_data_change(self, event: DataChangeEvent) -> None:
+        if event.red_social == self.red_social:
+            self._pending.append(event)
+            self.throttle.schedule(self._drain_changes, key="changes")
+
+    def _on_scrape_batch(self, event: ScrapeBatchEvent) -> None:
+        if event.red_social == self.red_social:
+            self._totals["pubs"] += event.publications_saved
+            self._totals["comments"] += event.comments_saved
+            self._totals["labels"].update(event.label_counts)
+            self.throttle.schedule(self._render_stats, key="live_stats")
+
+    def close(self) -> None:
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+
+
+class ReportJobPanel:
+    """
+    Panel compacto con el reporte PDF (o exportación) en curso, cuántos quedan en cola
+    y un botón para cancelarlo. Se generan en segundo plano con `report_runner`.
+    """
+
+    def __init__(self, page: ft.Page, color: str):
+        self.page = page
+        self.throttle = UIUpdateThrottle(page)
+        self.jobs: List[ReportJob] = []
+
+        self.text = ft.Text("", size=12, color="onSurface")
+        self.bar = ft.ProgressBar(value=0, color=color, bgcolor="surfaceVariant")
+        self.cancel_button = ft.IconButton(ft.Icons.CANCEL, icon_size=18, icon_color=ft.Colors.RED_300, tooltip="Cancelar", on_click=self._cancel_click)
+        self.control = ft.Container(
+            content=ft.Column([
+                ft.Row([ft.Icon(ft.Icons.PICTURE_AS_PDF, size=16, color=color), self.text, ft.Container(expand=True), self.cancel_button], spacing=8),
+                self.bar
+            ], spacing=5),
+            bgcolor="surfaceContainerHighest",
+            padding=10,
+            border_radius=10,
+            margin=ft.margin.only(bottom=10),
+            visible=False
+        )
+
+    def submit_network_report(self, social_network: str) -> ReportJob:
+        return self._track(report_runner.submit_network_report(social_network, **self._callbacks()), "Generando PDF en segundo plano...")
+
+    def submit_export(self, social_network: str, fmt: str) -> ReportJob:
+        return self._track(report_runner.submit_export(social_network, fmt, **self._callbacks()), f"Exportando {fmt.upper()} en segundo plano...")
+
+    def _callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_progress": lambda _: self.throttle.schedule(self._render, key="render"),
+            "on_done": self._on_done,
+            "on_error": self._on_error,
+        }
+
+    def _track(self, job: ReportJob, started_message: str) -> ReportJob:
+        self.jobs.append(job)
+        ahead = len(report_runner.active_jobs()) - 1
+        show_snackbar(self.page, started_message if ahead <= 0 else f"Trabajo en cola ({ahead} por delante)")
+        self.throttle.schedule(self._render, key="render")
+        return job
+
+    def _current_jobs(self) -> List[ReportJob]:
+        self.jobs = [j for j in self.jobs if not j.finished]
+        return self.jobs
+
+    def _render(self) -> None:
+        jobs = self._current_jobs()
+        self.control.visible = bool(jobs)
+        if not jobs:
+            return
+        current = jobs[0]
+        queued = f"  (+{len(jobs) - 1} en cola)" if len(jobs) > 1 else ""
+        self.text.value = f"{current.message}{queued}"
+        # Barra indeterminada mientras el trabajo espera su turno
+        self.bar.value = current.progress if current.status == RUNNING else None
+
+    def _cancel_click(self, e) -> None:
+        jobs = self._current_jobs()
+        if jobs:
+            jobs[0].cancel()
+            self.text.value = "Cancelando..."
+            self.throttle.schedule(self._render, key="render")
+
+    def _on_done(self, path: str) -> None:
+        self.throttle.schedule(self._render, key="render")
+        show_snackbar(self.page, f"Archivo guardado: {os.path.basename(path)}")
+        try:
+            os.startfile(os.path.dirname(path))
+        except:
+            pass
+
+    def _on_error(self, error: Exception) -> None:
+        self.throttle.schedule(self._render, key="render")
+        if isinstance(error, ReportCancelled):
+            show_snackbar(self.page, "Trabajo cancelado")
+        else:
+            show_snackbar(self.page, f"Error generando archivo: {error}", is_error=True)
+
+
+_EXPORT_LABELS = {"csv": "CSV", "jsonl": "JSONL", "parquet": "Parquet"}
+
+
+def export_buttons(report_panel: ReportJobPanel, social_network: str) -> ft.Row:
+    """Botones del drawer para exportar los datos de la red (junto al de PDF)."""
+    return ft.Row(
+        [
+            ft.OutlinedButton(_EXPORT_LABELS[fmt], tooltip=f"Exportar datos a {_EXPORT_LABELS[fmt]}",
+                              on_click=lambda _, fmt=fmt: report_panel.submit_export(social_network, fmt), expand=True)
+            for fmt in EXPORT_FORMATS
+        ],
+        spacing=5,
+        width=260
+    )
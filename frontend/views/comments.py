@@ -4,6 +4,8 @@ from flet import Colors, Icons
 from typing import Dict, List, Any
 import os
 from backend.report_generator import PDFReportGenerator
+from backend.report_cache import report_cache, publication_data_version
+from backend.near_duplicates import campaign_sizes
 from frontend.utils import show_snackbar
 
 # --- Configuración Visual ---
@@ -14,6 +16,15 @@ SOCIAL_CONFIG = {
     "Default":  {"icon": Icons.PUBLIC, "color": "#3399ff"}
 }
 
+# Filtro de idioma (Comment.language, detectado al scrapear)
+LANGUAGE_ALL = "all"
+LANGUAGE_OPTIONS = [
+    (LANGUAGE_ALL, "Todos los idiomas"),
+    ("es", "Español"),
+    ("en", "Inglés"),
+    ("und", "Sin determinar"),
+]
+
 def get_network_style(network_name: str):
     key = network_name if network_name in SOCIAL_CONFIG else "Default"
     return SOCIAL_CONFIG[key]
@@ -57,6 +68,19 @@ def get_sentiment_badge(sentiment_label: str) -> ft.Container:
         border=ft.border.all(1, color=ft.Colors.with_opacity(0.3, text_color))
     )
 
+def get_campaign_badge(size: int) -> ft.Container:
+    """Etiqueta para comentarios casi idénticos a otros (campañas, spam copiado)."""
+    return ft.Container(
+        content=ft.Row([
+            ft.Icon(Icons.CONTENT_COPY, size=12, color=ft.Colors.ORANGE),
+            ft.Text(f"Campaña ×{size}", size=11, weight=ft.FontWeight.BOLD, color=ft.Colors.ORANGE)
+        ], spacing=4, alignment=ft.MainAxisAlignment.CENTER),
+        bgcolor=ft.Colors.with_opacity(0.15, ft.Colors.ORANGE),
+        padding=ft.padding.symmetric(horizontal=8, vertical=4),
+        border_radius=12,
+        tooltip="Comentarios casi idénticos guardados en todas las publicaciones"
+    )
+
 def generate_avatar(author_name: str) -> ft.CircleAvatar:
     name = author_name if author_name else "?"
     initial = name[0].upper() if name else "?"
@@ -68,8 +92,12 @@ def generate_avatar(author_name: str) -> ft.CircleAvatar:
 
 def generate_single_pdf_report(page: ft.Page, publication: Publication, comments: List[Comment]):
     try:
-        generator = PDFReportGenerator()
-        file_path = generator.generate_single_publication_report(publication, comments)
+        # Si la publicación no tiene comentarios nuevos se reutiliza el último PDF
+        file_path = report_cache.get_or_build(
+            f"publicacion:{publication.id}",
+            publication_data_version(comments),
+            lambda: PDFReportGenerator().generate_single_publication_report(publication, comments)
+        )
         show_snackbar(page, f"✅ Reporte generado: {os.path.basename(file_path)}")
         try:
             os.startfile(os.path.dirname(file_path))
@@ -130,8 +158,8 @@ def create_main_post_card(pub: Publication, network_style: dict) -> ft.Container
         shadow=ft.BoxShadow(blur_radius=5, color="shadow", offset=ft.Offset(0, 2))
     )
 
-def create_comment_card(comment: Comment) -> ft.Container:
-    """Burbuja de comentario"""
+def create_comment_card(comment: Comment, campaign_size: int = 1) -> ft.Container:
+    """Burbuja de comentario (`campaign_size`: comentarios de su grupo de casi-duplicados)"""
     # Detectar si hay traducción
     has_translation = bool(comment.text_translated and comment.text_original and comment.text_translated != comment.text_original)
     
@@ -155,7 +183,10 @@ def create_comment_card(comment: Comment) -> ft.Container:
                     # Cabecera del comentario
                     ft.Row([
                         ft.Text(comment.author or "Anónimo", weight=ft.FontWeight.BOLD, color="onSurfaceVariant", size=14),
-                        get_sentiment_badge(comment.sentiment_label)
+                        ft.Row(
+                            ([get_campaign_badge(campaign_size)] if campaign_size > 1 else []) + [get_sentiment_badge(comment.sentiment_label)],
+                            spacing=6
+                        )
                     ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                     
                     ft.Divider(height=5, color=ft.Colors.TRANSPARENT),
@@ -191,12 +222,15 @@ def create_comments_view(page: ft.Page, pub_id: str) -> ft.View:
     session = SessionLocal()
     publicacion_actual: Publication = None
     comentarios_actuales: List[Comment] = []
+    tamanos_campana: Dict[int, int] = {}
     
     try:
         publicacion_actual = session.query(Publication).filter_by(id=pub_id).first()
         if publicacion_actual:
             # Ordenar comentarios por ID descendente (más recientes primero)
             comentarios_actuales = session.query(Comment).filter_by(publication_id=pub_id).order_by(Comment.id.desc()).all()
+            # Tamaño de cada grupo de casi-duplicados en toda la BD (una sola consulta agrupada)
+            tamanos_campana = campaign_sizes(session, (c.cluster_id for c in comentarios_actuales))
     except Exception as e:
         print(f"Error DB: {e}")
     finally:
@@ -214,12 +248,20 @@ def create_comments_view(page: ft.Page, pub_id: str) -> ft.View:
     if publicacion_actual:
         content_controls.append(create_main_post_card(publicacion_actual, network_style))
         
+        count_text = ft.Text(f"{len(comentarios_actuales)} Comentarios", color="outline", weight="bold")
+        language_filter = ft.Dropdown(
+            value=LANGUAGE_ALL,
+            options=[ft.dropdown.Option(key, label) for key, label in LANGUAGE_OPTIONS],
+            width=170,
+            dense=True,
+            tooltip="Filtrar por idioma detectado"
+        )
         content_controls.append(
             ft.Container(
                 content=ft.Row([
-                    ft.Icon(Icons.CHAT_BUBBLE, color="outline", size=16),
-                    ft.Text(f"{len(comentarios_actuales)} Comentarios", color="outline", weight="bold")
-                ]),
+                    ft.Row([ft.Icon(Icons.CHAT_BUBBLE, color="outline", size=16), count_text]),
+                    language_filter
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                 padding=ft.padding.symmetric(vertical=15)
             )
         )
@@ -236,8 +278,24 @@ def create_comments_view(page: ft.Page, pub_id: str) -> ft.View:
                 )
             )
         else:
-            for comment in comentarios_actuales:
-                content_controls.append(create_comment_card(comment))
+            comment_cards = [
+                (comment, create_comment_card(comment, tamanos_campana.get(comment.cluster_id, 1)))
+                for comment in comentarios_actuales
+            ]
+            for _, card in comment_cards:
+                content_controls.append(card)
+
+            def on_language_change(e):
+                # Los comentarios sin idioma (anteriores a la detección) cuentan como 'und'
+                selected = language_filter.value
+                visible = 0
+                for comment, card in comment_cards:
+                    card.visible = selected == LANGUAGE_ALL or (comment.language or "und") == selected
+                    visible += card.visible
+                count_text.value = f"{visible} Comentarios" if selected == LANGUAGE_ALL else f"{visible} de {len(comment_cards)} Comentarios"
+                page.update()
+
+            language_filter.on_change = on_language_change
     else:
         content_controls.append(
             ft.Container(
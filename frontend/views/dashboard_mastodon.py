@@ -8,10 +8,10 @@ from pathlib import Path
 
 # --- Imports de tu proyecto ---
 from backend.database import SessionLocal, Publication, Comment, delete_publication_by_id, delete_publications_by_network
+from backend.events import DataChangeEvent
 from backend.mastodon_scraper import run_mastodon_scrape_opt
 from frontend.theme import *
-from frontend.utils import show_snackbar
-from backend.report_generator import PDFReportGenerator
+from frontend.utils import show_snackbar, CoalescingProgressReporter, LiveScrapeFeed, patch_publication_cards, ReportJobPanel, export_buttons
 
 # --- BLOQUE DE SEGURIDAD DE COLORES ---
 try:
@@ -51,22 +51,12 @@ SHADOW_CARD = ft.BoxShadow(
     offset=ft.Offset(0, 2),
 )
 
-def generate_pdf_report(page: ft.Page, publications: List[Publication], comments_map: Dict[str, List[Comment]]):
+def generate_pdf_report(page: ft.Page, report_panel: ReportJobPanel, publications: List[Publication]):
     if not publications:
         show_snackbar(page, "No hay publicaciones para generar el reporte.", is_error=True)
         return
-    try:
-        show_snackbar(page, "Generando PDF...", is_error=False)
-        generator = PDFReportGenerator()
-        file_path = generator.generate_report("Mastodon", publications, comments_map)
-        show_snackbar(page, f"Reporte guardado: {os.path.basename(file_path)}")
-        try:
-            os.startfile(os.path.dirname(file_path))
-        except:
-            pass 
-    except Exception as e:
-        print(f"Error PDF: {e}")
-        show_snackbar(page, f"Error generando reporte: {str(e)}", is_error=True)
+    # Se encola en segundo plano (modo streaming desde la BD) para no bloquear la UI
+    report_panel.submit_network_report("Mastodon")
 
 def get_mastodon_data() -> Tuple[List[Publication], Dict[str, List[Comment]]]:
     session = SessionLocal()
@@ -111,6 +101,7 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
 
     # --- 3. Componente de Progreso Integrado ---
     progress_text = ft.Text("Iniciando...", size=12, color="primary", italic=True)
+    live_stats_text = ft.Text("", size=11, color="onSurfaceVariant")
     progress_bar = ft.ProgressBar(width=None, color=MASTODON_COLOR, bgcolor="surfaceVariant") 
     
     progress_container = ft.Container(
@@ -120,7 +111,8 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                 ft.Container(content=ft.ProgressRing(width=16, height=16, stroke_width=2), padding=5)
             ], alignment=ft.MainAxisAlignment.START),
             progress_bar,
-            progress_text
+            progress_text,
+            live_stats_text
         ], spacing=5),
         bgcolor="surfaceContainerHighest",
         padding=15,
@@ -130,7 +122,13 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
         animate_opacity=300, 
     )
 
+    # Reportes PDF en segundo plano (progreso + cancelación)
+    report_panel = ReportJobPanel(page, MASTODON_COLOR)
+
     # --- 4. Lógica de Negocio ---
+    # Tarjeta renderizada por ID de publicación (para refrescos incrementales)
+    cards_by_id: Dict[str, ft.Control] = {}
+
     def refresh_data_objects():
         new_pubs, new_comments = get_mastodon_data()
         publications.clear()       
@@ -140,6 +138,7 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
 
     def render_publications():
         publications_column.controls.clear()
+        cards_by_id.clear()
         if not publications:
             publications_column.controls.append(
                 ft.Container(
@@ -155,9 +154,18 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
             for post in publications:
                 count = len(comments_map.get(post.id, []))
                 card = create_post_card(post, count)
+                cards_by_id[post.id] = card
                 publications_column.controls.append(card)
         page.update()
 
+    def apply_data_changes(changes: List[DataChangeEvent]):
+        """Parchea solo las tarjetas afectadas por los cambios (ver `patch_publication_cards`)."""
+        patch_publication_cards(
+            changes, publications, comments_map, cards_by_id, publications_column,
+            create_post_card, render_publications,
+            newest_first=True  # Mastodon muestra primero lo más reciente
+        )
+
     def delete_publication_handler(e):
         post_id = e.control.data
         if delete_publication_by_id(post_id):
@@ -300,21 +308,25 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
         progress_bar.color = MASTODON_COLOR
         progress_text.color = "primary"
         progress_text.value = f"Analizando {len(target_ids_list)} IDs..."
+        live_stats_text.value = ""
         page.update()
         
         def _thread_target():
             status = {"has_error": False, "last_message": ""}
             
             def on_progress_update(msg):
+                # Solo modifica controles; el refresco lo agrupa CoalescingProgressReporter
                 print(f"[Mastodon] {msg}")
                 progress_text.value = msg
                 if "Error" in msg:
                     status["has_error"] = True
                     progress_bar.color = ft.Colors.RED
                     progress_text.color = ft.Colors.RED
-                try:
-                    page.update()
-                except: pass
+
+            # Streaming en vivo: cada lote guardado se refleja en la vista mientras el
+            # scraper sigue trabajando; UIUpdateThrottle limita la frecuencia de page.update()
+            feed = LiveScrapeFeed(page, 'Mastodon', apply_data_changes, live_stats_text, "toots")
+            progress = CoalescingProgressReporter(page, on_progress_update, throttle=feed.throttle)
 
             try:
                 translator = page.data.get("translator") if hasattr(page, 'data') and page.data else None
@@ -322,13 +334,11 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                 
                 # PASO CLAVE: Enviar lista directa
                 run_mastodon_scrape_opt(
-                    progress_callback=on_progress_update,
+                    progress_callback=progress,
                     translator=translator,
                     sentiment=sentiment, # Cambio: sentiment_analyzer -> sentiment
                     target_ids_list=target_ids_list 
                 )
-                refresh_data_objects() 
-                render_publications()
                 
             except Exception as ex:
                 print(ex)
@@ -336,6 +346,9 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                 status["last_message"] = str(ex)
             
             finally:
+                feed.close()
+                # Aplicar el último mensaje y los lotes que quedaran pendientes
+                progress.close()
                 if status["has_error"]:
                     time.sleep(4)
                 
@@ -376,7 +389,8 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                     ft.Divider(height=20),
                     ft.Text("Herramientas", weight="bold", size=12, color="onSurfaceVariant"),
                     ft.ElevatedButton("Ejecutar Scraper", icon=Icons.CLOUD_DOWNLOAD, on_click=run_scraper_click, bgcolor=MASTODON_COLOR, color="white", width=260),
-                    ft.ElevatedButton("Generar PDF", icon=Icons.PICTURE_AS_PDF, on_click=lambda _: generate_pdf_report(page, publications, comments_map), bgcolor=ft.Colors.ORANGE_700, color="white", width=260),
+                    ft.ElevatedButton("Generar PDF", icon=Icons.PICTURE_AS_PDF, on_click=lambda _: generate_pdf_report(page, report_panel, publications), bgcolor=ft.Colors.ORANGE_700, color="white", width=260),
+                    export_buttons(report_panel, "Mastodon"),
                     ft.Divider(),
                     ft.OutlinedButton("Borrar Todo", icon=Icons.DELETE_FOREVER, on_click=clear_all_click, style=ft.ButtonStyle(color=ERROR), width=260)
                 ], spacing=15, scroll=ft.ScrollMode.AUTO)
@@ -420,6 +434,7 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                                 controls=[
                                     ft.Text("Feed de Toots", size=24, weight=ft.FontWeight.BOLD, color=TEXT_MAIN),
                                     progress_container,
+                                    report_panel.control,
                                     ft.Container(content=publications_column, expand=True)
                                 ],
                                 spacing=10,
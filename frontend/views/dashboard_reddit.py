@@ -8,10 +8,10 @@ from pathlib import Path
 
 # --- Imports de tu proyecto ---
 from backend.database import SessionLocal, Publication, Comment, delete_publication_by_id, delete_publications_by_network
+from backend.events import DataChangeEvent
 from backend.reddit_scraper import run_reddit_scrape_opt
 from frontend.theme import *
-from frontend.utils import show_snackbar
-from backend.report_generator import PDFReportGenerator
+from frontend.utils import show_snackbar, CoalescingProgressReporter, LiveScrapeFeed, patch_publication_cards, ReportJobPanel, export_buttons
 
 # --- BLOQUE DE SEGURIDAD DE COLORES ---
 try:
@@ -51,22 +51,12 @@ SHADOW_CARD = ft.BoxShadow(
     offset=ft.Offset(0, 2),
 )
 
-def generate_pdf_report(page: ft.Page, publications: List[Publication], comments_map: Dict[str, List[Comment]]):
+def generate_pdf_report(page: ft.Page, report_panel: ReportJobPanel, publications: List[Publication]):
     if not publications:
         show_snackbar(page, "No hay publicaciones para generar el reporte.", is_error=True)
         return
-    try:
-        show_snackbar(page, "Generando PDF...", is_error=False)
-        generator = PDFReportGenerator()
-        file_path = generator.generate_report("Reddit", publications, comments_map)
-        show_snackbar(page, f"Reporte guardado: {os.path.basename(file_path)}")
-        try:
-            os.startfile(os.path.dirname(file_path))
-        except:
-            pass 
-    except Exception as e:
-        print(f"Error PDF: {e}")
-        show_snackbar(page, f"Error generando reporte: {str(e)}", is_error=True)
+    # Se encola en segundo plano (modo streaming desde la BD) para no bloquear la UI
+    report_panel.submit_network_report("Reddit")
 
 def get_reddit_data() -> Tuple[List[Publication], Dict[str, List[Comment]]]:
     session = SessionLocal()
@@ -132,6 +122,7 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
 
     # --- 3. Componente de Progreso (Integrado) ---
     progress_text = ft.Text("Iniciando...", size=12, color="primary", italic=True)
+    live_stats_text = ft.Text("", size=11, color="onSurfaceVariant")
     progress_bar = ft.ProgressBar(width=None, color=REDDIT_COLOR, bgcolor="surfaceVariant") 
     
     progress_container = ft.Container(
@@ -141,7 +132,8 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                 ft.Container(content=ft.ProgressRing(width=16, height=16, stroke_width=2), padding=5)
             ], alignment=ft.MainAxisAlignment.START),
             progress_bar,
-            progress_text
+            progress_text,
+            live_stats_text
         ], spacing=5),
         bgcolor="surfaceContainerHighest",
         padding=15,
@@ -151,7 +143,13 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
         animate_opacity=300, 
     )
 
+    # Reportes PDF en segundo plano (progreso + cancelación)
+    report_panel = ReportJobPanel(page, REDDIT_COLOR)
+
     # --- 4. Lógica de Negocio ---
+    # Tarjeta renderizada por ID de publicación (para refrescos incrementales)
+    cards_by_id: Dict[str, ft.Control] = {}
+
     def refresh_data_objects():
         new_pubs, new_comments = get_reddit_data()
         publications.clear()       
@@ -161,6 +159,7 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
 
     def render_publications():
         publications_column.controls.clear()
+        cards_by_id.clear()
         if not publications:
             publications_column.controls.append(
                 ft.Container(
@@ -176,9 +175,17 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
             for post in publications:
                 count = len(comments_map.get(post.id, []))
                 card = create_post_card(post, count)
+                cards_by_id[post.id] = card
                 publications_column.controls.append(card)
         page.update()
 
+    def apply_data_changes(changes: List[DataChangeEvent]):
+        """Parchea solo las tarjetas afectadas por los cambios (ver `patch_publication_cards`)."""
+        patch_publication_cards(
+            changes, publications, comments_map, cards_by_id, publications_column,
+            create_post_card, render_publications
+        )
+
     def delete_publication_handler(e):
         post_id = e.control.data
         if delete_publication_by_id(post_id):
@@ -336,6 +343,7 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
         progress_bar.color = REDDIT_COLOR
         progress_text.color = "primary"
         progress_text.value = f"Analizando r/{target_sub}..."
+        live_stats_text.value = ""
         page.update()
         
         nonlocal reddit_stop_event
@@ -353,23 +361,24 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
             status = {"has_error": False, "last_message": ""}
             
             def on_progress_update(msg):
+                # Solo modifica controles; el refresco lo agrupa CoalescingProgressReporter
                 print(f"[Reddit] {msg}")
                 progress_text.value = msg
                 if "Error" in msg:
                     status["has_error"] = True
                     progress_bar.color = ft.Colors.RED
                     progress_text.color = ft.Colors.RED
-                
-                try:
-                    page.update()
-                except:
-                    pass
+
+            # Streaming en vivo: cada lote guardado se refleja en la vista mientras el
+            # scraper sigue trabajando; UIUpdateThrottle limita la frecuencia de page.update()
+            feed = LiveScrapeFeed(page, 'Reddit', apply_data_changes, live_stats_text, "hilos")
+            progress = CoalescingProgressReporter(page, on_progress_update, throttle=feed.throttle)
 
             try:
                 translator = page.data.get("translator") if hasattr(page, 'data') and page.data else None
                 sentiment = page.data.get("sentiment") if hasattr(page, 'data') and page.data else None
                 run_reddit_scrape_opt(
-                    progress_callback=on_progress_update,
+                    progress_callback=progress,
                     translator=translator,
                     sentiment_analyzer=sentiment,
                     subreddit_name=target_sub,
@@ -377,8 +386,6 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                     comment_limit=int(comment_limit_slider.value),
                     stop_event=reddit_stop_event
                 )
-                refresh_data_objects() 
-                render_publications()
                 
             except Exception as ex:
                 print(ex)
@@ -386,6 +393,9 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                 status["last_message"] = str(ex)
             
             finally:
+                feed.close()
+                # Aplicar el último mensaje y los lotes que quedaran pendientes
+                progress.close()
                 # Restaurar estado de botones y UI usando idle callback
                 def restore_ui():
                     nonlocal start_button, stop_button
@@ -450,7 +460,8 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                     ft.Divider(height=20),
                     start_button,
                     stop_button,
-                    ft.ElevatedButton("Generar PDF", icon=Icons.PICTURE_AS_PDF, on_click=lambda _: generate_pdf_report(page, publications, comments_map), bgcolor=ft.Colors.ORANGE_700, color="white", width=260),
+                    ft.ElevatedButton("Generar PDF", icon=Icons.PICTURE_AS_PDF, on_click=lambda _: generate_pdf_report(page, report_panel, publications), bgcolor=ft.Colors.ORANGE_700, color="white", width=260),
+                    export_buttons(report_panel, "Reddit"),
                     ft.Divider(),
                     ft.OutlinedButton("Borrar Todo", icon=Icons.DELETE_FOREVER, on_click=clear_all_click, style=ft.ButtonStyle(color=ERROR), width=260)
                 ], spacing=15, scroll=ft.ScrollMode.AUTO)
@@ -494,6 +505,7 @@ def create_dashboard_view(page: ft.Page) -> ft.View:
                                 controls=[
                                     ft.Text("Hilos Populares", size=24, weight=ft.FontWeight.BOLD, color="onSurface"),
                                     progress_container,
+                                    report_panel.control,
                                     ft.Container(content=publications_column, expand=True)
                                 ],
                                 spacing=10,
@@ -1,7 +1,6 @@
 import flet as ft
 import os
 import threading
-from transformers import pipeline
 from typing import Optional, Callable
 
 # --- VISTAS ---
@@ -13,14 +12,15 @@ from frontend.views.dashboard_reddit import create_dashboard_view as create_redd
 from frontend.views.dashboard_mastodon import create_dashboard_view as create_mastodon_view
 from frontend.views.comments import create_comments_view
 from frontend.theme import get_theme
+from frontend.utils import show_snackbar
 
 # --- BASE DE DATOS ---
 from backend.database import init_db
+from backend.sentiment_classifier import is_multilingual
+from backend.inference_pool import load_analysis_models
 
 # --- SCRAPERS ---
-from backend.reddit_scraper import run_reddit_scrape_opt
-from backend.facebook_scraper import run_facebook_scrape_opt
-from backend.mastodon_scraper import run_mastodon_scrape_opt
+from backend.scrape_jobs import load_jobs, run_job
 
 # --- VARIABLES GLOBALES DE IA ---
 translator_model: Optional[Callable] = None
@@ -31,10 +31,9 @@ def load_models() -> None:
     global translator_model, sentiment_model
     print("⏳ Cargando modelos de IA (esto puede tardar un poco)...")
     try:
-        # Modelo de traducción (Inglés a Español)
-        translator_model = pipeline("translation", model="Helsinki-NLP/opus-mt-es-en")
-        # Modelo de sentimientos (Twitter-Roberta)
-        sentiment_model = pipeline("text-classification", model="cardiffnlp/twitter-roberta-base-sentiment-latest")
+        # Con INFERENCE_WORKERS, en procesos aparte; si no, aquí con los hilos de torch acotados.
+        # Sin traductor con SENTIMENT_MODE=multilingual
+        translator_model, sentiment_model = load_analysis_models()
         print("✅ Modelos de IA cargados y listos.")
     except Exception as e:
         print(f"❌ Error cargando modelos: {e}")
@@ -63,7 +62,7 @@ def main(page: ft.Page) -> None:
                 print(f"[Global Scraper] {msg}")
             
             # Verificación de modelos
-            if not translator_model or not sentiment_model:
+            if not sentiment_model or (not translator_model and not is_multilingual(sentiment_model)):
                 print("⚠️ Los modelos de IA aún se están cargando. Intenta en unos segundos.")
                 return
 
@@ -71,26 +70,19 @@ def main(page: ft.Page) -> None:
             
             print("🚀 --- INICIANDO ACTUALIZACIÓN MASIVA ---")
 
-            # 1. Reddit
+            # Trabajos de scrape_jobs.json (los mismos que ejecuta `python -m backend.cli`)
             try:
-                print("--- Ejecutando Reddit ---")
-                run_reddit_scrape_opt(progress, translator_to_use, sentiment_model, "Python", 5, 5)
-            except Exception as ex:
-                print(f"Error en Reddit: {ex}")
-
-            # 2. Facebook
-            try:
-                print("--- Ejecutando Facebook ---")
-                run_facebook_scrape_opt(progress, translator_to_use, sentiment_model)
-            except Exception as ex:
-                print(f"Error en Facebook: {ex}")
-
-            # 3. Mastodon
-            try:
-                print("--- Ejecutando Mastodon ---")
-                run_mastodon_scrape_opt(progress, translator_to_use, sentiment_model)
-            except Exception as ex:
-                print(f"Error en Mastodon: {ex}")
+                jobs = load_jobs()
+            except (OSError, ValueError) as ex:
+                print(f"❌ Configuración de trabajos inválida: {ex}")
+                show_snackbar(page, f"Configuración de trabajos inválida (scrape_jobs.json): {ex}", is_error=True)
+                return
+            for job in jobs:
+                try:
+                    print(f"--- Ejecutando {job.name} ---")
+                    run_job(job, translator_to_use, sentiment_model, progress)
+                except Exception as ex:
+                    print(f"Error en {job.name}: {ex}")
             
             # Notificación final en UI
             page.snack_bar = ft.SnackBar(
@@ -149,7 +141,6 @@ def main(page: ft.Page) -> None:
         page.go(top_view.route)
 import os
 import threading
-from transformers import pipeline
 from typing import Optional, Callable
 
 # --- VISTAS ---
@@ -161,14 +152,15 @@ from frontend.views.dashboard_reddit import create_dashboard_view as create_redd
 from frontend.views.dashboard_mastodon import create_dashboard_view as create_mastodon_view
 from frontend.views.comments import create_comments_view
 from frontend.theme import get_theme
+from frontend.utils import show_snackbar
 
 # --- BASE DE DATOS ---
 from backend.database import init_db
+from backend.sentiment_classifier import is_multilingual
+from backend.inference_pool import load_analysis_models
 
 # --- SCRAPERS ---
-from backend.reddit_scraper import run_reddit_scrape_opt
-from backend.facebook_scraper import run_facebook_scrape_opt
-from backend.mastodon_scraper import run_mastodon_scrape_opt
+from backend.scrape_jobs import load_jobs, run_job
 
 # --- VARIABLES GLOBALES DE IA ---
 translator_model: Optional[Callable] = None
@@ -179,10 +171,9 @@ def load_models() -> None:
     global translator_model, sentiment_model
     print("⏳ Cargando modelos de IA (esto puede tardar un poco)...")
     try:
-        # Modelo de traducción (Inglés a Español)
-        translator_model = pipeline("translation", model="Helsinki-NLP/opus-mt-es-en")
-        # Modelo de sentimientos (Twitter-Roberta)
-        sentiment_model = pipeline("text-classification", model="cardiffnlp/twitter-roberta-base-sentiment-latest")
+        # Con INFERENCE_WORKERS, en procesos aparte; si no, aquí con los hilos de torch acotados.
+        # Sin traductor con SENTIMENT_MODE=multilingual
+        translator_model, sentiment_model = load_analysis_models()
         print("✅ Modelos de IA cargados y listos.")
     except Exception as e:
         print(f"❌ Error cargando modelos: {e}")
@@ -211,7 +202,7 @@ def main(page: ft.Page) -> None:
                 print(f"[Global Scraper] {msg}")
             
             # Verificación de modelos
-            if not translator_model or not sentiment_model:
+            if not sentiment_model or (not translator_model and not is_multilingual(sentiment_model)):
                 print("⚠️ Los modelos de IA aún se están cargando. Intenta en unos segundos.")
                 return
 
@@ -219,26 +210,19 @@ def main(page: ft.Page) -> None:
             
             print("🚀 --- INICIANDO ACTUALIZACIÓN MASIVA ---")
 
-            # 1. Reddit
-            try:
-                print("--- Ejecutando Reddit ---")
-                run_reddit_scrape_opt(progress, translator_to_use, sentiment_model, "Python", 5, 5)
-            except Exception as ex:
-                print(f"Error en Reddit: {ex}")
-
-            # 2. Facebook
+            # Trabajos de scrape_jobs.json (los mismos que ejecuta `python -m backend.cli`)
             try:
-                print("--- Ejecutando Facebook ---")
-                run_facebook_scrape_opt(progress, translator_to_use, sentiment_model)
-            except Exception as ex:
-                print(f"Error en Facebook: {ex}")
-
-            # 3. Mastodon
-            try:
-                print("--- Ejecutando Mastodon ---")
-                run_mastodon_scrape_opt(progress, translator_to_use, sentiment_model)
-            except Exception as ex:
-                print(f"Error en Mastodon: {ex}")
+                jobs = load_jobs()
+            except (OSError, ValueError) as ex:
+                print(f"❌ Configuración de trabajos inválida: {ex}")
+                show_snackbar(page, f"Configuración de trabajos inválida (scrape_jobs.json): {ex}", is_error=True)
+                return
+            for job in jobs:
+                try:
+                    print(f"--- Ejecutando {job.name} ---")
+                    run_job(job, translator_to_use, sentiment_model, progress)
+                except Exception as ex:
+                    print(f"Error en {job.name}: {ex}")
             
             # Notificación final en UI
             page.snack_bar = ft.SnackBar(
@@ -344,7 +328,6 @@ def main(page: ft.Page) -> None:
         page.go(top_view.route)
 import os
 import threading
-from transformers import pipeline
 from typing import Optional, Callable
 
 # --- VISTAS ---
@@ -356,14 +339,15 @@ from frontend.views.dashboard_reddit import create_dashboard_view as create_redd
 from frontend.views.dashboard_mastodon import create_dashboard_view as create_mastodon_view
 from frontend.views.comments import create_comments_view
 from frontend.theme import get_theme
+from frontend.utils import show_snackbar
 
 # --- BASE DE DATOS ---
 from backend.database import init_db
+from backend.sentiment_classifier import is_multilingual
+from backend.inference_pool import load_analysis_models
 
 # --- SCRAPERS ---
-from backend.reddit_scraper import run_reddit_scrape_opt
-from backend.facebook_scraper import run_facebook_scrape_opt
-from backend.mastodon_scraper import run_mastodon_scrape_opt
+from backend.scrape_jobs import load_jobs, run_job
 
 # --- VARIABLES GLOBALES DE IA ---
 translator_model: Optional[Callable] = None
@@ -374,10 +358,9 @@ def load_models() -> None:
     global translator_model, sentiment_model
     print("⏳ Cargando modelos de IA (esto puede tardar un poco)...")
     try:
-        # Modelo de traducción (Inglés a Español)
-        translator_model = pipeline("translation", model="Helsinki-NLP/opus-mt-es-en")
-        # Modelo de sentimientos (Twitter-Roberta)
-        sentiment_model = pipeline("text-classification", model="cardiffnlp/twitter-roberta-base-sentiment-latest")
+        # Con INFERENCE_WORKERS, en procesos aparte; si no, aquí con los hilos de torch acotados.
+        # Sin traductor con SENTIMENT_MODE=multilingual
+        translator_model, sentiment_model = load_analysis_models()
         print("✅ Modelos de IA cargados y listos.")
     except Exception as e:
         print(f"❌ Error cargando modelos: {e}")
@@ -406,7 +389,7 @@ def main(page: ft.Page) -> None:
                 print(f"[Global Scraper] {msg}")
             
             # Verificación de modelos
-            if not translator_model or not sentiment_model:
+            if not sentiment_model or (not translator_model and not is_multilingual(sentiment_model)):
                 print("⚠️ Los modelos de IA aún se están cargando. Intenta en unos segundos.")
                 return
 
@@ -414,26 +397,19 @@ def main(page: ft.Page) -> None:
             
             print("🚀 --- INICIANDO ACTUALIZACIÓN MASIVA ---")
 
-            # 1. Reddit
-            try:
-                print("--- Ejecutando Reddit ---")
-                run_reddit_scrape_opt(progress, translator_to_use, sentiment_model, "Python", 5, 5)
-            except Exception as ex:
-                print(f"Error en Reddit: {ex}")
-
-            # 2. Facebook
+            # Trabajos de scrape_jobs.json (los mismos que ejecuta `python -m backend.cli`)
             try:
-                print("--- Ejecutando Facebook ---")
-                run_facebook_scrape_opt(progress, translator_to_use, sentiment_model)
-            except Exception as ex:
-                print(f"Error en Facebook: {ex}")
-
-            # 3. Mastodon
-            try:
-                print("--- Ejecutando Mastodon ---")
-                run_mastodon_scrape_opt(progress, translator_to_use, sentiment_model)
-            except Exception as ex:
-                print(f"Error en Mastodon: {ex}")
+                jobs = load_jobs()
+            except (OSError, ValueError) as ex:
+                print(f"❌ Configuración de trabajos inválida: {ex}")
+                show_snackbar(page, f"Configuración de trabajos inválida (scrape_jobs.json): {ex}", is_error=True)
+                return
+            for job in jobs:
+                try:
+                    print(f"--- Ejecutando {job.name} ---")
+                    run_job(job, translator_to_use, sentiment_model, progress)
+                except Exception as ex:
+                    print(f"Error en {job.name}: {ex}")
             
             # Notificación final en UI
             page.snack_bar = ft.SnackBar(
@@ -0,0 +1,77 @@
+"""
+Compara el reporte general de una red renderizado en un solo proceso
+(`generate_report_from_db`) contra el modo multiproceso (`generate_report_parallel`).
+
+Usa una BD SQLite temporal con comentarios sintéticos; no toca sentimetrika.db.
+Uso: python -m tests.benchmark_parallel_report [comentarios] [procesos]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, Publication, Comment
+from backend.report_generator import PDFReportGenerator
+from backend.report_parallel import generate_report_parallel
+
+NETWORK = "Reddit"
+COMMENTS_PER_PUBLICATION = 100
+LABELS = ("positive", "neutral", "negative")
+WORDS = "el la de que y en un una es muy buen mal post comentario análisis opinión excelente pésimo".split()
+
+
+def populate(session, total_comments):
+    rng = random.Random(42)
+    pubs = max(1, total_comments // COMMENTS_PER_PUBLICATION)
+    session.bulk_save_objects([
+        Publication(id=f"pub{i:06d}", red_social=NETWORK, title_original=f"Publicación {i}", title_translated=f"Publicación {i}")
+        for i in range(pubs)
+    ])
+    session.bulk_save_objects([
+        Comment(
+            publication_id=f"pub{i % pubs:06d}",
+            author=f"usuario{rng.randrange(1000)}",
+            text_translated=" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))),
+            sentiment_label=rng.choice(LABELS)
+        )
+        for i in range(total_comments)
+    ])
+    session.commit()
+    return pubs
+
+
+def page_count(path):
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+if __name__ == "__main__":
+    total_comments = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        os.chdir(tmp_dir)  # los PDFs se escriben en ./reports
+
+        with Session() as session:
+            pubs = populate(session, total_comments)
+        print(f"Reporte de {total_comments} comentarios en {pubs} publicaciones ({os.cpu_count()} núcleos)\n")
+
+        with Session() as session:
+            start = time.perf_counter()
+            path = PDFReportGenerator().generate_report_from_db(NETWORK, session=session)
+            single = time.perf_counter() - start
+        print(f"Un proceso:          {single:8.2f} s | {page_count(path)} páginas")
+
+        with Session() as session:
+            start = time.perf_counter()
+            path = generate_report_parallel(NETWORK, workers=workers, session=session, database_url=url)
+            parallel = time.perf_counter() - start
+        print(f"{workers} procesos (spawn): {parallel:8.2f} s | {page_count(path)} páginas | x{single / parallel:.2f}")
@@ -0,0 +1,71 @@
+"""
+Mide el tiempo de pared de un scrape simulado con y sin CoalescingProgressReporter.
+
+El "scrape" emite varios mensajes de progreso por lote y cada page.update() simula
+el viaje de ida y vuelta a la UI de Flet con una pausa fija.
+Uso: python -m tests.benchmark_progress_reporter
+"""
+import time
+
+from frontend.utils import CoalescingProgressReporter
+
+BATCHES = 100
+MESSAGES_PER_BATCH = 12
+WORK_PER_BATCH_S = 0.004     # trabajo del scraper (red/BD/IA) entre lotes
+UPDATE_LATENCY_S = 0.003     # coste de un page.update()
+
+
+class FakePage:
+    def __init__(self):
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+        time.sleep(UPDATE_LATENCY_S)
+
+
+def fake_scrape(progress_callback):
+    for b in range(BATCHES):
+        for m in range(MESSAGES_PER_BATCH):
+            progress_callback(f"Lote {b}: paso {m}")
+        time.sleep(WORK_PER_BATCH_S)
+    progress_callback("--- ✅ Pipeline finalizado ---")
+
+
+def run_direct():
+    page = FakePage()
+    state = {"text": ""}
+
+    def on_progress_update(msg):
+        state["text"] = msg
+        page.update()
+
+    start = time.perf_counter()
+    fake_scrape(on_progress_update)
+    return time.perf_counter() - start, page.updates, state["text"]
+
+
+def run_coalesced(max_hz):
+    page = FakePage()
+    state = {"text": ""}
+
+    def on_progress_update(msg):
+        state["text"] = msg
+
+    reporter = CoalescingProgressReporter(page, on_progress_update, max_hz=max_hz)
+    start = time.perf_counter()
+    fake_scrape(reporter)
+    reporter.close()
+    return time.perf_counter() - start, page.updates, state["text"]
+
+
+if __name__ == "__main__":
+    total_msgs = BATCHES * MESSAGES_PER_BATCH + 1
+    print(f"Scrape simulado: {BATCHES} lotes, {total_msgs} mensajes, page.update()={UPDATE_LATENCY_S * 1000:.0f} ms\n")
+
+    elapsed, updates, last = run_direct()
+    print(f"Directo (update por mensaje): {elapsed:.3f} s | {updates} page.update() | último: {last!r}")
+
+    for hz in (4, 10, 30):
+        elapsed, updates, last = run_coalesced(hz)
+        print(f"Coalescido a {hz:>2} Hz:          {elapsed:.3f} s | {updates} page.update() | último: {last!r}")
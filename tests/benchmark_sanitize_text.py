@@ -0,0 +1,89 @@
+"""
+Micro-benchmark de `PDFReportGenerator._sanitize_text` sobre 100k comentarios sintéticos.
+
+Compara la versión anterior (~20 `str.replace` + encode) con la actual (atajo ASCII +
+plegado NFKD), y con una tabla precompilada de `str.translate` como referencia.
+Muestra además la diferencia de salida en acentos no españoles.
+Uso: python -m tests.benchmark_sanitize_text [comentarios]
+"""
+import random
+import sys
+import time
+import unicodedata
+
+from backend.report_generator import PDFReportGenerator
+
+WORDS = (
+    "el la de que y en un una es muy buen mal post comentario análisis opinión "
+    "excelente pésimo niño Ñandú pingüino “genial” ‘ok’ – — … français garçon "
+    "à bientôt crème brûlée 😀 👍 great awesome terrible ﬁne"
+).split()
+
+
+def legacy_sanitize(text: str) -> str:
+    """Versión previa, copiada como referencia."""
+    if not text:
+        return ""
+    replacements = {
+        '‘': "'", '’': "'",
+        '“': '"', '”': '"',
+        '–': '-', '—': '-', '…': '...',
+        'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
+        'Á': 'A', 'É': 'E', 'Í': 'I', 'Ó': 'O', 'Ú': 'U',
+        'ñ': 'n', 'Ñ': 'N',
+        'ü': 'u', 'Ü': 'U',
+    }
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+
+# Tabla de str.translate con el plegado NFKD precalculado para todo el BMP
+TRANSLATE_TABLE = {}
+for _code in range(0x80, 0x10000):
+    _folded = unicodedata.normalize('NFKD', chr(_code)).encode('ascii', 'ignore').decode('ascii')
+    if _folded:
+        TRANSLATE_TABLE[_code] = _folded
+TRANSLATE_TABLE.update({0x2018: "'", 0x2019: "'", 0x201c: '"', 0x201d: '"', 0x2013: '-', 0x2014: '-'})
+
+
+def translate_sanitize(text: str) -> str:
+    if not text or text.isascii():
+        return text or ""
+    return text.translate(TRANSLATE_TABLE).encode('ascii', 'ignore').decode('ascii')
+
+
+def make_comments(n):
+    rng = random.Random(7)
+    comments = []
+    for _ in range(n):
+        if rng.random() < 0.3:  # parte de los comentarios ya es ASCII puro
+            comments.append(" ".join(rng.choice(("good", "bad", "post", "nice", "meh")) for _ in range(rng.randint(3, 30))))
+        else:
+            comments.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))))
+    return comments
+
+
+def bench(fn, comments):
+    start = time.perf_counter()
+    for text in comments:
+        fn(text)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    comments = make_comments(n)
+    sanitize = PDFReportGenerator()._sanitize_text
+
+    legacy = bench(legacy_sanitize, comments)
+    translated = bench(translate_sanitize, comments)
+    current = bench(sanitize, comments)
+    print(f"{n} comentarios")
+    print(f"str.replace x20 + encode:    {legacy:.3f} s")
+    print(f"str.translate precompilado:  {translated:.3f} s | x{legacy / translated:.2f}")
+    print(f"_sanitize_text (NFKD):       {current:.3f} s | x{legacy / current:.2f}")
+
+    sample = "Garçon, à bientôt! Crème brûlée “genial” ﬁn"
+    print(f"\nAntes:   {legacy_sanitize(sample)!r}")
+    print(f"Después: {sanitize(sample)!r}")
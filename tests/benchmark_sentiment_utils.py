@@ -0,0 +1,71 @@
+"""
+Micro-benchmark del post-procesado de sentimiento sobre 1M de resultados sintéticos.
+
+Compara las funciones por elemento (`analizar_sentimiento_con_umbral`,
+`etiquetar_resultado`) con la API por lotes (`etiquetar_lote`) para la salida
+top-1 del pipeline, la salida con `top_k=None` y logits crudos en un array NumPy.
+Uso: python -m tests.benchmark_sentiment_utils [resultados]
+"""
+import gc
+import random
+import sys
+import time
+
+import numpy as np
+
+from backend.sentiment_utils import (
+    analizar_sentimiento_con_umbral, etiquetar_resultado, etiquetar_lote, etiquetar_resultados
+)
+
+UMBRAL = 0.35
+LABELS = ("LABEL_0", "LABEL_1", "LABEL_2")
+
+
+def make_results(n):
+    rng = random.Random(3)
+    top1, full = [], []
+    for _ in range(n):
+        probs = [rng.random() for _ in LABELS]
+        total = sum(probs)
+        probs = [p / total for p in probs]
+        best = max(range(3), key=probs.__getitem__)
+        top1.append({"label": LABELS[best], "score": probs[best]})
+        full.append([{"label": label, "score": p} for label, p in zip(LABELS, probs)])
+    return top1, full
+
+
+def timed(fn):
+    # Como timeit: sin el recolector de basura, que con 1M de objetos vivos domina la medida
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    top1, full = make_results(n)
+    logits = np.random.default_rng(3).normal(size=(n, 3))
+    print(f"{n} resultados, umbral {UMBRAL}\n")
+
+    print("Salida top-1 ({label, score} por texto):")
+    per_item = timed(lambda: [analizar_sentimiento_con_umbral(r["label"], r["score"], UMBRAL) for r in top1])
+    batch = timed(lambda: etiquetar_lote(top1, UMBRAL))
+    print(f"  analizar_sentimiento_con_umbral x{n}: {per_item:.3f} s")
+    print(f"  etiquetar_lote:                      {batch:.3f} s | x{per_item / batch:.1f}")
+
+    print("\nSalida top_k=None (tres clases por texto):")
+    per_item = timed(lambda: [etiquetar_resultado(r, UMBRAL) for r in full])
+    batch = timed(lambda: etiquetar_lote(full, UMBRAL))
+    rows = timed(lambda: etiquetar_resultados(full, UMBRAL))
+    print(f"  etiquetar_resultado x{n}: {per_item:.3f} s")
+    print(f"  etiquetar_lote (arrays):  {batch:.3f} s | x{per_item / batch:.1f}")
+    print(f"  etiquetar_resultados:     {rows:.3f} s | x{per_item / rows:.1f}  (tuplas listas para los scrapers)")
+
+    print("\nLogits crudos (array NumPy N x 3):")
+    batch = timed(lambda: etiquetar_lote(logits, UMBRAL))
+    print(f"  etiquetar_lote (softmax incluido): {batch:.3f} s")
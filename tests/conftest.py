@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import backfill, translate_existing_data
+from backend.database import Base
+from backend.report_cache import ReportCache
+
+
+@pytest.fixture
+def session_factory():
+    """Sesiones sobre una BD SQLite en memoria (nunca toca sentimetrika.db)."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def report_cache(monkeypatch, tmp_path):
+    """Índice de reportes temporal: los rellenos lo invalidan y no deben tocar reports/."""
+    cache = ReportCache(str(tmp_path / "report_cache.json"))
+    monkeypatch.setattr(translate_existing_data, "report_cache", cache)
+    monkeypatch.setattr(backfill, "report_cache", cache)
+    return cache
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from backend import backfill, translate_existing_data
+from backend.database import BackfillCheckpoint, Comment, Publication, save_checkpoint
+
+
+class FakeClassifier:
+    """Logits (N, 3) fijos: todo positivo o todo negativo según `winner`."""
+
+    def __init__(self, winner: int):
+        self.winner = winner
+        self.calls = 0
+
+    def __call__(self, texts, **kwargs):
+        self.calls += len(texts)
+        logits = np.zeros((len(texts), 3), dtype=np.float32)
+        logits[:, self.winner] = 5.0
+        return logits
+
+
+@pytest.fixture
+def Session(session_factory, monkeypatch):
+    monkeypatch.setattr(translate_existing_data, "SessionLocal", session_factory)
+    session = session_factory()
+    session.add(Publication(id="p1", red_social="Reddit", title_original="Hola"))
+    session.add_all(Comment(publication_id="p1", text_original=f"texto {i}", text_translated=f"text {i}") for i in range(1, 8))
+    session.commit()
+    session.close()
+    return session_factory
+
+
+def run_sentiment_range(monkeypatch, model, model_name):
+    monkeypatch.setattr(backfill, "_worker_model", model)
+    monkeypatch.setattr(backfill, "_worker_options", {"batch_size": 4, "umbral": 0.0, "model_name": model_name})
+    return backfill._run_range("sentiment", 1, 10, chunk_size=3)[2]
+
+
+def labels(Session):
+    session = Session()
+    try:
+        return {label for (label,) in session.query(Comment.sentiment_label)}
+    finally:
+        session.close()
+
+
+def test_rescoring_after_a_finished_run_scores_every_row_again(Session, monkeypatch):
+    assert run_sentiment_range(monkeypatch, FakeClassifier(2), "modelo-a") == 7
+    assert labels(Session) == {"positive"}
+    session = Session()
+    assert session.query(BackfillCheckpoint).count() == 0
+    session.close()
+
+    # Otro modelo: no se reanuda nada, se re-puntúan todas las filas
+    assert run_sentiment_range(monkeypatch, FakeClassifier(0), "modelo-b") == 7
+    assert labels(Session) == {"negative"}
+
+
+def test_interrupted_range_of_another_model_is_not_resumed(Session, monkeypatch):
+    target = backfill.TASKS["sentiment"]
+    session = Session()
+    save_checkpoint(session, backfill.range_job(target, "modelo-a", 1), 5, 5)
+    session.commit()
+    session.close()
+
+    model = FakeClassifier(2)
+    assert run_sentiment_range(monkeypatch, model, "modelo-b") == 7
+    assert model.calls == 7
+
+
+def test_language_backfill_only_fills_rows_without_language(Session):
+    session = Session()
+    # Texto igual al idioma detectado: no debe confundirse con una traducción pendiente
+    session.add(Comment(publication_id="p1", text_original="es", language="es"))
+    session.query(Comment).filter(Comment.id <= 3).update({Comment.language: "en"})
+    session.commit()
+    session.close()
+
+    seen = []
+    target = backfill.LOCAL_TASKS["language"]
+    translate_existing_data.run_backfill(target, lambda rows: seen.extend(r[0] for r in rows) or {i: "es" for i, _ in rows})
+    assert seen == [4, 5, 6, 7]
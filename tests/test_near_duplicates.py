@@ -0,0 +1,81 @@
+import numpy as np
+
+from backend.database import Comment, CommentCluster, CommentClusterBand, Publication
+from backend.facebook_scraper import FacebookScraper
+from backend.near_duplicates import BANDS, assign_clusters, normalize_text
+
+CAMPAÑA = "Vota por el candidato del cambio, el único que defiende de verdad a nuestra comunidad: {}"
+VARIANTES = [CAMPAÑA.format(url) for url in ("https://a.example/1", "https://b.example/22", "www.c.example/333")]
+OTRO = "La conexión a internet ha estado lentísima toda la semana en mi barrio, nadie responde."
+
+
+def test_normalize_text_drops_accents_urls_mentions_and_digits():
+    assert normalize_text("¡Únete YA! https://x.co/abc @amigo #tag 2024") == "unete ya url 0"
+
+
+def test_near_duplicates_share_a_cluster_and_one_representative(session_factory):
+    session = session_factory()
+    texts = [VARIANTES[0], OTRO, VARIANTES[1], "+1", VARIANTES[2]]
+    clusters = assign_clusters(session, texts)
+
+    campaign = clusters.cluster_ids[0]
+    assert campaign is not None
+    assert clusters.cluster_ids[2] == clusters.cluster_ids[4] == campaign
+    assert clusters.cluster_ids[1] not in (None, campaign)  # único, pero con grupo propio
+    assert clusters.cluster_ids[3] is None  # demasiado corto: de eso se encarga la deduplicación exacta
+    assert clusters.representatives == [0, 1, 3]
+    assert clusters.source == [0, 1, 0, 3, 0]
+    assert clusters.collapsed == 2
+    assert clusters.fan_out(["r0", "r1", "r3"], lambda c: "guardado") == ["r0", "r1", "r0", "r3", "r0"]
+    # Coste documentado: una fila de grupo y como mucho BANDS bandas por texto sin parecido previo
+    assert session.query(CommentCluster).count() == 2
+    assert session.query(CommentClusterBand).count() <= 2 * BANDS
+    session.close()
+
+
+def test_clusters_already_analyzed_reuse_the_stored_comment(session_factory):
+    session = session_factory()
+    first = assign_clusters(session, [VARIANTES[0]])
+    session.add(Publication(id="p1", red_social="Facebook"))
+    session.add(Comment(publication_id="p1", text_original=VARIANTES[0], cluster_id=first.cluster_ids[0],
+                        prob_negative=0.1, prob_neutral=0.2, prob_positive=0.7))
+    session.commit()
+
+    second = assign_clusters(session, [VARIANTES[1], OTRO])
+    assert second.cluster_ids[0] == first.cluster_ids[0]
+    assert second.representatives == [1]
+    assert second.source == [-1, 1]
+    assert second.fan_out(["nuevo"], lambda c: c.prob_positive) == [0.7, "nuevo"]
+    session.close()
+
+
+def test_facebook_scraper_keeps_each_comment_translation(session_factory):
+    class Graph:
+        def get_connections(self, id, connection_name, **kwargs):
+            return {"data": [{"message": text, "from": {"name": f"u{i}"}} for i, text in enumerate(VARIANTES + [OTRO])]}
+
+    classified = []
+
+    def translator(texts, **kwargs):
+        return [{"translation_text": f"EN {t}"} for t in texts]
+
+    def sentiment(texts, **kwargs):
+        classified.extend(texts)
+        logits = np.zeros((len(texts), 3), dtype=np.float32)
+        logits[:, 2] = 5.0
+        return logits
+
+    scraper = FacebookScraper(lambda msg: None)
+    scraper.graph = Graph()
+    session = session_factory()
+    session.add(Publication(id="p1", red_social="Facebook"))
+    session.flush()
+    assert scraper._process_and_save_comments(session, ["p1"], translator, sentiment) == 4
+    session.commit()
+
+    saved = session.query(Comment).order_by(Comment.id).all()
+    assert [c.text_translated for c in saved] == [f"EN {t}" for t in VARIANTES + [OTRO]]
+    assert len({c.cluster_id for c in saved[:3]}) == 1
+    assert {c.sentiment_label for c in saved} == {"positive"}
+    assert len(classified) == 2  # un representante de la campaña y el comentario distinto
+    session.close()
@@ -45,5 +45,14 @@ def test_pdf_generation():
     except Exception as e:
         print(f"❌ Error generating PDF: {e}")
 
+def test_sanitize_text_transliterates():
+    sanitize = PDFReportGenerator()._sanitize_text
+    assert sanitize("Título con ñáéíóúü") == "Titulo con naeiouu"
+    assert sanitize("caracteres especiales çàè") == "caracteres especiales cae"
+    assert sanitize("“Genial” – ‘sí’ …") == '"Genial" - \'si\' ...'
+    assert sanitize("ok 😀") == "ok "
+    assert sanitize("") == ""
+    assert sanitize(None) == ""
+
 if __name__ == "__main__":
     test_pdf_generation()
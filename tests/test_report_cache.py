@@ -0,0 +1,72 @@
+import pytest
+
+from backend import translate_existing_data
+from backend.database import Comment, Publication
+from backend.report_cache import network_data_version
+from backend.translate_existing_data import TARGETS, run_backfill
+
+
+@pytest.fixture
+def cache(session_factory, monkeypatch, report_cache):
+    monkeypatch.setattr(translate_existing_data, "SessionLocal", session_factory)
+    session = session_factory()
+    session.add(Publication(id="p1", red_social="Reddit", title_original="Hola"))
+    session.add_all(Comment(publication_id="p1", text_original=f"texto {i}") for i in range(3))
+    session.commit()
+    session.close()
+    return report_cache
+
+
+def cached_report(cache, session_factory, tmp_path, builds):
+    session = session_factory()
+    try:
+        version = network_data_version(session, "Reddit")
+    finally:
+        session.close()
+
+    def build():
+        builds.append(version)
+        path = tmp_path / f"reporte_{len(builds)}.pdf"
+        path.write_bytes(b"%PDF")
+        return str(path)
+
+    return cache.get_or_build("red:Reddit", version, build)
+
+
+def test_cached_report_is_rebuilt_after_a_translation_backfill(cache, session_factory, tmp_path):
+    builds = []
+    first = cached_report(cache, session_factory, tmp_path, builds)
+    assert cached_report(cache, session_factory, tmp_path, builds) == first
+
+    # La traducción no cambia IDs ni conteos, pero el reporte debe regenerarse
+    run_backfill(TARGETS[0], lambda rows: {row_id: text.upper() for row_id, text in rows})
+    assert cached_report(cache, session_factory, tmp_path, builds) != first
+    assert len(builds) == 2
+    assert builds[0] == builds[1]
+
+
+def test_backfill_without_changes_keeps_the_cached_report(cache, session_factory, tmp_path):
+    builds = []
+    first = cached_report(cache, session_factory, tmp_path, builds)
+    run_backfill(TARGETS[0], lambda rows: {})
+    assert cached_report(cache, session_factory, tmp_path, builds) == first
+    assert len(builds) == 1
+
+
+def test_cached_report_is_rebuilt_when_a_publication_is_replaced(cache, session_factory, tmp_path):
+    builds = []
+    first = cached_report(cache, session_factory, tmp_path, builds)
+
+    # Mismo nº de publicaciones y comentarios: solo cambia qué publicación existe
+    session = session_factory()
+    session.add(Publication(id="p0", red_social="Reddit", title_original="Vacía"))
+    session.commit()
+    cached_report(cache, session_factory, tmp_path, builds)
+    session.delete(session.get(Publication, "p0"))
+    session.add(Publication(id="p2", red_social="Reddit", title_original="Nueva"))
+    session.commit()
+    session.close()
+
+    assert cached_report(cache, session_factory, tmp_path, builds) != first
+    assert len(builds) == 3
+    assert builds[1][:3] == builds[2][:3]
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from backend.scrape_jobs import DEFAULT_JOBS, ScrapeJob, load_jobs, parse_job
+
+
+def write_config(tmp_path, jobs):
+    path = tmp_path / "scrape_jobs.json"
+    path.write_text(json.dumps({"jobs": jobs}), encoding="utf-8")
+    return str(path)
+
+
+def test_load_jobs_parses_every_network(tmp_path):
+    path = write_config(tmp_path, [
+        {"network": "Reddit", "subreddit": "chile", "posts": 3},
+        {"network": "facebook", "page_id": "123", "token_env": "FB_TOKEN", "every_minutes": 120},
+        {"network": "mastodon", "ids": [111, "222"]},
+    ])
+    assert load_jobs(path) == [
+        ScrapeJob("reddit", subreddit="chile", posts=3),
+        ScrapeJob("facebook", 120, page_id="123", token_env="FB_TOKEN"),
+        ScrapeJob("mastodon", ids=("111", "222")),
+    ]
+
+
+def test_missing_config_falls_back_to_default_jobs(tmp_path):
+    assert load_jobs(str(tmp_path / "no_existe.json")) == DEFAULT_JOBS
+    assert all(job.network != "mastodon" for job in DEFAULT_JOBS)
+
+
+@pytest.mark.parametrize("entry", [
+    {"network": "twitter"},
+    {"network": "reddit"},
+    {"network": "facebook", "page_id": "123"},
+    {"network": "mastodon"},
+    {"network": "mastodon", "ids": 5},
+    {"network": "reddit", "subreddit": "chile", "every_minutes": 0},
+    {"network": "reddit", "subreddit": "chile", "intervalo": 5},
+    ["reddit"],
+])
+def test_invalid_jobs_raise_value_error(entry):
+    with pytest.raises(ValueError):
+        parse_job(entry)
+
+
+def test_malformed_config_file_raises_value_error(tmp_path):
+    path = tmp_path / "scrape_jobs.json"
+    path.write_text("{\"jobs\": [", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_jobs(str(path))
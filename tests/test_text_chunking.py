@@ -0,0 +1,60 @@
+import numpy as np
+
+from backend.text_chunking import (
+    chunk_texts, pack_sentences, pool_probabilities, split_sentences, translate_in_chunks
+)
+
+
+def char_count(items):
+    return [len(t) for t in items]
+
+
+def test_split_sentences_on_punctuation_and_newlines():
+    text = "Hola mundo. ¿Qué tal?  Muy bien!\nOtra línea… y fin"
+    assert split_sentences(text) == ["Hola mundo.", "¿Qué tal?", "Muy bien!", "Otra línea…", "y fin"]
+    assert split_sentences("   ") == []
+
+
+def test_pack_sentences_respects_budget_and_splits_long_sentences():
+    sentences = ["a" * 4, "b" * 4, "c" * 4, " ".join(["palabra"] * 6)]
+    chunks = pack_sentences(sentences, char_count(sentences), budget=10)
+    assert [text for text, _ in chunks[:2]] == ["aaaa bbbb", "cccc"]
+    # La frase de 47 caracteres se reparte por palabras, sin perder ninguna
+    word_chunks = chunks[2:]
+    assert len(word_chunks) > 1
+    assert " ".join(text for text, _ in word_chunks) == sentences[3]
+
+
+def test_chunk_texts_keeps_short_texts_whole_and_splits_long_ones():
+    long_text = " ".join(f"Frase número {i}." for i in range(30))
+    texts = ["corto", long_text, "otro corto"]
+    chunks, owners, weights = chunk_texts(texts, char_count, budget=60)
+
+    assert chunks[:2] == ["corto", "otro corto"]
+    assert owners.tolist()[:2] == [0, 2]
+    long_chunks = [c for c, o in zip(chunks, owners) if o == 1]
+    assert len(long_chunks) > 1
+    assert all(len(c) <= 60 for c in long_chunks)
+    assert " ".join(long_chunks) == long_text
+    assert weights.tolist() == [max(1, len(c)) for c in chunks]
+
+
+def test_pool_probabilities_is_a_length_weighted_mean():
+    probs = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 1.0, 0.0]])
+    owners = np.array([0, 0, 1])
+    weights = np.array([3.0, 1.0, 5.0])
+    pooled = pool_probabilities(probs, owners, weights, 2)
+    np.testing.assert_allclose(pooled, [[0.75, 0.0, 0.25], [0.0, 1.0, 0.0]])
+
+
+def test_translate_in_chunks_merges_chunks_back_in_order():
+    calls = []
+
+    def translator(chunks, **kwargs):
+        calls.append(list(chunks))
+        return [{"translation_text": c.upper()} for c in chunks]
+
+    long_text = " ".join(f"Frase {i}." for i in range(20))
+    texts = [long_text, "hola", ""]
+    assert translate_in_chunks(translator, texts, max_chars=30) == [long_text.upper(), "HOLA", ""]
+    assert len(calls) == 1  # todos los trozos van en un solo lote
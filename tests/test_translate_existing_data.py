@@ -0,0 +1,99 @@
+import pytest
+
+from backend import translate_existing_data
+from backend.database import BackfillCheckpoint, Comment, Publication, get_checkpoint
+from backend.translate_existing_data import BackfillTarget, TARGETS, run_backfill, translate_rows
+
+COMMENTS, PUBLICATIONS = TARGETS
+
+
+@pytest.fixture
+def Session(session_factory, monkeypatch):
+    monkeypatch.setattr(translate_existing_data, "SessionLocal", session_factory)
+    session = session_factory()
+    session.add(Publication(id="p1", red_social="Reddit", title_original="Hola"))
+    session.add_all(Comment(publication_id="p1", text_original=f"texto {i}") for i in range(1, 11))
+    session.commit()
+    session.close()
+    return session_factory
+
+
+def upper(rows):
+    return {row_id: text.upper() for row_id, text in rows}
+
+
+def translated(Session, target: BackfillTarget = COMMENTS):
+    session = Session()
+    try:
+        return dict(session.query(target.model.id, getattr(target.model, target.dst)))
+    finally:
+        session.close()
+
+
+def test_interrupted_run_resumes_after_last_committed_chunk(Session):
+    def fail_on_second_chunk(rows):
+        if rows[0][0] > 3:
+            raise RuntimeError("interrumpido")
+        return upper(rows)
+
+    with pytest.raises(RuntimeError):
+        run_backfill(COMMENTS, fail_on_second_chunk, chunk_size=3)
+    session = Session()
+    assert get_checkpoint(session, COMMENTS.job).last_id == "3"
+    session.close()
+
+    seen = []
+    assert run_backfill(COMMENTS, lambda rows: seen.extend(r[0] for r in rows) or upper(rows), chunk_size=3) == 7
+    assert seen == list(range(4, 11))
+    assert all(value == f"TEXTO {i}" for i, value in translated(Session).items())
+
+
+def test_finished_run_clears_checkpoint_and_rerun_picks_up_skipped_rows(Session):
+    # La fila 5 falla (como "Fila omitida" en translate_rows) y no se escribe
+    assert run_backfill(COMMENTS, lambda rows: {i: v for i, v in upper(rows).items() if i != 5}, chunk_size=3) == 9
+    session = Session()
+    assert session.query(BackfillCheckpoint).count() == 0
+    session.close()
+
+    seen = []
+    assert run_backfill(COMMENTS, lambda rows: seen.extend(r[0] for r in rows) or upper(rows), chunk_size=3) == 1
+    assert seen == [5]
+    assert translated(Session)[5] == "TEXTO 5"
+
+
+def test_rerun_translates_publications_added_below_the_last_id(Session):
+    assert run_backfill(PUBLICATIONS, upper) == 1
+    session = Session()
+    session.add(Publication(id="a0", red_social="Reddit", title_original="Nueva"))
+    session.commit()
+    session.close()
+
+    assert run_backfill(PUBLICATIONS, upper) == 1
+    assert translated(Session, PUBLICATIONS) == {"p1": "HOLA", "a0": "NUEVA"}
+
+
+def test_rows_translated_to_the_same_text_are_not_pending_again(Session):
+    session = Session()
+    # Como guardan los scrapers un texto ya en inglés: traducción == original
+    session.query(Comment).update({Comment.text_translated: Comment.text_original})
+    session.commit()
+    session.close()
+
+    assert run_backfill(COMMENTS, lambda rows: dict(rows)) == 10
+    seen = []
+    assert run_backfill(COMMENTS, lambda rows: seen.extend(rows) or dict(rows)) == 0
+    assert seen == []
+
+
+def test_translate_rows_chunks_long_texts_instead_of_truncating():
+    batches = []
+
+    def translator(texts, **kwargs):
+        batches.append(list(texts))
+        return [{"translation_text": text.upper()} for text in texts]
+
+    long_text = "Una frase larga de prueba. " * 60
+    result = translate_rows(translator, [(1, "hola"), (2, long_text)])
+    assert result[1] == "HOLA"
+    assert result[2] == long_text.strip().upper()
+    assert all(len(chunk) <= 512 for batch in batches for chunk in batch)